@@ -0,0 +1,138 @@
+"""
+Request-scoped buffer for the audit signals.
+
+``accounts.signals`` used to insert one AuditLog row per saved/deleted
+object, after fetching its Cliente (or ``instance.campaign.cliente``).
+Bulk edits and imports paid several queries per object. Now:
+
+  - ``record`` builds the AuditLog in memory with just the ``cliente_id``;
+    for campaign-scoped models the campaign -> cliente id is looked up once
+    per campaign per request (``values_list``, no Cliente instances).
+  - Inside a transaction the entry only joins the buffer on commit, so a
+    rollback drops its audit events together with the changes.
+  - ``CurrentRequestMiddleware`` opens the buffer (``begin``) and writes it
+    with one ``bulk_create`` at response end (``end``). Without an open
+    buffer (management commands, thread pools, callbacks after the
+    response), committed entries are written right away.
+"""
+import logging
+import threading
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+_state = threading.local()
+
+
+class AuditBuffer:
+    """Pending AuditLog entries of one request, plus the campaign -> cliente memo."""
+
+    def __init__(self):
+        self.entries = []
+        self.campaign_clientes = {}
+
+    def cliente_id_for_campaign(self, campaign_id):
+        if campaign_id not in self.campaign_clientes:
+            from campaigns.models import Campaign
+
+            self.campaign_clientes[campaign_id] = (
+                Campaign.objects.filter(pk=campaign_id).values_list("cliente_id", flat=True).first()
+            )
+        return self.campaign_clientes[campaign_id]
+
+
+def current_buffer():
+    return getattr(_state, "buffer", None)
+
+
+def begin():
+    """Open the buffer for the current request (thread)."""
+    _state.buffer = AuditBuffer()
+
+
+def end():
+    """Write everything buffered since ``begin`` and close the buffer."""
+    buffer = current_buffer()
+    _state.buffer = None
+    if buffer is not None:
+        _write(buffer.entries)
+
+
+def _clear_dangling_fks(entries):
+    """Faz o papel do ``SET_NULL``: o cliente/usuário pode ter sido apagado depois do evento.
+
+    Os eventos são gravados após o commit — ``cliente_deleted`` e os
+    ``campaign_deleted`` em cascata apontam para um Cliente que já não existe.
+    """
+    from accounts.models import Cliente, User
+
+    for field, model in (("cliente", Cliente), ("user", User)):
+        attname = f"{field}_id"
+        ids = {getattr(e, attname) for e in entries if getattr(e, attname)}
+        if not ids:
+            continue
+        existing = set(model.objects.filter(id__in=ids).values_list("id", flat=True))
+        for entry in entries:
+            if getattr(entry, attname) and getattr(entry, attname) not in existing:
+                setattr(entry, field, None)
+
+
+def _write(entries):
+    if not entries:
+        return
+    from accounts.audit_storage import add_daily_counts
+    from accounts.models import AuditLog
+
+    try:
+        _clear_dangling_fks(entries)
+        with transaction.atomic():
+            AuditLog.objects.bulk_create(entries, batch_size=500)
+            add_daily_counts(entries)
+        return
+    except Exception:
+        logger.exception("Could not bulk write %d audit log entries; retrying one by one", len(entries))
+
+    # Uma linha ruim não pode levar junto as demais da requisição.
+    for entry in entries:
+        entry.pk = None
+        try:
+            with transaction.atomic():
+                entry.save(force_insert=True)
+                add_daily_counts([entry])
+        except Exception:
+            # Auditoria não pode derrubar uma requisição cujas mudanças já foram gravadas.
+            logger.exception("Could not write audit log entry %s", entry.event_type)
+
+
+def _enqueue(entry):
+    buffer = current_buffer()
+    if buffer is None:
+        _write([entry])
+    else:
+        buffer.entries.append(entry)
+
+
+def resolve_cliente_id(instance):
+    """Cliente of ``instance`` without loading it: own ``cliente_id`` or its campaign's."""
+    cliente_id = getattr(instance, "cliente_id", None)
+    if cliente_id:
+        return cliente_id
+    campaign_id = getattr(instance, "campaign_id", None)
+    if not campaign_id:
+        return None
+    campaign = instance._state.fields_cache.get("campaign")
+    if campaign is not None:
+        return campaign.cliente_id
+    buffer = current_buffer()
+    if buffer is None:
+        buffer = AuditBuffer()
+    return buffer.cliente_id_for_campaign(campaign_id)
+
+
+def record(event_type, *, request=None, user=None, cliente_id=None, details=None):
+    """Buffer one audit event (written on commit / at response end)."""
+    from accounts.models import AuditLog
+
+    entry = AuditLog.build(event_type, request=request, user=user, cliente_id=cliente_id, details=details)
+    transaction.on_commit(lambda: _enqueue(entry))
@@ -0,0 +1,170 @@
+"""
+AuditLog storage: monthly partitions, retention and daily counters.
+
+On PostgreSQL ``accounts_auditlog`` is a table partitioned by month on
+``created_at`` (migration 0018): ``accounts_auditlog_pYYYYMM`` covers one UTC
+month and ``accounts_auditlog_default`` catches anything outside the created
+ranges. Retention drops whole partitions instead of deleting rows.
+``ensure_partitions`` (run by ``cleanup_audit_logs``) creates the next months
+ahead of time.
+
+On other databases (SQLite in dev/tests) the table is a plain table and
+retention falls back to range deletes, one month per statement, on the
+``created_at`` index.
+
+``AuditDailyCount`` keeps per-day/event_type totals, updated in the same
+transaction as every AuditLog insert, so the audit dashboard does not scan
+raw rows.
+"""
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from datetime import date, datetime, timezone as dt_timezone
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MONTHS_AHEAD = 3
+
+
+def _table() -> str:
+    from accounts.models import AuditLog
+
+    return AuditLog._meta.db_table
+
+
+def month_start(value: date | datetime) -> date:
+    """First day of the (UTC) month of ``value``."""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc) if timezone.is_aware(value) else value
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{_table()}_p{month:%Y%m}"
+
+
+def _bound(month: date) -> datetime:
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+# ── Daily counters ───────────────────────────────────────────────────
+
+def add_daily_counts(entries) -> None:
+    """Add ``entries`` (saved AuditLog instances) to ``AuditDailyCount``."""
+    from accounts.models import AuditDailyCount
+
+    groups = Counter((timezone.localdate(e.created_at), e.event_type) for e in entries)
+    for (day, event_type), n in sorted(groups.items()):
+        qs = AuditDailyCount.objects.filter(day=day, event_type=event_type)
+        if qs.update(count=F("count") + n):
+            continue
+        try:
+            with transaction.atomic():
+                AuditDailyCount.objects.create(day=day, event_type=event_type, count=n)
+        except IntegrityError:
+            # Outro processo criou a linha do dia entre o update e o create.
+            qs.update(count=F("count") + n)
+
+
+# ── Partitions (PostgreSQL) ──────────────────────────────────────────
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [_table()])
+        return cursor.fetchone() is not None
+
+
+def partitions() -> dict[date, str]:
+    """Monthly partitions that exist: ``{month: table name}``."""
+    if not is_partitioned():
+        return {}
+    prefix = f"{_table()}_p"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(%s)",
+            [_table()],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    result = {}
+    for name in names:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            result[date(int(suffix[:4]), int(suffix[4:]), 1)] = name
+    return result
+
+
+def ensure_partitions(months_ahead: int = DEFAULT_MONTHS_AHEAD) -> list[str]:
+    """Create the partitions from the current month to ``months_ahead`` months ahead."""
+    if not is_partitioned():
+        return []
+    existing = partitions()
+    table = connection.ops.quote_name(_table())
+    first = month_start(timezone.now())
+    created = []
+    for n in range(months_ahead + 1):
+        month = add_months(first, n)
+        if month in existing:
+            continue
+        name = partition_name(month)
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE TABLE {connection.ops.quote_name(name)} PARTITION OF {table} "
+                    "FOR VALUES FROM (%s) TO (%s)",
+                    [_bound(month), _bound(add_months(month, 1))],
+                )
+        except Exception:
+            # Ex.: linhas desse mês já caíram na partição default.
+            logger.exception("Could not create audit log partition %s", name)
+            continue
+        created.append(name)
+    return created
+
+
+# ── Retention ────────────────────────────────────────────────────────
+
+def purge_before(cutoff: datetime) -> tuple[int, int]:
+    """Remove audit logs older than ``cutoff``. Returns ``(partitions dropped, rows deleted)``.
+
+    Monthly partitions that end before ``cutoff`` are dropped whole; the rest
+    (the partition that straddles the cutoff, the default partition, or the
+    plain table outside PostgreSQL) is deleted by range, one month per
+    statement. Daily counters of the purged days go too.
+    """
+    from accounts.models import AuditDailyCount, AuditLog
+
+    dropped = 0
+    for month, name in sorted(partitions().items()):
+        if _bound(add_months(month, 1)) > cutoff:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE {connection.ops.quote_name(name)}")
+        dropped += 1
+
+    deleted = 0
+    oldest = AuditLog.objects.filter(created_at__lt=cutoff).aggregate(oldest=Min("created_at"))["oldest"]
+    if oldest is not None:
+        upper = add_months(month_start(oldest), 1)
+        while True:
+            bound = min(_bound(upper), cutoff)
+            count, _ = AuditLog.objects.filter(created_at__lt=bound).delete()
+            deleted += count
+            if bound >= cutoff:
+                break
+            upper = add_months(upper, 1)
+
+    AuditDailyCount.objects.filter(day__lt=timezone.localdate(cutoff)).delete()
+    return dropped, deleted
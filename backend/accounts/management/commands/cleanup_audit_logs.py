@@ -2,6 +2,10 @@
 Management command to clean up old audit logs.
 Keeps the system lightweight by removing logs older than N days.
 
+On PostgreSQL whole monthly partitions are dropped and the next months'
+partitions are created (see accounts.audit_storage); elsewhere old rows are
+deleted by date range.
+
 Usage:
   python manage.py cleanup_audit_logs              # default: 90 days
   python manage.py cleanup_audit_logs --days 180   # keep 180 days
@@ -30,34 +34,31 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
+        from accounts.audit_storage import ensure_partitions, purge_before
         from accounts.models import AuditLog
 
         days = options["days"]
         cutoff = timezone.now() - timedelta(days=days)
-        qs = AuditLog.objects.filter(created_at__lt=cutoff)
-        count = qs.count()
 
         if options["dry_run"]:
+            count = AuditLog.objects.filter(created_at__lt=cutoff).count()
             self.stdout.write(
                 self.style.WARNING(f"DRY RUN: {count} logs older than {days} days would be deleted (before {cutoff.date()})")
             )
             return
 
-        if count == 0:
+        created = ensure_partitions()
+        if created:
+            self.stdout.write(f"  Created partitions: {', '.join(created)}")
+
+        dropped, deleted = purge_before(cutoff)
+        if not dropped and not deleted:
             self.stdout.write(self.style.SUCCESS(f"No logs older than {days} days."))
             return
 
-        # Delete in batches to avoid memory issues
-        batch_size = 5000
-        deleted_total = 0
-        while True:
-            ids = list(qs.values_list("pk", flat=True)[:batch_size])
-            if not ids:
-                break
-            deleted, _ = AuditLog.objects.filter(pk__in=ids).delete()
-            deleted_total += deleted
-            self.stdout.write(f"  Deleted batch: {deleted} (total: {deleted_total}/{count})")
-
         self.stdout.write(
-            self.style.SUCCESS(f"Done. Deleted {deleted_total} audit logs older than {days} days.")
+            self.style.SUCCESS(
+                f"Done. Dropped {dropped} monthly partitions and deleted {deleted} rows "
+                f"of audit logs older than {days} days."
+            )
         )
@@ -4,6 +4,8 @@ Used by audit signals to associate model changes with the requesting user.
 """
 import threading
 
+from accounts import audit_buffer
+
 _thread_locals = threading.local()
 
 
@@ -21,14 +23,20 @@ def get_current_user():
 
 
 class CurrentRequestMiddleware:
-    """Store the current request in thread-local for audit logging."""
+    """Store the current request in thread-local for audit logging.
+
+    Also opens the request's audit buffer and flushes it (one bulk insert)
+    once the response is ready.
+    """
 
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
         _thread_locals.request = request
+        audit_buffer.begin()
         try:
             return self.get_response(request)
         finally:
             _thread_locals.request = None
+            audit_buffer.end()
@@ -0,0 +1,160 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:43
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+MONTHS_AHEAD = 3
+
+
+def _month_bound(year, month):
+    year, month = year + (month - 1) // 12, (month - 1) % 12 + 1
+    return datetime(year, month, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_auditlog(apps, schema_editor):
+    """PostgreSQL: recria accounts_auditlog particionada por mês em created_at.
+
+    A PK passa a ser (id, created_at) — exigência do particionamento; o Django
+    continua usando só ``id``. Índices e FKs são recriados com os mesmos nomes.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+    table = "accounts_auditlog"
+    old = "accounts_auditlog_unpartitioned"
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [table])
+        if cursor.fetchone():
+            return
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p'", [table]
+        )
+        pkey = cursor.fetchone()[0]
+        cursor.execute("SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s", [table])
+        indexes = [(name, ddl) for name, ddl in cursor.fetchall() if name != pkey]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(
+            "SELECT is_identity FROM information_schema.columns WHERE table_name = %s AND column_name = 'id'",
+            [table],
+        )
+        identity = cursor.fetchone()[0] == "YES"
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [table])
+        sequence = cursor.fetchone()[0]
+        cursor.execute(f"SELECT min(created_at) FROM {table}")
+        oldest = cursor.fetchone()[0] or timezone.now()
+
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {old}")
+        cursor.execute(
+            f"CREATE TABLE {table} (LIKE {old} INCLUDING DEFAULTS INCLUDING IDENTITY) PARTITION BY RANGE (created_at)"
+        )
+        now = timezone.now().astimezone(dt_timezone.utc)
+        oldest = oldest.astimezone(dt_timezone.utc)
+        year, month = oldest.year, oldest.month
+        last = _month_bound(now.year, now.month + MONTHS_AHEAD)
+        while _month_bound(year, month) <= last:
+            cursor.execute(
+                f"CREATE TABLE {table}_p{year:04d}{month:02d} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)",
+                [_month_bound(year, month), _month_bound(year, month + 1)],
+            )
+            year, month = year + month // 12, month % 12 + 1
+        cursor.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+        overriding = "OVERRIDING SYSTEM VALUE " if identity else ""
+        cursor.execute(f"INSERT INTO {table} {overriding}SELECT * FROM {old}")
+        if identity:
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), (SELECT COALESCE(max(id), 0) + 1 FROM {old}), false)",
+                [table],
+            )
+        elif sequence:
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+        cursor.execute(f"DROP TABLE {old}")
+
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {pkey} PRIMARY KEY (id, created_at)")
+        for _name, ddl in indexes:
+            cursor.execute(ddl)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} {definition}")
+
+
+def backfill_daily_counts(apps, schema_editor):
+    AuditLog = apps.get_model("accounts", "AuditLog")
+    AuditDailyCount = apps.get_model("accounts", "AuditDailyCount")
+    rows = (
+        AuditLog.objects.annotate(day=TruncDate("created_at"))
+        .values("day", "event_type")
+        .annotate(total=Count("id"))
+        .order_by()
+    )
+    AuditDailyCount.objects.bulk_create(
+        [AuditDailyCount(day=r["day"], event_type=r["event_type"], count=r["total"]) for r in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0017_audit_event_types"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditDailyCount",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("day", models.DateField()),
+                (
+                    "event_type",
+                    models.CharField(
+                        choices=[
+                            ("login", "Login"),
+                            ("logout", "Logout"),
+                            ("login_failed", "Login Falhou"),
+                            ("piece_deleted", "Peca Deletada"),
+                            ("piece_created", "Peca Criada"),
+                            ("campaign_created", "Campanha Criada"),
+                            ("campaign_deleted", "Campanha Deletada"),
+                            ("campaign_updated", "Campanha Atualizada"),
+                            ("asset_uploaded", "Asset Enviado"),
+                            ("user_created", "Usuario Criado"),
+                            ("user_updated", "Usuario Atualizado"),
+                            ("user_deleted", "Usuario Deletado"),
+                            ("cliente_created", "Cliente Criado"),
+                            ("cliente_updated", "Cliente Atualizado"),
+                            ("cliente_deleted", "Cliente Deletado"),
+                            ("media_plan_uploaded", "Plano de Midia Enviado"),
+                            ("contract_uploaded", "Contrato Enviado"),
+                            ("password_reset_requested", "Recuperacao de Senha Solicitada"),
+                            ("password_reset_completed", "Senha Redefinida"),
+                            ("financial_updated", "Dados Financeiros Atualizados"),
+                            ("financial_deleted", "Dados Financeiros Deletados"),
+                            ("visibility_changed", "Visibilidade Alterada"),
+                            ("efficiency_updated", "Eficiencia Atualizada"),
+                            ("efficiency_deleted", "Eficiencia Deletada"),
+                            ("region_updated", "Regioes Atualizadas"),
+                            ("campaign_status", "Status Campanha Alterado"),
+                            ("settings_updated", "Configuracoes Atualizadas"),
+                        ],
+                        max_length=30,
+                    ),
+                ),
+                ("count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Contagem Diária de Auditoria",
+                "verbose_name_plural": "Contagens Diárias de Auditoria",
+                "unique_together": {("day", "event_type")},
+            },
+        ),
+        migrations.RunPython(backfill_daily_counts, migrations.RunPython.noop),
+        migrations.RunPython(partition_auditlog, migrations.RunPython.noop),
+    ]
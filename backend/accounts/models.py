@@ -1,5 +1,5 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
 
@@ -134,6 +134,17 @@ class AuditLog(models.Model):
     @classmethod
     def log(cls, event_type: str, request=None, user=None, cliente=None, details=None):
         """Helper para criar logs de auditoria."""
+        from accounts.audit_storage import add_daily_counts
+
+        entry = cls.build(event_type, request=request, user=user, cliente=cliente, details=details)
+        with transaction.atomic():
+            entry.save(force_insert=True)
+            add_daily_counts([entry])
+        return entry
+
+    @classmethod
+    def build(cls, event_type: str, request=None, user=None, cliente=None, cliente_id=None, details=None):
+        """Monta o log sem gravar (para ``bulk_create`` em ``accounts.audit_buffer``)."""
         ip_address = None
         user_agent = ""
 
@@ -148,14 +159,38 @@ class AuditLog(models.Model):
             if user is None and hasattr(request, "user") and request.user.is_authenticated:
                 user = request.user
 
-        return cls.objects.create(
+        entry = cls(
             event_type=event_type,
             user=user,
-            cliente=cliente,
             ip_address=ip_address,
             user_agent=user_agent,
             details=details or {},
         )
+        if cliente is not None:
+            entry.cliente = cliente
+        else:
+            entry.cliente_id = cliente_id
+        return entry
+
+
+class AuditDailyCount(models.Model):
+    """Contagem diária de eventos de auditoria por tipo (lida pelo painel de logs).
+
+    Mantida por ``accounts.audit_storage.add_daily_counts`` a cada gravação de
+    ``AuditLog``, para o painel não varrer a tabela bruta.
+    """
+
+    day = models.DateField()
+    event_type = models.CharField(max_length=30, choices=AuditLog.EventType.choices)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Contagem Diária de Auditoria"
+        verbose_name_plural = "Contagens Diárias de Auditoria"
+        unique_together = ("day", "event_type")
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.event_type}: {self.count}"
 
 
 class Alert(models.Model):
@@ -4,10 +4,13 @@ explicit calls in every view. Keeps the system lightweight by:
   - Only logging meaningful changes (skips auto_now fields)
   - Storing minimal details (model, pk, changed fields)
   - Using thread-local request to get the acting user
+  - Buffering the rows and writing them in one INSERT per request
+    (see accounts.audit_buffer)
 """
 from django.db.models.signals import post_save, pre_delete
 from django.dispatch import receiver
 
+from accounts import audit_buffer
 from accounts.middleware import get_current_request, get_current_user
 
 
@@ -18,9 +21,7 @@ _SKIP_FIELDS = {"updated_at", "created_at", "last_login", "date_joined", "passwo
 
 
 def _audit(event_type, instance, details):
-    """Create an AuditLog entry using the current request context."""
-    from accounts.models import AuditLog
-
+    """Buffer an AuditLog entry using the current request context."""
     request = get_current_request()
     user = get_current_user()
 
@@ -28,22 +29,11 @@ def _audit(event_type, instance, details):
     if user is None and request is None:
         return
 
-    cliente = None
-    if hasattr(instance, "cliente_id") and instance.cliente_id:
-        cliente_id = instance.cliente_id
-        from accounts.models import Cliente
-        try:
-            cliente = Cliente.objects.get(pk=cliente_id)
-        except Cliente.DoesNotExist:
-            pass
-    elif hasattr(instance, "campaign") and hasattr(instance.campaign, "cliente"):
-        cliente = instance.campaign.cliente
-
-    AuditLog.log(
-        event_type=event_type,
+    audit_buffer.record(
+        event_type,
         request=request,
         user=user,
-        cliente=cliente,
+        cliente_id=audit_buffer.resolve_cliente_id(instance),
         details=details,
     )
 
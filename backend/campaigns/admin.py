@@ -10,6 +10,7 @@ from .models import (
     PlacementDay,
     PlacementLine,
 )
+from .rollups import schedule_rollup_refresh
 
 
 @admin.register(Campaign)
@@ -50,10 +51,24 @@ class PlacementDayAdmin(admin.ModelAdmin):
     list_display = ("placement_line", "date", "insertions", "cost", "impressions", "clicks")
     list_filter = ("date",)
 
+    # Sem receiver de delete em PlacementDay (ver campaigns.signals): o admin
+    # agenda o recálculo do agregado para os dias que remove.
+    def delete_model(self, request, obj):
+        campaign_id = obj.placement_line.campaign_id
+        super().delete_model(request, obj)
+        schedule_rollup_refresh(campaign_id, obj.date)
+
+    def delete_queryset(self, request, queryset):
+        affected = list(queryset.values_list("placement_line__campaign_id", "date").distinct())
+        super().delete_queryset(request, queryset)
+        for campaign_id, day in affected:
+            schedule_rollup_refresh(campaign_id, day)
+
 
 @admin.register(CreativeAsset)
 class CreativeAssetAdmin(admin.ModelAdmin):
-    list_display = ("piece", "file", "checksum", "created_at")
+    list_display = ("piece", "file", "checksum", "probe_status", "created_at")
+    list_filter = ("probe_status",)
     search_fields = ("file", "preview_url", "thumb_url", "checksum")
 
 
@@ -0,0 +1,158 @@
+"""Ingestão em lote de arquivos de peças (vídeo/áudio/imagem).
+
+Antes cada arquivo era hasheado, checado com um ``exists()``, salvo e
+passado pelo ffprobe dentro da requisição (e da transação). Agora:
+
+1. os SHA-256 são calculados num pool de threads;
+2. duplicados saem com uma única consulta ``checksum__in``;
+3. os ``CreativeAsset`` são gravados de uma vez, com ``probe_status=pending``;
+4. o ffprobe roda depois do commit, numa fila em background que preenche
+   ``metadata`` e ``Piece.duration_sec`` e gera as miniaturas
+   (``campaigns.renditions``).
+
+A fila em processo (``ASSET_PROBE_IN_PROCESS``) perde o que estava pendente
+se o servidor reiniciar; ``manage.py probe_creative_assets`` processa os
+assets que ficaram PENDING.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.db import connections, transaction
+
+from .models import CreativeAsset, Piece
+from .renditions import build_renditions
+from .services import compute_sha256, extract_duration_sec_from_ffprobe, try_ffprobe
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HASH_CONCURRENCY = 4
+DEFAULT_PROBE_CONCURRENCY = 2
+
+_probe_pool: ThreadPoolExecutor | None = None
+_probe_pool_lock = threading.Lock()
+
+
+def hash_files(files: list[UploadedFile]) -> list[str]:
+    """SHA-256 de cada arquivo, na mesma ordem, calculados em paralelo."""
+    workers = int(getattr(settings, "ASSET_HASH_CONCURRENCY", DEFAULT_HASH_CONCURRENCY) or 1)
+    if len(files) <= 1 or workers <= 1:
+        return [compute_sha256(f) for f in files]
+    with ThreadPoolExecutor(max_workers=min(workers, len(files)), thread_name_prefix="asset-hash") as pool:
+        return list(pool.map(compute_sha256, files))
+
+
+def ingest_assets(items: Iterable[tuple[Piece, UploadedFile]]) -> dict[str, Any]:
+    """Grava os arquivos como ``CreativeAsset`` das peças e agenda o ffprobe.
+
+    Arquivos cujo SHA-256 já existe na mesma peça (no banco ou antes no
+    próprio lote) são ignorados. Returns ``{"assets": [...], "skipped_duplicates": n}``.
+    """
+    items = list(items)
+    checksums = hash_files([f for _, f in items])
+
+    seen = set(
+        CreativeAsset.objects.filter(
+            piece_id__in={piece.id for piece, _ in items},
+            checksum__in={c for c in checksums if c},
+        ).values_list("piece_id", "checksum")
+    )
+
+    assets: list[CreativeAsset] = []
+    skipped = 0
+    for (piece, f), checksum in zip(items, checksums):
+        if checksum and (piece.id, checksum) in seen:
+            skipped += 1
+            continue
+        seen.add((piece.id, checksum))
+        asset = CreativeAsset(
+            piece=piece,
+            checksum=checksum,
+            probe_status=CreativeAsset.ProbeStatus.PENDING,
+            metadata={
+                "original_name": getattr(f, "name", ""),
+                "content_type": getattr(f, "content_type", ""),
+                "size_bytes": getattr(f, "size", None),
+            },
+        )
+        asset.file.save(getattr(f, "name", "") or "asset", f, save=False)
+        assets.append(asset)
+
+    CreativeAsset.objects.bulk_create(assets)
+    asset_ids = [a.id for a in assets]
+    if asset_ids:
+        transaction.on_commit(lambda: enqueue_probes(asset_ids))
+    return {"assets": assets, "skipped_duplicates": skipped}
+
+
+def probe_asset(asset_id: int) -> str | None:
+    """Roda o ffprobe de um asset PENDING, grava o resultado e gera as renditions. Returns o novo status."""
+    asset = CreativeAsset.objects.filter(id=asset_id, probe_status=CreativeAsset.ProbeStatus.PENDING).first()
+    if asset is None:
+        return None
+
+    meta: dict[str, Any] = {}
+    if asset.file:
+        try:
+            meta = try_ffprobe(asset.file.path)
+        except Exception:
+            logger.warning("ffprobe failed for asset %s", asset_id, exc_info=True)
+
+    merged = dict(asset.metadata or {})
+    status = CreativeAsset.ProbeStatus.FAILED
+    if meta:
+        status = CreativeAsset.ProbeStatus.DONE
+        merged["ffprobe"] = meta
+        dur = extract_duration_sec_from_ffprobe(meta)
+        if dur is not None:
+            merged["duration_sec"] = dur
+            # Só preenche peças ainda sem duração (a primeira mídia define).
+            Piece.objects.filter(id=asset.piece_id, duration_sec=0).update(duration_sec=dur)
+    CreativeAsset.objects.filter(id=asset.id).update(metadata=merged, probe_status=status)
+
+    asset.metadata = merged
+    try:
+        build_renditions(asset)
+    except Exception:
+        logger.warning("Rendition generation failed for asset %s", asset_id, exc_info=True)
+    return status
+
+
+def probe_pending_assets(limit: int | None = None) -> int:
+    """Processa os assets PENDING mais antigos. Returns quantos foram processados."""
+    qs = CreativeAsset.objects.filter(probe_status=CreativeAsset.ProbeStatus.PENDING).order_by("id")
+    ids = list(qs.values_list("id", flat=True)[:limit] if limit else qs.values_list("id", flat=True))
+    return sum(1 for asset_id in ids if probe_asset(asset_id) is not None)
+
+
+def _get_probe_pool() -> ThreadPoolExecutor:
+    global _probe_pool
+    with _probe_pool_lock:
+        if _probe_pool is None:
+            workers = int(getattr(settings, "ASSET_PROBE_CONCURRENCY", DEFAULT_PROBE_CONCURRENCY) or 1)
+            _probe_pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="asset-probe")
+        return _probe_pool
+
+
+def _probe_in_thread(asset_id: int) -> None:
+    try:
+        probe_asset(asset_id)
+    except Exception:
+        logger.exception("Background probe failed for asset %s", asset_id)
+    finally:
+        connections.close_all()
+
+
+def enqueue_probes(asset_ids: Iterable[int]) -> None:
+    """Agenda o ffprobe dos assets na fila em processo (se ligada)."""
+    if not getattr(settings, "ASSET_PROBE_IN_PROCESS", True):
+        return
+    pool = _get_probe_pool()
+    for asset_id in asset_ids:
+        pool.submit(_probe_in_thread, asset_id)
@@ -0,0 +1,120 @@
+"""Versão dos dados de cada cliente, usada para invalidar caches de telas.
+
+As telas de dashboard guardam o contexto calculado com a versão dos dados do
+cliente na chave (``web.cache.view_cache_key``). Toda escrita que muda os
+números — recálculo do agregado (syncs e imports), fim de um sync, edição de
+``PlacementDay``/``FinancialSummary``/``Campaign`` — incrementa a versão; as
+entradas antigas deixam de ser lidas e expiram pelo TTL.
+
+A versão do cliente 0 cobre as telas sem filtro de cliente (admin vendo
+todos) e sobe junto com qualquer outra.
+
+Além da versão geral, cada cliente tem uma versão por fonte (``SOURCES``):
+quem monta resultados por partes (o briefing de IA em
+``web.services.ai_analytics``) recalcula só as partes cujas fontes mudaram.
+Incrementar uma fonte incrementa também a versão geral.
+
+Os contadores ficam no cache compartilhado (não no LRU do processo), para
+que todos os processos vejam o incremento na hora.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import BaseCache, caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+ALL_CLIENTES = 0
+
+# Fontes de dados versionadas separadamente
+CAMPAIGNS = "campaigns"      # Campaign (e o próprio cliente)
+PLACEMENTS = "placements"    # PlacementLine/PlacementDay (syncs, imports de plano)
+FINANCIAL = "financial"      # FinancialSummary
+REGIONS = "regions"          # RegionInvestment
+PIS = "pis"                  # PIControl
+SOURCES = (CAMPAIGNS, PLACEMENTS, FINANCIAL, REGIONS, PIS)
+
+
+def _store() -> BaseCache:
+    return caches["shared" if "shared" in settings.CACHES else "default"]
+
+
+def _key(cliente_id: int | None, source: str | None = None) -> str:
+    key = f"cliente:{cliente_id or ALL_CLIENTES}:data_version"
+    return f"{key}:{source}" if source else key
+
+
+def _initial() -> int:
+    # Começa do relógio (ms), não de 0: se o contador se perder (restart do
+    # Redis, limpeza do cache), não volta a uma versão que já tinha entradas.
+    return int(time.time() * 1000)
+
+
+def data_version(cliente_id: int | None) -> int:
+    """Versão atual dos dados do cliente (``None``/0 = todos os clientes)."""
+    return data_versions(cliente_id, [None])[None]
+
+
+def data_versions(cliente_id: int | None, sources: Iterable[str | None]) -> dict[str | None, int]:
+    """Versões do cliente por fonte, numa leitura só (``None`` = versão geral)."""
+    store = _store()
+    keys = {source: _key(cliente_id, source) for source in sources}
+    found = store.get_many(list(keys.values()))
+    versions = {}
+    for source, key in keys.items():
+        version = found.get(key)
+        if version is None:
+            store.add(key, _initial(), timeout=None)
+            version = store.get(key)
+        versions[source] = int(version or 0)
+    return versions
+
+
+def _bump_now(cliente_ids: set[int], sources: tuple[str, ...]) -> None:
+    store = _store()
+    for cliente_id in sorted(cliente_ids | {ALL_CLIENTES}):
+        for source in (None, *sources):
+            key = _key(cliente_id, source)
+            try:
+                store.incr(key)
+            except ValueError:
+                store.add(key, _initial(), timeout=None)
+
+
+def _safe_bump(cliente_ids: set[int], sources: tuple[str, ...]) -> None:
+    try:
+        _bump_now(cliente_ids, sources)
+    except Exception:
+        # Cache fora do ar não pode derrubar um sync/import já gravado.
+        logger.warning("Could not bump data version for clientes %s", sorted(cliente_ids), exc_info=True)
+
+
+def bump_data_version(cliente_ids: Iterable[int | None], sources: Iterable[str] = SOURCES) -> None:
+    """Invalida os caches de tela dos clientes, após o commit da transação atual.
+
+    ``sources`` diz quais fontes mudaram (padrão: todas); a versão geral sobe
+    sempre. Antes do commit, uma leitura concorrente ainda veria os dados
+    antigos e os gravaria com a versão nova.
+    """
+    ids = {int(c) for c in cliente_ids if c}
+    changed = tuple(sources)
+    transaction.on_commit(lambda: _safe_bump(ids, changed))
+
+
+def bump_for_campaigns(campaign_ids: Iterable[int], sources: Iterable[str] = SOURCES) -> None:
+    """``bump_data_version`` para os clientes donos das campanhas."""
+    from .models import Campaign
+
+    ids = {int(c) for c in campaign_ids if c}
+    if not ids:
+        return
+    bump_data_version(
+        Campaign.objects.filter(id__in=ids).values_list("cliente_id", flat=True).distinct(),
+        sources,
+    )
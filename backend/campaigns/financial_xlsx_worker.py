@@ -329,8 +329,14 @@ def parse_custo_geracao(wb) -> list[dict]:
 
 # ── MAIN ──────────────────────────────────────────────────────────────────────
 
+_lxml_blocked = False
+
+
 def _disable_lxml() -> None:
     """Block lxml import to prevent segfault on Python 3.8 + openpyxl."""
+    global _lxml_blocked
+    if _lxml_blocked:
+        return
     try:
         import importlib.abc
         import importlib.machinery
@@ -350,6 +356,7 @@ def _disable_lxml() -> None:
             raise ImportError("lxml blocked")
 
     sys.meta_path.insert(0, _BlockLxml())
+    _lxml_blocked = True
 
 
 def main(path: str) -> dict:
@@ -433,6 +440,11 @@ def main(path: str) -> dict:
     }
 
 
+def parse(path: str) -> dict:
+    """``main`` com o resultado JSON-safe, como o worker imprime no stdout."""
+    return json.loads(json.dumps(main(path), ensure_ascii=False, default=str))
+
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print(json.dumps({"ok": False, "errors": ["Usage: financial_xlsx_worker.py <path>"]}))
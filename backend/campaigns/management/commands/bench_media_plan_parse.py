@@ -0,0 +1,94 @@
+"""Benchmark do parser de plano de mídia (campaigns.xlsx_worker).
+
+Gera um plano sintético de um ano com uma coluna por dia (rótulos de mês
+mesclados no cabeçalho e linha de dias da semana, como nos planos táticos)
+e mede o tempo de ``xlsx_worker.parse`` no próprio processo, sem o pool.
+
+Usage:
+    python manage.py bench_media_plan_parse                   # 1 ano, 300 linhas
+    python manage.py bench_media_plan_parse --rows=1000 --repeat=5
+    python manage.py bench_media_plan_parse --file=plano.xlsx # planilha real
+"""
+
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+
+from campaigns import xlsx_worker
+
+_MONTH_LABELS = (
+    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro",
+)
+_WEEKDAY_LABELS = ("S", "T", "Q", "Q", "S", "S", "D")
+
+
+def build_synthetic_plan(path: str, *, year: int, rows: int) -> int:
+    """Grava em ``path`` um plano diário de ``year`` com ``rows`` linhas. Returns dias."""
+    import openpyxl
+
+    days = []
+    d = date(year, 1, 1)
+    while d.year == year:
+        days.append(d)
+        d += timedelta(days=1)
+
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("OPEN TV")
+    ws.append([f"Plano tático {year}"])
+    ws.append(
+        ["Market", "Channel", "Program", "Formato"]
+        + [_MONTH_LABELS[d.month - 1] if d.day == 1 else None for d in days]
+    )
+    ws.append([None, None, None, None] + [_WEEKDAY_LABELS[d.weekday()] for d in days])
+    ws.append([None, None, None, None] + [d.day for d in days])
+    for i in range(rows):
+        ws.append(
+            [f"Praça {i % 20}", f"Canal {i % 7}", f"Programa {i}", "30s"]
+            + [(1 + i % 3) if (i + n) % 4 == 0 else None for n in range(len(days))]
+        )
+    wb.save(path)
+    return len(days)
+
+
+class Command(BaseCommand):
+    help = "Mede o tempo de parse de um plano de mídia .xlsx (sintético de 1 ano ou --file)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=300, help="Linhas do plano sintético (default: 300)")
+        parser.add_argument("--year", type=int, default=2026, help="Ano do plano sintético (default: 2026)")
+        parser.add_argument("--repeat", type=int, default=3, help="Execuções; mostra a melhor (default: 3)")
+        parser.add_argument("--file", default=None, help="Planilha existente em vez da sintética")
+
+    def handle(self, *args, **options):
+        path = options["file"]
+        tmp_path = None
+        if not path:
+            fd, tmp_path = tempfile.mkstemp(suffix=".xlsx")
+            os.close(fd)
+            n_days = build_synthetic_plan(tmp_path, year=options["year"], rows=options["rows"])
+            self.stdout.write(f"Plano sintético: {options['rows']} linhas x {n_days} colunas de dia")
+            path = tmp_path
+
+        xlsx_worker._disable_lxml()
+        try:
+            timings = []
+            result = None
+            for _ in range(max(1, options["repeat"])):
+                started = time.perf_counter()
+                result = xlsx_worker.parse(path)
+                timings.append(time.perf_counter() - started)
+        finally:
+            if tmp_path:
+                os.unlink(tmp_path)
+
+        date_cols = sum(s.get("date_columns_count", 0) for s in result["detected"]["sheets"].values())
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"parse: melhor {min(timings):.3f}s, média {sum(timings) / len(timings):.3f}s "
+                f"({len(result['rows'])} linhas, {date_cols} colunas de data)"
+            )
+        )
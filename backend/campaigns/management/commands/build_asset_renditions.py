@@ -0,0 +1,50 @@
+"""Gera miniaturas/previews (WebP) dos assets de peças já existentes.
+
+Uploads novos ganham renditions na fila de probe; este comando cobre os
+assets antigos. Renditions já geradas para o mesmo checksum são reaproveitadas.
+
+Usage:
+    python manage.py build_asset_renditions                  # assets sem thumb_url
+    python manage.py build_asset_renditions --campaign-id=12 # uma campanha
+    python manage.py build_asset_renditions --force          # refaz todas
+"""
+
+from django.core.management.base import BaseCommand
+
+from campaigns.models import CreativeAsset
+from campaigns.renditions import build_renditions
+
+
+class Command(BaseCommand):
+    help = "Gera thumb_url/preview_url (WebP) dos assets de peças"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--campaign-id",
+            type=int,
+            default=None,
+            help="ID da campanha (default: todas)",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regera mesmo os assets que já têm thumb_url",
+        )
+
+    def handle(self, *args, **options):
+        qs = CreativeAsset.objects.exclude(file="").order_by("id")
+        if options["campaign_id"]:
+            qs = qs.filter(piece__campaign_id=options["campaign_id"])
+        if not options["force"]:
+            qs = qs.filter(thumb_url="")
+
+        built = skipped = 0
+        for asset in qs.iterator(chunk_size=200):
+            if build_renditions(asset, force=options["force"]):
+                built += 1
+            else:
+                skipped += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Renditions geradas: {built}. Sem rendition (áudio/HTML5/sem ffmpeg): {skipped}.")
+        )
@@ -0,0 +1,51 @@
+"""Roda o ffprobe dos assets de peças que ficaram pendentes.
+
+Os uploads gravam os assets como PENDING e agendam o ffprobe em threads do
+próprio servidor; este comando cobre o que ficou para trás (restart, fila em
+processo desligada).
+
+Usage:
+    python manage.py probe_creative_assets               # processa os pendentes e sai
+    python manage.py probe_creative_assets --loop        # roda continuamente (worker)
+    python manage.py probe_creative_assets --limit=100   # no máximo N assets por rodada
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from campaigns.asset_ingest import probe_pending_assets
+
+
+class Command(BaseCommand):
+    help = "Extrai metadados (ffprobe) dos assets de peças pendentes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Continua consultando a fila em vez de sair",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            default=None,
+            help="Máximo de assets por rodada (default: todos)",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=10.0,
+            help="Segundos entre rodadas com --loop (default: 10)",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            done = probe_pending_assets(limit=options["limit"])
+            if done or not options["loop"]:
+                self.stdout.write(self.style.SUCCESS(f"{done} asset(s) processados."))
+            if not options["loop"]:
+                return
+            time.sleep(options["sleep"])
@@ -0,0 +1,43 @@
+"""Management command to rebuild the PlacementDayRollup table.
+
+Usage:
+    python manage.py rebuild_placement_rollups                  # all campaigns
+    python manage.py rebuild_placement_rollups --campaign-id=12 # one campaign
+    python manage.py rebuild_placement_rollups --cliente-id=3   # one client
+"""
+
+from django.core.management.base import BaseCommand
+
+from campaigns.models import Campaign
+from campaigns.rollups import rebuild_all_placement_rollups, refresh_placement_rollups
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o agregado diário de veiculação (PlacementDayRollup)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--campaign-id",
+            type=int,
+            default=None,
+            help="ID da campanha para reconstruir (default: todas)",
+        )
+        parser.add_argument(
+            "--cliente-id",
+            type=int,
+            default=None,
+            help="ID do cliente para reconstruir (default: todos)",
+        )
+
+    def handle(self, *args, **options):
+        if options["campaign_id"] or options["cliente_id"]:
+            qs = Campaign.objects.all()
+            if options["campaign_id"]:
+                qs = qs.filter(id=options["campaign_id"])
+            if options["cliente_id"]:
+                qs = qs.filter(cliente_id=options["cliente_id"])
+            rows = refresh_placement_rollups(qs.values_list("id", flat=True))
+        else:
+            rows = rebuild_all_placement_rollups()
+
+        self.stdout.write(self.style.SUCCESS(f"Agregado reconstruído: {rows} linhas."))
@@ -0,0 +1,82 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:45
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    from django.db.models import Sum
+    from django.db.models.functions import Coalesce
+
+    PlacementDay = apps.get_model("campaigns", "PlacementDay")
+    PlacementDayRollup = apps.get_model("campaigns", "PlacementDayRollup")
+
+    grouped = (
+        PlacementDay.objects.values(
+            "placement_line__campaign_id",
+            "placement_line__campaign__cliente_id",
+            "placement_line__media_channel",
+            "placement_line__market",
+            "date",
+        )
+        .annotate(
+            ins=Coalesce(Sum("insertions"), 0),
+            imp=Coalesce(Sum("impressions"), 0),
+            clk=Coalesce(Sum("clicks"), 0),
+            cst=Sum("cost"),
+        )
+        .order_by()
+    )
+    batch = []
+    for r in grouped.iterator():
+        batch.append(
+            PlacementDayRollup(
+                campaign_id=r["placement_line__campaign_id"],
+                cliente_id=r["placement_line__campaign__cliente_id"],
+                media_channel=r["placement_line__media_channel"],
+                market=r["placement_line__market"],
+                date=r["date"],
+                insertions=r["ins"],
+                impressions=r["imp"],
+                clicks=r["clk"],
+                cost=r["cst"] or 0,
+            )
+        )
+        if len(batch) >= 1000:
+            PlacementDayRollup.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        PlacementDayRollup.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_audit_event_types'),
+        ('campaigns', '0011_financial_visibility'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlacementDayRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('media_channel', models.CharField(choices=[('tv_aberta', 'TV_ABERTA'), ('paytv', 'PAYTV'), ('radio', 'RADIO'), ('ooh', 'OOH'), ('jornal', 'JORNAL'), ('meta', 'META'), ('google', 'GOOGLE'), ('youtube', 'YOUTUBE'), ('display', 'DISPLAY'), ('search', 'SEARCH'), ('social', 'SOCIAL'), ('tiktok', 'TIKTOK'), ('linkedin', 'LINKEDIN'), ('dv360', 'DV360'), ('dv360_youtube', 'DV360_YOUTUBE'), ('dv360_spotify', 'DV360_SPOTIFY'), ('dv360_eletromid', 'DV360_ELETROMIDIA'), ('dv360_netflix', 'DV360_NETFLIX'), ('dv360_globoplay', 'DV360_GLOBOPLAY'), ('dv360_admooh', 'DV360_ADMOOH'), ('other', 'OTHER')], max_length=20)),
+                ('market', models.CharField(max_length=100)),
+                ('date', models.DateField()),
+                ('insertions', models.PositiveBigIntegerField(default=0)),
+                ('impressions', models.PositiveBigIntegerField(default=0)),
+                ('clicks', models.PositiveBigIntegerField(default=0)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_rollups', to='campaigns.campaign')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='placement_rollups', to='accounts.cliente')),
+            ],
+            options={
+                'verbose_name': 'Agregado diário de veiculação',
+                'verbose_name_plural': 'Agregados diários de veiculação',
+                'indexes': [models.Index(fields=['cliente', 'date'], name='rollup_cliente_date_idx'), models.Index(fields=['cliente', 'media_channel', 'date'], name='rollup_cliente_channel_idx'), models.Index(fields=['campaign', 'date'], name='rollup_campaign_date_idx')],
+                'unique_together': {('campaign', 'media_channel', 'market', 'date')},
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0012_placement_day_rollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='placementline',
+            name='sheet',
+            field=models.CharField(blank=True, default='', max_length=120),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-17 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0013_placementline_sheet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='creativeasset',
+            name='probe_status',
+            field=models.CharField(choices=[('pending', 'Aguardando ffprobe'), ('done', 'Metadados extraídos'), ('failed', 'Sem metadados'), ('skipped', 'Não se aplica')], default='skipped', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='creativeasset',
+            index=models.Index(fields=['probe_status'], name='creativeasset_probe_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 04:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0014_creativeasset_probe_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='creativeasset',
+            name='preview_url',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AlterField(
+            model_name='creativeasset',
+            name='thumb_url',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+    ]
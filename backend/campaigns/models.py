@@ -12,7 +12,32 @@ from django.utils import timezone
 from accounts.models import Cliente
 
 
-class Campaign(models.Model):
+class TracksLoadedValues:
+    """Guarda os valores de ``tracked_fields`` lidos do banco em ``_loaded_values``.
+
+    Os sinais de ``campaigns.signals`` comparam com eles para saber o que uma
+    edição mudou (ex.: a praça de uma linha), sem consultar o banco de novo.
+    """
+
+    tracked_fields: tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded_values()
+        return instance
+
+    def remember_loaded_values(self) -> None:
+        self._loaded_values = {f: self.__dict__.get(f) for f in self.tracked_fields}
+
+    def loaded_value(self, field: str):
+        """Valor de ``field`` lido do banco (``None`` se a instância não veio de uma consulta)."""
+        return getattr(self, "_loaded_values", {}).get(field)
+
+
+class Campaign(TracksLoadedValues, models.Model):
+    tracked_fields = ("cliente_id",)
+
     class Status(models.TextChoices):
         DRAFT = "draft", "Draft"
         ACTIVE = "active", "Active"
@@ -122,7 +147,9 @@ class Piece(models.Model):
         return f"{self.campaign_id} {self.code}"
 
 
-class PlacementLine(models.Model):
+class PlacementLine(TracksLoadedValues, models.Model):
+    tracked_fields = ("campaign_id", "media_channel", "market")
+
     class MediaType(models.TextChoices):
         ONLINE = "online", "ONLINE"
         OFFLINE = "offline", "OFFLINE"
@@ -153,6 +180,8 @@ class PlacementLine(models.Model):
     campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="placement_lines")
     media_type = models.CharField(max_length=20, choices=MediaType.choices, default=MediaType.ONLINE)
     media_channel = models.CharField(max_length=20, choices=MediaChannel.choices, default=MediaChannel.OTHER)
+    # Aba da planilha de origem; parte da chave natural usada na reimportação.
+    sheet = models.CharField(max_length=120, blank=True, default="")
     market = models.CharField(max_length=100)
     channel = models.CharField(max_length=100, blank=True, default="")
     program = models.CharField(max_length=150, blank=True, default="")
@@ -175,7 +204,9 @@ class PlacementLine(models.Model):
         return f"{self.market} - {self.channel}"
 
 
-class PlacementDay(models.Model):
+class PlacementDay(TracksLoadedValues, models.Model):
+    tracked_fields = ("placement_line_id", "date")
+
     placement_line = models.ForeignKey(PlacementLine, on_delete=models.CASCADE, related_name="days")
     date = models.DateField()
     insertions = models.PositiveBigIntegerField(default=0)
@@ -195,6 +226,37 @@ class PlacementDay(models.Model):
         return f"{self.placement_line_id} {self.date}"
 
 
+class PlacementDayRollup(models.Model):
+    """Agregado diário de PlacementDay por (cliente, campanha, canal, praça).
+
+    Mantido por ``campaigns.rollups.refresh_placement_rollups`` sempre que
+    importações ou syncs gravam dias; os dashboards leem totais e séries
+    daqui em vez de varrer PlacementDay.
+    """
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name="placement_rollups")
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name="day_rollups")
+    media_channel = models.CharField(max_length=20, choices=PlacementLine.MediaChannel.choices)
+    market = models.CharField(max_length=100)
+    date = models.DateField()
+    insertions = models.PositiveBigIntegerField(default=0)
+    impressions = models.PositiveBigIntegerField(default=0)
+    clicks = models.PositiveBigIntegerField(default=0)
+    cost = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = "Agregado diário de veiculação"
+        verbose_name_plural = "Agregados diários de veiculação"
+        unique_together = ("campaign", "media_channel", "market", "date")
+        indexes = [
+            models.Index(fields=["cliente", "date"], name="rollup_cliente_date_idx"),
+            models.Index(fields=["cliente", "media_channel", "date"], name="rollup_cliente_channel_idx"),
+            models.Index(fields=["campaign", "date"], name="rollup_campaign_date_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.campaign_id} {self.media_channel} {self.market} {self.date}"
+
+
 class AdGroup(models.Model):
     """Grupo de anúncios — nível intermediário entre Campaign e Ad."""
     class Status(models.TextChoices):
@@ -292,17 +354,30 @@ class AdDay(models.Model):
 
 
 class CreativeAsset(models.Model):
+    class ProbeStatus(models.TextChoices):
+        PENDING = "pending", "Aguardando ffprobe"
+        DONE = "done", "Metadados extraídos"
+        FAILED = "failed", "Sem metadados"
+        SKIPPED = "skipped", "Não se aplica"
+
     piece = models.ForeignKey(Piece, on_delete=models.CASCADE, related_name="assets")
     file = models.FileField(upload_to="campaigns/assets/")
-    preview_url = models.URLField(blank=True, default="")
-    thumb_url = models.URLField(blank=True, default="")
+    # URL absoluta (sync) ou caminho do storage ("/media/...") das renditions.
+    preview_url = models.CharField(max_length=500, blank=True, default="")
+    thumb_url = models.CharField(max_length=500, blank=True, default="")
     checksum = models.CharField(max_length=128, blank=True, default="")
     metadata = models.JSONField(blank=True, default=dict)
+    # Uploads entram como PENDING e o ffprobe roda fora da requisição
+    # (campaigns.asset_ingest); assets vindos de sync não passam por ele.
+    probe_status = models.CharField(max_length=10, choices=ProbeStatus.choices, default=ProbeStatus.SKIPPED)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         verbose_name = "Asset criativo"
         verbose_name_plural = "Assets criativos"
+        indexes = [
+            models.Index(fields=["probe_status"], name="creativeasset_probe_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.piece_id} {self.id}"
@@ -0,0 +1,152 @@
+"""Cache em disco dos resultados de parse de planilhas.
+
+O wizard de contrato e o upload de plano de mídia leem o mesmo arquivo
+várias vezes (preview, escolha de abas, confirmação; o import ainda tenta o
+parser de patrocínio quando o tático não acha linhas). O resultado de
+``run_parser`` é guardado por SHA-256 do conteúdo + versão do parser, então a
+segunda leitura do mesmo arquivo não passa pelo openpyxl.
+
+A versão do parser é o hash do código-fonte do worker (e de ``xlsx_scan``):
+qualquer alteração no parser invalida as entradas antigas sem bump manual.
+
+Cada entrada é um ``<chave>.json.gz``. O mtime marca o último acesso e,
+quando o diretório passa de ``XLSX_PARSE_CACHE_MAX_BYTES``, as entradas
+menos usadas são apagadas (LRU).
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+
+from .xlsx_pool import PARSERS, run_parser
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Depois de estourar o limite, apaga até ficar abaixo desta fração dele.
+_EVICT_TO = 0.8
+_SUFFIX = ".json.gz"
+_SHARED_MODULES = ("campaigns.xlsx_scan",)
+
+
+@lru_cache(maxsize=None)
+def parser_version(kind: str) -> str:
+    """Hash curto do código do parser ``kind`` (muda a cada deploy que o altere)."""
+    digest = hashlib.sha256()
+    for module in (PARSERS[kind], *_SHARED_MODULES):
+        spec = importlib.util.find_spec(module)
+        digest.update(Path(spec.origin).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_dir() -> Path | None:
+    location = getattr(settings, "XLSX_PARSE_CACHE_DIR", None)
+    if not location or _max_bytes() <= 0:
+        return None
+    return Path(location)
+
+
+def _max_bytes() -> int:
+    return int(getattr(settings, "XLSX_PARSE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES) or 0)
+
+
+def _entry_path(directory: Path, kind: str, content_hash: str) -> Path:
+    return directory / f"{kind}-{parser_version(kind)}-{content_hash}{_SUFFIX}"
+
+
+def _read(entry: Path) -> dict[str, Any] | None:
+    try:
+        with gzip.open(entry, "rt", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, EOFError):
+        logger.warning("Discarding unreadable parse cache entry %s", entry.name)
+        entry.unlink(missing_ok=True)
+        return None
+    try:
+        os.utime(entry)
+    except OSError:
+        pass
+    return data
+
+
+def _write(directory: Path, entry: Path, data: dict[str, Any]) -> None:
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6, mtime=0) as fh:
+            fh.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        os.replace(tmp_name, entry)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    _evict(directory, _max_bytes())
+
+
+def _evict(directory: Path, max_bytes: int) -> int:
+    """Apaga as entradas menos usadas até o diretório caber no limite. Returns removidas."""
+    entries = []
+    total = 0
+    for item in os.scandir(directory):
+        if not item.name.endswith(_SUFFIX):
+            continue
+        try:
+            st = item.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, item.path))
+        total += st.st_size
+    if total <= max_bytes:
+        return 0
+
+    removed = 0
+    target = max_bytes * _EVICT_TO
+    for _, size, path in sorted(entries):
+        if total <= target:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def cached_run_parser(kind: str, path: str, *, timeout: float | None = None) -> dict[str, Any]:
+    """``run_parser`` com cache por conteúdo. Erros (XlsxParseError) não são guardados."""
+    directory = _cache_dir()
+    if directory is None:
+        return run_parser(kind, path, timeout=timeout)
+
+    entry = _entry_path(directory, kind, file_sha256(path))
+    data = _read(entry)
+    if data is not None:
+        return data
+
+    data = run_parser(kind, path, timeout=timeout)
+    try:
+        _write(directory, entry, data)
+    except OSError:
+        logger.warning("Could not write parse cache entry %s", entry.name, exc_info=True)
+    return data
@@ -0,0 +1,155 @@
+"""Miniaturas e previews (WebP) dos assets de peças.
+
+As grades de peças desenhavam o arquivo original (imagens de vários MB,
+vídeos inteiros) para mostrar um card. Aqui geramos, por asset:
+
+- ``thumb_url``: WebP pequeno para cards e listas;
+- ``preview_url``: WebP maior; para vídeos é o quadro de capa (poster),
+  extraído com o ffmpeg (o mesmo pacote do ffprobe).
+
+Os arquivos ficam em ``MEDIA_ROOT/campaigns/renditions/`` com nome derivado
+do checksum do original: assets com o mesmo conteúdo reaproveitam as
+mesmas renditions e gerar de novo não refaz o trabalho.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import shutil
+import subprocess
+from typing import Any
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from .models import CreativeAsset
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_DIR = "campaigns/renditions"
+THUMB_SIZE = (320, 320)
+PREVIEW_SIZE = (1280, 1280)
+WEBP_QUALITY = 80
+FFMPEG_TIMEOUT = 60
+
+_IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp")
+_VIDEO_EXTENSIONS = (".mp4", ".mov", ".m4v", ".webm", ".avi", ".mkv")
+
+
+def asset_kind(asset: CreativeAsset) -> str | None:
+    """``"image"``, ``"video"`` ou None (áudio, HTML5, sem arquivo)."""
+    if not asset.file:
+        return None
+    content_type = str((asset.metadata or {}).get("content_type") or "")
+    name = asset.file.name.lower()
+    if content_type.startswith("image/") or name.endswith(_IMAGE_EXTENSIONS):
+        return "image"
+    if content_type.startswith("video/") or name.endswith(_VIDEO_EXTENSIONS):
+        return "video"
+    return None
+
+
+def _rendition_key(asset: CreativeAsset) -> str:
+    return asset.checksum or f"asset{asset.id}"
+
+
+def _rendition_name(key: str, suffix: str) -> str:
+    return f"{RENDITIONS_DIR}/{key[:2]}/{key}-{suffix}.webp"
+
+
+def _poster_frame(path: str, *, at_sec: float) -> bytes | None:
+    """Um quadro do vídeo em PNG (via ffmpeg), ou None se não der."""
+    if shutil.which("ffmpeg") is None:
+        return None
+    try:
+        proc = subprocess.run(
+            [
+                "ffmpeg", "-v", "error", "-ss", f"{at_sec:.2f}", "-i", path,
+                "-frames:v", "1", "-f", "image2pipe", "-vcodec", "png", "-",
+            ],
+            capture_output=True,
+            timeout=FFMPEG_TIMEOUT,
+            check=False,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        logger.warning("ffmpeg failed extracting poster from %s", path, exc_info=True)
+        return None
+    if proc.returncode != 0 or not proc.stdout:
+        return None
+    return proc.stdout
+
+
+def _encode_webp(image: Any, size: tuple[int, int]) -> bytes:
+    copy = image.copy()
+    copy.thumbnail(size)
+    buf = io.BytesIO()
+    copy.save(buf, format="WEBP", quality=WEBP_QUALITY, method=4)
+    return buf.getvalue()
+
+
+def _load_source(asset: CreativeAsset, kind: str) -> Any | None:
+    from PIL import Image, ImageOps
+
+    if kind == "video":
+        duration = (asset.metadata or {}).get("duration_sec") or 0
+        frame = _poster_frame(asset.file.path, at_sec=min(1.0, duration / 2) if duration else 0.0)
+        if frame is None:
+            return None
+        opened = Image.open(io.BytesIO(frame))
+    else:
+        opened = Image.open(asset.file.path)
+    # Devolve uma cópia convertida e fecha o arquivo: num backfill de milhares
+    # de assets, imagens abertas e não fechadas esgotam os file handles.
+    with opened:
+        opened.seek(0)  # GIF animado: primeiro quadro
+        source = ImageOps.exif_transpose(opened) if kind != "video" else opened
+        return source.convert("RGBA" if "A" in source.getbands() else "RGB")
+
+
+def _save_rendition(name: str, data: bytes) -> str:
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return default_storage.url(name)
+
+
+def _is_own_rendition(url: str) -> bool:
+    return not url or f"/{RENDITIONS_DIR}/" in url
+
+
+def build_renditions(asset: CreativeAsset, *, force: bool = False) -> bool:
+    """Gera thumb/preview do asset e grava as URLs. Returns True se o asset tem renditions."""
+    kind = asset_kind(asset)
+    if kind is None:
+        return False
+
+    key = _rendition_key(asset)
+    thumb_name = _rendition_name(key, "thumb")
+    preview_name = _rendition_name(key, "preview")
+
+    if force or not (default_storage.exists(thumb_name) and default_storage.exists(preview_name)):
+        try:
+            source = _load_source(asset, kind)
+        except Exception:
+            logger.warning("Could not open asset %s for renditions", asset.id, exc_info=True)
+            return False
+        if source is None:
+            return False
+        if force:
+            for name in (thumb_name, preview_name):
+                default_storage.delete(name)
+        with source:
+            thumb_url = _save_rendition(thumb_name, _encode_webp(source, THUMB_SIZE))
+            preview_url = _save_rendition(preview_name, _encode_webp(source, PREVIEW_SIZE))
+    else:
+        thumb_url = default_storage.url(thumb_name)
+        preview_url = default_storage.url(preview_name)
+
+    update: dict[str, str] = {"thumb_url": thumb_url}
+    # preview_url de sync (URL da plataforma) é mantido.
+    if _is_own_rendition(asset.preview_url):
+        update["preview_url"] = preview_url
+    CreativeAsset.objects.filter(id=asset.id).update(**update)
+    for field, value in update.items():
+        setattr(asset, field, value)
+    return True
@@ -0,0 +1,160 @@
+"""Manutenção do agregado diário PlacementDayRollup.
+
+Os dashboards somam impressões/cliques/custo/inserções por cliente, canal e
+data. Em vez de varrer PlacementDay a cada requisição, importações e syncs
+chamam ``refresh_placement_rollups`` com as campanhas (e opcionalmente o
+intervalo de datas) que acabaram de gravar; o recálculo é feito com um único
+GROUP BY sobre o recorte afetado. O recálculo também invalida os caches de
+tela dos clientes dessas campanhas (``data_version``).
+
+Edições linha a linha (admin, formulários) usam ``schedule_rollup_refresh``:
+os recortes afetados são acumulados por campanha na thread e recalculados uma
+vez no commit. Um recálculo completo da campanha feito antes do commit (os
+imports chamam ``refresh_placement_rollups`` no fim) dispensa o agendado.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import date
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+
+from .data_version import PLACEMENTS, bump_for_campaigns
+from .models import PlacementDay, PlacementDayRollup
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_BATCH_SIZE = 1000
+
+# campaign_id -> (primeira data, última data) a recalcular, ou None = campanha inteira
+_pending = threading.local()
+
+
+def _pending_map() -> dict[int, Optional[tuple[date, date]]]:
+    if not hasattr(_pending, "campaigns"):
+        _pending.campaigns = {}
+    return _pending.campaigns
+
+
+def refresh_placement_rollups(
+    campaign_ids: Iterable[int],
+    *,
+    date_from: date | str | None = None,
+    date_to: date | str | None = None,
+) -> int:
+    """Recalcula o agregado das campanhas informadas. Returns rows written.
+
+    Sem datas, reconstrói a campanha inteira (necessário após
+    ``replace_existing`` ou exclusão de linhas). Com datas, apenas o
+    intervalo é apagado e regravado — usado pelos syncs incrementais.
+    """
+    ids = sorted({int(c) for c in campaign_ids if c})
+    if not ids:
+        return 0
+
+    stale_qs = PlacementDayRollup.objects.filter(campaign_id__in=ids)
+    days_qs = PlacementDay.objects.filter(placement_line__campaign_id__in=ids)
+    if date_from:
+        stale_qs = stale_qs.filter(date__gte=date_from)
+        days_qs = days_qs.filter(date__gte=date_from)
+    if date_to:
+        stale_qs = stale_qs.filter(date__lte=date_to)
+        days_qs = days_qs.filter(date__lte=date_to)
+
+    grouped = (
+        days_qs.values(
+            "placement_line__campaign_id",
+            "placement_line__campaign__cliente_id",
+            "placement_line__media_channel",
+            "placement_line__market",
+            "date",
+        )
+        .annotate(
+            ins=Coalesce(Sum("insertions"), 0),
+            imp=Coalesce(Sum("impressions"), 0),
+            clk=Coalesce(Sum("clicks"), 0),
+            cst=Sum("cost"),
+        )
+        .order_by()
+    )
+
+    with transaction.atomic():
+        stale_qs.delete()
+        rows = [
+            PlacementDayRollup(
+                campaign_id=r["placement_line__campaign_id"],
+                cliente_id=r["placement_line__campaign__cliente_id"],
+                media_channel=r["placement_line__media_channel"],
+                market=r["placement_line__market"],
+                date=r["date"],
+                insertions=r["ins"],
+                impressions=r["imp"],
+                clicks=r["clk"],
+                cost=r["cst"] or 0,
+            )
+            for r in grouped.iterator()
+        ]
+        PlacementDayRollup.objects.bulk_create(rows, batch_size=ROLLUP_BATCH_SIZE)
+    bump_for_campaigns(ids, (PLACEMENTS,))
+    if not date_from and not date_to:
+        pending = _pending_map()
+        for campaign_id in ids:
+            pending.pop(campaign_id, None)
+
+    logger.debug("Rollup refreshed for campaigns %s: %d rows", ids, len(rows))
+    return len(rows)
+
+
+def schedule_rollup_refresh(campaign_id: int | None, day: date | None = None) -> None:
+    """Agenda o recálculo de ``campaign_id`` (só ``day``, ou inteira) para o commit."""
+    if not campaign_id:
+        return
+    pending = _pending_map()
+    if day is None or (campaign_id in pending and pending[campaign_id] is None):
+        pending[campaign_id] = None
+    else:
+        first, last = pending.get(campaign_id) or (day, day)
+        pending[campaign_id] = (min(first, day), max(last, day))
+    # Um callback por chamada: o primeiro a rodar no commit esvazia o mapa e os
+    # demais não fazem nada. Um rollback deixa o recorte para o próximo commit.
+    transaction.on_commit(flush_scheduled_rollups)
+
+
+def flush_scheduled_rollups() -> None:
+    pending = _pending_map()
+    if not pending:
+        return
+    scheduled, _pending.campaigns = pending, {}
+    full = [campaign_id for campaign_id, span in scheduled.items() if span is None]
+    try:
+        if full:
+            refresh_placement_rollups(full)
+        for campaign_id, span in scheduled.items():
+            if span is not None:
+                refresh_placement_rollups([campaign_id], date_from=span[0], date_to=span[1])
+    except Exception:
+        logger.exception("Could not refresh scheduled rollups for campaigns %s", sorted(scheduled))
+
+
+def rebuild_all_placement_rollups() -> int:
+    """Reconstrói o agregado de todas as campanhas com dias de veiculação."""
+    from .models import Campaign
+
+    total = 0
+    ids = list(
+        Campaign.objects.filter(placement_lines__days__isnull=False)
+        .values_list("id", flat=True)
+        .distinct()
+    )
+    # Campanhas sem dias ainda podem ter agregados órfãos (linhas apagadas).
+    orphan_ids = set(PlacementDayRollup.objects.values_list("campaign_id", flat=True).distinct()) - set(ids)
+    if orphan_ids:
+        PlacementDayRollup.objects.filter(campaign_id__in=orphan_ids).delete()
+    for i in range(0, len(ids), 100):
+        total += refresh_placement_rollups(ids[i:i + 100])
+    return total
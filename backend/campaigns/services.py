@@ -2,25 +2,28 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date, datetime
+from decimal import Decimal
 import hashlib
 import json
 import re
 import subprocess
-import sys
 import tempfile
 import os
 from typing import Any, Iterable
 
-from django.conf import settings
 from django.core.files.uploadedfile import UploadedFile
 from django.db import transaction
 from django.utils import timezone
 
 from .models import (
-    Campaign, CreativeAsset, FinancialSummary, FinancialUpload,
+    Campaign, FinancialSummary, FinancialUpload,
     MediaEfficiency, PIControl, Piece, PlacementCreative, PlacementDay,
     PlacementLine, RegionInvestment,
 )
+from .data_version import FINANCIAL, PIS, REGIONS, bump_for_campaigns
+from .rollups import refresh_placement_rollups
+from .parse_cache import cached_run_parser
+from .xlsx_pool import XlsxParseError
 
 
 def _norm(s: str) -> str:
@@ -190,28 +193,12 @@ def parse_media_plan_xlsx(uploaded_file: UploadedFile) -> dict[str, Any]:
         tmp.close()
 
     try:
-        backend_dir = getattr(settings, "BASE_DIR", None)
-        if backend_dir is not None:
-            backend_dir = str(backend_dir)
-        else:
-            backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-        proc = subprocess.run(
-            [sys.executable, "-m", "campaigns.xlsx_worker", temp_path],
-            capture_output=True,
-            text=True,
-            check=False,
-            cwd=backend_dir,
-        )
-        if proc.returncode != 0 or not proc.stdout:
-            detail = (proc.stderr or "").strip()
-            if detail:
-                detail = detail.splitlines()[-1][:300]
-                errors.append(f"Falha ao ler planilha .xlsx. Detalhe: {detail}")
-            else:
-                errors.append("Falha ao ler planilha .xlsx. Verifique a instalação do openpyxl.")
+        try:
+            data = cached_run_parser("media_plan", temp_path)
+        except XlsxParseError as exc:
+            errors.append(f"Falha ao ler planilha .xlsx. Detalhe: {exc}")
             return {"ok": False, "errors": errors, "sheets": [], "total_rows": 0, "detected": {}, "parsed_rows": []}
 
-        data = json.loads(proc.stdout)
         detected = data.get("detected") or {}
         sheets = data.get("sheets") or []
         total_rows = int(data.get("total_rows") or 0)
@@ -264,6 +251,180 @@ def parse_media_plan_xlsx(uploaded_file: UploadedFile) -> dict[str, Any]:
                 pass
 
 
+IMPORT_BATCH_SIZE = 2000
+
+
+def _bulk_insert_placements(
+    plan: list[tuple[PlacementLine, list[PlacementDay], list[Piece]]],
+) -> tuple[int, int, int]:
+    """Grava linhas, dias e vínculos com peças em lotes de ``bulk_create``.
+
+    As linhas vão primeiro; os dias e vínculos já apontam para o objeto da
+    linha e pegam o PK devolvido pelo INSERT. Returns (lines, days, links).
+    """
+    lines = [line for line, _, _ in plan]
+    PlacementLine.objects.bulk_create(lines, batch_size=IMPORT_BATCH_SIZE)
+
+    days = [day for _, line_days, _ in plan for day in line_days]
+    PlacementDay.objects.bulk_create(days, batch_size=IMPORT_BATCH_SIZE)
+
+    links = [
+        PlacementCreative(placement_line=line, piece=piece)
+        for line, _, line_pieces in plan
+        for piece in line_pieces
+    ]
+    PlacementCreative.objects.bulk_create(links, batch_size=IMPORT_BATCH_SIZE, ignore_conflicts=True)
+    return len(lines), len(days), len(links)
+
+
+# Chave natural de uma linha do plano: é o que identifica "a mesma linha" entre
+# duas revisões da planilha. Os demais campos são valores que podem mudar.
+LINE_KEY_FIELDS = ("sheet", "market", "channel", "program", "property_text", "format_text")
+LINE_VALUE_FIELDS = ("media_type", "media_channel", "duration_sec", "external_ref", "start_date", "end_date")
+DAY_VALUE_FIELDS = ("insertions", "cost", "impressions", "clicks")
+
+_CENTS = Decimal("0.01")
+
+
+def _line_key(line: PlacementLine) -> tuple:
+    return tuple(getattr(line, f) for f in LINE_KEY_FIELDS)
+
+
+def _aware(value: datetime | None) -> datetime | None:
+    if value is not None and timezone.is_naive(value):
+        return timezone.make_aware(value, timezone.get_default_timezone())
+    return value
+
+
+def _day_vector(day: PlacementDay) -> tuple:
+    cost = day.cost
+    if cost is not None:
+        cost = Decimal(str(cost)).quantize(_CENTS)
+    return (day.insertions, cost, day.impressions, day.clicks)
+
+
+def _chunks(items: list, size: int = IMPORT_BATCH_SIZE) -> Iterable[list]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _sync_placements(
+    campaign: Campaign,
+    plan: list[tuple[PlacementLine, list[PlacementDay], list[Piece]]],
+) -> dict[str, dict[str, int]]:
+    """Aplica ``plan`` sobre as linhas da campanha gravando só o que mudou.
+
+    Cada linha do plano casa com uma linha existente de mesma chave natural
+    (``LINE_KEY_FIELDS``; chaves repetidas casam na ordem em que aparecem).
+    Linhas gravadas antes da coluna ``sheet`` existir casam ignorando a aba.
+    Nas linhas casadas, os dias são comparados data a data e só os
+    inseridos/alterados/removidos vão ao banco; vínculos com peças que
+    faltam são criados e os existentes (inclusive os feitos à mão na matriz
+    de vinculação) são mantidos. Linhas que sumiram da planilha são apagadas
+    e as novas, inseridas em lote.
+
+    Returns o resumo das alterações por tabela.
+    """
+    changes = {
+        "placement_lines": {"created": 0, "updated": 0, "deleted": 0, "unchanged": 0},
+        "placement_days": {"created": 0, "updated": 0, "deleted": 0},
+        "placement_creatives": {"created": 0},
+    }
+
+    existing_by_key: dict[tuple, list[PlacementLine]] = {}
+    for line in PlacementLine.objects.filter(campaign=campaign).order_by("id"):
+        existing_by_key.setdefault(_line_key(line), []).append(line)
+
+    matched: list[tuple[PlacementLine, PlacementLine, list[PlacementDay], list[Piece]]] = []
+    new_plan: list[tuple[PlacementLine, list[PlacementDay], list[Piece]]] = []
+    for line, days, pieces in plan:
+        line.start_date = _aware(line.start_date)
+        line.end_date = _aware(line.end_date)
+        key = _line_key(line)
+        bucket = existing_by_key.get(key) or existing_by_key.get(("",) + key[1:])
+        if bucket:
+            matched.append((bucket.pop(0), line, days, pieces))
+        else:
+            new_plan.append((line, days, pieces))
+    stale_ids = [line.id for bucket in existing_by_key.values() for line in bucket]
+
+    matched_ids = [old.id for old, _, _, _ in matched]
+    old_days: dict[int, dict[date, tuple[int, tuple]]] = {}
+    old_links: set[tuple[int, int]] = set()
+    for ids in _chunks(matched_ids):
+        for day in PlacementDay.objects.filter(placement_line_id__in=ids).only("id", "placement_line_id", "date", *DAY_VALUE_FIELDS):
+            old_days.setdefault(day.placement_line_id, {})[day.date] = (day.id, _day_vector(day))
+        old_links.update(
+            PlacementCreative.objects.filter(placement_line_id__in=ids).values_list("placement_line_id", "piece_id")
+        )
+
+    changed_lines: list[PlacementLine] = []
+    day_inserts: list[PlacementDay] = []
+    day_updates: list[PlacementDay] = []
+    day_deletes: list[int] = []
+    link_inserts: list[PlacementCreative] = []
+    for old, new, days, pieces in matched:
+        line_changed = False
+        for field in ("sheet", *LINE_VALUE_FIELDS):
+            if getattr(old, field) != getattr(new, field):
+                setattr(old, field, getattr(new, field))
+                line_changed = True
+        if line_changed:
+            changed_lines.append(old)
+
+        current = old_days.get(old.id, {})
+        wanted = {day.date: day for day in days}
+        days_changed = False
+        for d, day in wanted.items():
+            prev = current.get(d)
+            if prev is None:
+                day.placement_line = old
+                day_inserts.append(day)
+                days_changed = True
+            elif prev[1] != _day_vector(day):
+                day.id = prev[0]
+                day.placement_line = old
+                day_updates.append(day)
+                days_changed = True
+        for d, (day_id, _) in current.items():
+            if d not in wanted:
+                day_deletes.append(day_id)
+                days_changed = True
+
+        for piece in pieces:
+            if (old.id, piece.id) not in old_links:
+                old_links.add((old.id, piece.id))
+                link_inserts.append(PlacementCreative(placement_line=old, piece=piece))
+
+        if line_changed or days_changed:
+            changes["placement_lines"]["updated"] += 1
+        else:
+            changes["placement_lines"]["unchanged"] += 1
+
+    for ids in _chunks(stale_ids):
+        PlacementLine.objects.filter(id__in=ids).delete()
+    changes["placement_lines"]["deleted"] = len(stale_ids)
+
+    PlacementLine.objects.bulk_update(changed_lines, ["sheet", *LINE_VALUE_FIELDS], batch_size=IMPORT_BATCH_SIZE)
+    for ids in _chunks(day_deletes):
+        PlacementDay.objects.filter(id__in=ids).delete()
+    PlacementDay.objects.bulk_update(day_updates, list(DAY_VALUE_FIELDS), batch_size=IMPORT_BATCH_SIZE)
+    PlacementDay.objects.bulk_create(day_inserts, batch_size=IMPORT_BATCH_SIZE)
+    PlacementCreative.objects.bulk_create(link_inserts, batch_size=IMPORT_BATCH_SIZE, ignore_conflicts=True)
+
+    created_lines, created_days, created_links = _bulk_insert_placements(new_plan)
+    changes["placement_lines"]["created"] = created_lines
+    changes["placement_days"]["created"] = len(day_inserts) + created_days
+    changes["placement_days"]["updated"] = len(day_updates)
+    changes["placement_days"]["deleted"] = len(day_deletes)
+    changes["placement_creatives"]["created"] = len(link_inserts) + created_links
+    return changes
+
+
+def _has_changes(changes: dict[str, dict[str, int]]) -> bool:
+    return any(n for table in changes.values() for op, n in table.items() if op != "unchanged")
+
+
 def import_media_plan_xlsx(*, campaign: Campaign, uploaded_file: UploadedFile, replace_existing: bool, selected_sheets: list[str] | None = None) -> dict[str, Any]:
     parsed = parse_media_plan_xlsx(uploaded_file)
 
@@ -284,17 +445,9 @@ def import_media_plan_xlsx(*, campaign: Campaign, uploaded_file: UploadedFile, r
             return {"ok": False, "errors": ["Nenhuma linha válida nas abas selecionadas."]}
     pieces_table: list[dict[str, Any]] = parsed.get("pieces", [])
 
-    created_lines = 0
-    created_days = 0
     created_pieces = 0
-    created_links = 0
 
     with transaction.atomic():
-        if replace_existing:
-            PlacementCreative.objects.filter(placement_line__campaign=campaign).delete()
-            PlacementDay.objects.filter(placement_line__campaign=campaign).delete()
-            PlacementLine.objects.filter(campaign=campaign).delete()
-
         pieces_by_code: dict[str, Piece] = {p.code.upper(): p for p in campaign.pieces.all()}
 
         for item in pieces_table:
@@ -363,6 +516,22 @@ def import_media_plan_xlsx(*, campaign: Campaign, uploaded_file: UploadedFile, r
                         pieces_by_code[code] = p
                         created_pieces += 1
 
+        # Peças citadas nas linhas e ainda inexistentes: criadas antes das linhas,
+        # com a duração da primeira linha que as cita.
+        for row in parsed_rows:
+            for code in row.piece_codes:
+                if code not in pieces_by_code:
+                    pieces_by_code[code] = Piece.objects.create(
+                        campaign=campaign,
+                        code=code,
+                        title=f"Peça {code}",
+                        duration_sec=max(0, int(row.data.get("duration_sec") or 0)),
+                        type=Piece.Type.VIDEO,
+                        status=Piece.Status.PENDING,
+                    )
+                    created_pieces += 1
+
+        plan: list[tuple[PlacementLine, list[PlacementDay], list[Piece]]] = []
         for row in parsed_rows:
             # Para impressos (jornal/revista/impresso), inclui tiragem no property_text
             prop_text = str(row.data.get("property_text") or "")[:250]
@@ -372,10 +541,11 @@ def import_media_plan_xlsx(*, campaign: Campaign, uploaded_file: UploadedFile, r
                 prop_text = f"Tiragem: {circ_str}" if not prop_text else f"{prop_text} | Tiragem: {circ_str}"
                 prop_text = prop_text[:250]
 
-            line = PlacementLine.objects.create(
+            line = PlacementLine(
                 campaign=campaign,
                 media_type=row.media_type,
                 media_channel=row.media_channel,
+                sheet=row.sheet[:120],
                 market=str(row.data.get("market") or "")[:100],
                 channel=str(row.data.get("channel") or "")[:100],
                 program=str(row.data.get("program") or "")[:150],
@@ -386,39 +556,32 @@ def import_media_plan_xlsx(*, campaign: Campaign, uploaded_file: UploadedFile, r
                 start_date=row.data.get("start_date"),
                 end_date=row.data.get("end_date"),
             )
-            created_lines += 1
-
-            for d, ins in row.days:
-                PlacementDay.objects.create(placement_line=line, date=d, insertions=ins)
-                created_days += 1
+            days = [PlacementDay(placement_line=line, date=d, insertions=ins) for d, ins in row.days]
 
             # Se a linha tem piece_codes, vincular às peças correspondentes
+            line_pieces: list[Piece] = []
             if row.piece_codes:
-                for code in row.piece_codes:
-                    p = pieces_by_code.get(code)
-                    if p is None:
-                        p = Piece.objects.create(
-                            campaign=campaign,
-                            code=code,
-                            title=f"Peça {code}",
-                            duration_sec=max(0, int(row.data.get("duration_sec") or 0)),
-                            type=Piece.Type.VIDEO,
-                            status=Piece.Status.PENDING,
-                        )
-                        pieces_by_code[code] = p
-                        created_pieces += 1
-                    PlacementCreative.objects.get_or_create(placement_line=line, piece=p)
-                    created_links += 1
+                line_pieces = [pieces_by_code[code] for code in row.piece_codes]
             elif row.days:
                 # Se não tem piece_codes mas tem dias, vincular à peça genérica do canal
                 channel_key = row.media_channel or "other"
-                gen_code = f"GEN_{channel_key.upper()}"
-                p = pieces_by_code.get(gen_code)
+                p = pieces_by_code.get(f"GEN_{channel_key.upper()}")
                 if p is not None:
-                    PlacementCreative.objects.get_or_create(placement_line=line, piece=p)
-                    created_links += 1
+                    line_pieces = [p]
+            plan.append((line, days, line_pieces))
 
-    return {
+        changes = None
+        if replace_existing:
+            changes = _sync_placements(campaign, plan)
+            created_lines = changes["placement_lines"]["created"]
+            created_days = changes["placement_days"]["created"]
+            created_links = changes["placement_creatives"]["created"]
+        else:
+            created_lines, created_days, created_links = _bulk_insert_placements(plan)
+        if changes is None or _has_changes(changes):
+            refresh_placement_rollups([campaign.id])
+
+    result = {
         "ok": True,
         "created": {
             "placement_lines": created_lines,
@@ -427,6 +590,9 @@ def import_media_plan_xlsx(*, campaign: Campaign, uploaded_file: UploadedFile, r
             "placement_creatives": created_links,
         },
     }
+    if changes is not None:
+        result["changes"] = changes
+    return result
 
 
 def parse_sponsorship_xlsx(uploaded_file: UploadedFile) -> dict[str, Any]:
@@ -446,24 +612,12 @@ def parse_sponsorship_xlsx(uploaded_file: UploadedFile) -> dict[str, Any]:
         tmp.close()
 
     try:
-        backend_dir = getattr(settings, "BASE_DIR", None)
-        backend_dir = str(backend_dir) if backend_dir else os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-
-        proc = subprocess.run(
-            [sys.executable, "-m", "campaigns.sponsorship_xlsx_worker", temp_path],
-            capture_output=True,
-            text=True,
-            check=False,
-            cwd=backend_dir,
-        )
-        if proc.returncode != 0 or not proc.stdout:
-            detail = (proc.stderr or "").strip()
-            if detail:
-                detail = detail.splitlines()[-1][:300]
-            errors.append(f"Falha ao ler planilha de patrocínio. Detalhe: {detail}")
+        try:
+            data = cached_run_parser("sponsorship", temp_path)
+        except XlsxParseError as exc:
+            errors.append(f"Falha ao ler planilha de patrocínio. Detalhe: {exc}")
             return {"ok": False, "errors": errors, "sheets": [], "total_rows": 0, "detected": {}, "parsed_rows": []}
 
-        data = json.loads(proc.stdout)
         for r in data.get("rows") or []:
             start_dt = _try_parse_datetime(r.get("data", {}).get("start_date"))
             end_dt = _try_parse_datetime(r.get("data", {}).get("end_date"))
@@ -523,20 +677,14 @@ def import_sponsorship_xlsx(*, campaign: Campaign, uploaded_file: UploadedFile,
         if not parsed_rows:
             return {"ok": False, "errors": ["Nenhuma linha válida nas abas selecionadas."]}
 
-    created_lines = 0
-    created_days = 0
-
     with transaction.atomic():
-        if replace_existing:
-            PlacementCreative.objects.filter(placement_line__campaign=campaign).delete()
-            PlacementDay.objects.filter(placement_line__campaign=campaign).delete()
-            PlacementLine.objects.filter(campaign=campaign).delete()
-
+        plan: list[tuple[PlacementLine, list[PlacementDay], list[Piece]]] = []
         for row in parsed_rows:
-            line = PlacementLine.objects.create(
+            line = PlacementLine(
                 campaign=campaign,
                 media_type=row.media_type,
                 media_channel=row.media_channel,
+                sheet=row.sheet[:120],
                 market=str(row.data.get("market") or "")[:100],
                 channel=str(row.data.get("channel") or "")[:100],
                 program=str(row.data.get("program") or "")[:150],
@@ -547,24 +695,34 @@ def import_sponsorship_xlsx(*, campaign: Campaign, uploaded_file: UploadedFile,
                 start_date=row.data.get("start_date"),
                 end_date=row.data.get("end_date"),
             )
-            created_lines += 1
 
             day_costs = row.data.get("day_costs") or []
             day_impressions = row.data.get("day_impressions") or []
 
+            days = []
             for i, (d, ins) in enumerate(row.days):
                 cost = day_costs[i] if i < len(day_costs) else None
                 impressions = day_impressions[i] if i < len(day_impressions) else None
-                PlacementDay.objects.create(
+                days.append(PlacementDay(
                     placement_line=line,
                     date=d,
                     insertions=ins,
                     cost=cost if cost is not None else None,
                     impressions=impressions if impressions else None,
-                )
-                created_days += 1
+                ))
+            plan.append((line, days, []))
 
-    return {
+        changes = None
+        if replace_existing:
+            changes = _sync_placements(campaign, plan)
+            created_lines = changes["placement_lines"]["created"]
+            created_days = changes["placement_days"]["created"]
+        else:
+            created_lines, created_days, _ = _bulk_insert_placements(plan)
+        if changes is None or _has_changes(changes):
+            refresh_placement_rollups([campaign.id])
+
+    result = {
         "ok": True,
         "format": "sponsorship",
         "created": {
@@ -574,6 +732,9 @@ def import_sponsorship_xlsx(*, campaign: Campaign, uploaded_file: UploadedFile,
             "placement_creatives": 0,
         },
     }
+    if changes is not None:
+        result["changes"] = changes
+    return result
 
 
 def compute_sha256(uploaded_file: UploadedFile) -> str:
@@ -636,13 +797,13 @@ def extract_duration_sec_from_ffprobe(meta: dict[str, Any]) -> int | None:
 
 
 def attach_assets_to_campaign(*, campaign: Campaign, files: Iterable[UploadedFile]) -> dict[str, Any]:
-    created_pieces = 0
-    created_assets = 0
-    skipped_duplicates = 0
+    from .asset_ingest import ingest_assets
 
+    created_pieces = 0
     pieces_by_code: dict[str, Piece] = {p.code.upper(): p for p in campaign.pieces.all()}
 
     with transaction.atomic():
+        items: list[tuple[Piece, UploadedFile]] = []
         for f in files:
             code = infer_piece_code_from_filename(getattr(f, "name", ""))
             if not code:
@@ -659,45 +820,24 @@ def attach_assets_to_campaign(*, campaign: Campaign, files: Iterable[UploadedFil
                 )
                 pieces_by_code[code] = piece
                 created_pieces += 1
+            items.append((piece, f))
 
-            checksum = compute_sha256(f)
-            if checksum and CreativeAsset.objects.filter(piece=piece, checksum=checksum).exists():
-                skipped_duplicates += 1
-                continue
-
-            asset = CreativeAsset.objects.create(
-                piece=piece,
-                file=f,
-                checksum=checksum,
-                metadata={
-                    "original_name": getattr(f, "name", ""),
-                    "content_type": getattr(f, "content_type", ""),
-                    "size_bytes": getattr(f, "size", None),
-                },
-            )
-            created_assets += 1
+        # Duração e metadados (ffprobe) chegam depois, pela fila de probe.
+        ingested = ingest_assets(items)
 
-            meta = try_ffprobe(asset.file.path)
-            if meta:
-                merged = dict(asset.metadata or {})
-                merged["ffprobe"] = meta
-                dur = extract_duration_sec_from_ffprobe(meta)
-                if dur is not None:
-                    merged["duration_sec"] = dur
-                    if piece.duration_sec == 0:
-                        piece.duration_sec = dur
-                        piece.save(update_fields=["duration_sec"])
-                asset.metadata = merged
-                asset.save(update_fields=["metadata"])
-
-    return {"ok": True, "created_pieces": created_pieces, "created_assets": created_assets, "skipped_duplicates": skipped_duplicates}
+    return {
+        "ok": True,
+        "created_pieces": created_pieces,
+        "created_assets": len(ingested["assets"]),
+        "skipped_duplicates": ingested["skipped_duplicates"],
+    }
 
 
 # ── Financial integration ──────────────────────────────────────────────────────
 
 def parse_financial_xlsx(uploaded_file) -> dict:
     """
-    Run financial_xlsx_worker as subprocess, return parsed JSON dict.
+    Run financial_xlsx_worker in the parser pool, return parsed JSON dict.
     Works with FieldFile (from model) or UploadedFile (from form).
     """
     import tempfile, os
@@ -719,19 +859,9 @@ def parse_financial_xlsx(uploaded_file) -> dict:
         path = tmp.name
 
     try:
-        result = subprocess.run(
-            [sys.executable, "-m", "campaigns.financial_xlsx_worker", path],
-            capture_output=True,
-            text=True,
-            timeout=60,
-        )
-        if result.returncode != 0:
-            return {"ok": False, "errors": [result.stderr or "Worker exited with error"]}
-        return json.loads(result.stdout)
-    except subprocess.TimeoutExpired:
-        return {"ok": False, "errors": ["Timeout ao processar arquivo"]}
-    except json.JSONDecodeError as e:
-        return {"ok": False, "errors": [f"JSON inválido do worker: {e}"]}
+        return cached_run_parser("financial", path, timeout=60)
+    except XlsxParseError as e:
+        return {"ok": False, "errors": [str(e)]}
     finally:
         if tmp:
             os.unlink(path)
@@ -840,6 +970,9 @@ def import_financial_data(campaign: "Campaign", parsed: dict) -> dict:
                 color=REGION_COLORS[idx % len(REGION_COLORS)],
             )
 
+    # PIs entram por bulk_create e os deletes não emitem sinal
+    bump_for_campaigns([campaign.id], (FINANCIAL, PIS, REGIONS))
+
     return {
         "ok": True,
         "efficiencies_imported": len(eff_objs),
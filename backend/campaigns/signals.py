@@ -0,0 +1,104 @@
+"""Invalida os caches de tela quando dados de campanha mudam (ver ``data_version``).
+
+Só modelos gravados linha a linha: um receiver de delete em ``PlacementDay``
+desligaria o fast-delete em cascata (o Django passaria a carregar cada linha
+para emitir o sinal). Escritas em lote — ``bulk_create``, ``update``, deletes
+em cascata — chamam ``bump_*`` direto; ``refresh_placement_rollups`` já faz
+isso para syncs e imports. Deletes de ``PlacementDay`` pelo admin agendam o
+recálculo em ``PlacementDayAdmin``.
+
+Edições de ``PlacementDay``/``PlacementLine`` que mudam o agregado diário
+agendam o recálculo do recorte afetado (``schedule_rollup_refresh``), que
+também incrementa a versão dos dados.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .data_version import CAMPAIGNS, FINANCIAL, PIS, PLACEMENTS, REGIONS, bump_data_version, bump_for_campaigns
+from .rollups import schedule_rollup_refresh
+
+
+@receiver(post_save, sender="accounts.Cliente")
+def cliente_saved(sender, instance, created, **kwargs):
+    # O nome do cliente entra no cabeçalho do briefing de IA.
+    if not created:
+        bump_data_version([instance.id], (CAMPAIGNS,))
+
+
+@receiver(post_save, sender="campaigns.Campaign")
+def campaign_saved(sender, instance, created, **kwargs):
+    from .models import PlacementDayRollup
+
+    previous = instance.loaded_value("cliente_id")
+    if not created and previous and previous != instance.cliente_id:
+        # Campanha movida para outro cliente: o agregado leva o cliente junto.
+        PlacementDayRollup.objects.filter(campaign_id=instance.id).update(cliente_id=instance.cliente_id)
+        bump_data_version([previous, instance.cliente_id])
+    else:
+        bump_data_version([instance.cliente_id], (CAMPAIGNS,))
+    instance.remember_loaded_values()
+
+
+@receiver(post_delete, sender="campaigns.Campaign")
+def campaign_deleted(sender, instance, **kwargs):
+    # O delete em cascata leva linhas, financeiro, PIs e praças junto.
+    bump_data_version([instance.cliente_id])
+
+
+@receiver(post_save, sender="campaigns.Piece")
+@receiver(post_delete, sender="campaigns.Piece")
+def piece_changed(sender, instance, **kwargs):
+    # Contagem de peças por campanha na veiculação.
+    bump_for_campaigns([instance.campaign_id], (CAMPAIGNS,))
+
+
+@receiver(post_save, sender="campaigns.FinancialSummary")
+@receiver(post_delete, sender="campaigns.FinancialSummary")
+def financial_summary_changed(sender, instance, **kwargs):
+    bump_for_campaigns([instance.campaign_id], (FINANCIAL,))
+
+
+@receiver(post_save, sender="campaigns.RegionInvestment")
+def region_investment_saved(sender, instance, **kwargs):
+    bump_for_campaigns([instance.campaign_id], (REGIONS,))
+
+
+@receiver(post_save, sender="campaigns.PIControl")
+def pi_control_saved(sender, instance, **kwargs):
+    bump_for_campaigns([instance.campaign_id], (PIS,))
+
+
+@receiver(post_save, sender="campaigns.PlacementDay")
+def placement_day_saved(sender, instance, **kwargs):
+    from .models import PlacementLine
+
+    slices = {(instance.placement_line_id, instance.date)}
+    if instance.loaded_value("placement_line_id"):
+        slices.add((instance.loaded_value("placement_line_id"), instance.loaded_value("date")))
+    campaigns = dict(
+        PlacementLine.objects.filter(id__in={line_id for line_id, _ in slices}).values_list("id", "campaign_id")
+    )
+    for line_id, day in slices:
+        schedule_rollup_refresh(campaigns.get(line_id), day)
+    instance.remember_loaded_values()
+
+
+@receiver(post_save, sender="campaigns.PlacementLine")
+def placement_line_saved(sender, instance, created, **kwargs):
+    # Canal e praça fazem parte da chave do agregado: mudou, recalcula a campanha
+    # (o recálculo já invalida o cache). Outras edições só mexem nas tabelas por linha.
+    loaded = getattr(instance, "_loaded_values", None)
+    current = {f: getattr(instance, f) for f in instance.tracked_fields}
+    if not created and loaded != current:
+        schedule_rollup_refresh(instance.campaign_id)
+        if loaded and loaded["campaign_id"] != instance.campaign_id:
+            schedule_rollup_refresh(loaded["campaign_id"])
+    else:
+        bump_for_campaigns([instance.campaign_id], (PLACEMENTS,))
+    instance.remember_loaded_values()
+
+
+@receiver(post_delete, sender="campaigns.PlacementLine")
+def placement_line_deleted(sender, instance, **kwargs):
+    # Os dias saem em cascata (fast-delete, sem sinal por dia).
+    schedule_rollup_refresh(instance.campaign_id)
@@ -18,6 +18,8 @@ import sys
 from datetime import date, datetime
 from typing import Any
 
+from campaigns.xlsx_scan import first_match
+
 
 # ─── Normalização ────────────────────────────────────────────────────────────
 
@@ -97,18 +99,19 @@ def _parse_cost(v: Any) -> float | None:
 
 # ─── Inferência de ano ────────────────────────────────────────────────────────
 
+def _year_from_value(v: Any) -> int | None:
+    m = re.search(r"\b(20\d{2})\b", str(v))
+    if m:
+        y = int(m.group(1))
+        if 2020 <= y <= 2035:
+            return y
+    return None
+
+
 def _infer_year(ws: Any, until_row: int) -> int:
-    for r in range(1, max(1, min(until_row, ws.max_row)) + 1):
-        for c in range(1, ws.max_column + 1):
-            v = ws.cell(row=r, column=c).value
-            if v is None:
-                continue
-            m = re.search(r"\b(20\d{2})\b", str(v))
-            if m:
-                y = int(m.group(1))
-                if 2020 <= y <= 2035:
-                    return y
-    return datetime.now().year
+    rows = ws.iter_rows(min_row=1, max_row=max(1, min(until_row, ws.max_row)), values_only=True)
+    year = first_match(rows, _year_from_value)
+    return year if year is not None else datetime.now().year
 
 
 # ─── Mapeamento PLATAFORMA → (media_type, media_channel) ─────────────────────
@@ -439,12 +442,13 @@ def _parse_valor_format(
 
 # ─── Entrada principal ────────────────────────────────────────────────────────
 
-def main() -> int:
-    if len(sys.argv) < 2:
-        return 2
+_lxml_blocked = False
 
-    path = sys.argv[1]
 
+def _disable_lxml() -> None:
+    global _lxml_blocked
+    if _lxml_blocked:
+        return
     try:
         import importlib.abc
         import importlib.machinery
@@ -460,9 +464,14 @@ def main() -> int:
                 raise ImportError("lxml disabled")
 
         sys.meta_path.insert(0, _BlockLxml())
+        _lxml_blocked = True
     except Exception:
         pass
 
+
+def parse(path: str) -> dict[str, Any]:
+    """Lê a planilha e devolve o payload JSON-safe (o mesmo que ``main`` imprime)."""
+    _disable_lxml()
     import openpyxl  # type: ignore
 
     wb = openpyxl.load_workbook(path, data_only=True)
@@ -508,7 +517,13 @@ def main() -> int:
         "pieces": [],
         "format": "sponsorship",
     }
-    sys.stdout.write(json.dumps(out, ensure_ascii=False, default=str))
+    return json.loads(json.dumps(out, ensure_ascii=False, default=str))
+
+
+def main() -> int:
+    if len(sys.argv) < 2:
+        return 2
+    sys.stdout.write(json.dumps(parse(sys.argv[1]), ensure_ascii=False))
     return 0
 
 
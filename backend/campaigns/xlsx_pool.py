@@ -0,0 +1,151 @@
+"""Pool de processos persistente para o parse de planilhas .xlsx.
+
+Os parsers (xlsx_worker, sponsorship_xlsx_worker, financial_xlsx_worker)
+rodam fora do processo web porque o openpyxl + lxml já derrubou o
+interpretador (segfault). Em vez de subir um ``python -m ...`` por upload,
+mantemos um ``ProcessPoolExecutor`` por processo (worker do Gunicorn) com
+processos "spawn" já aquecidos: lxml bloqueado e openpyxl importado no
+initializer. O resultado volta como dict, sem passar por stdout.
+
+O ``timeout`` de cada parse é contado dentro do processo filho, a partir do
+momento em que o parse começa: o tempo esperando um processo livre no pool
+não conta, e um parse que estoura o tempo falha sozinho, sem derrubar os
+outros parses do pool. Só um filho preso em código C (o alarme do Python não
+chega a rodar) é encerrado à força, ``HARD_TIMEOUT_GRACE`` segundos depois.
+
+Este módulo não importa Django no topo: ele é importado pelos processos
+filhos, que não fazem ``django.setup()``.
+"""
+
+from __future__ import annotations
+
+import faulthandler
+import importlib
+import logging
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PARSERS = {
+    "media_plan": "campaigns.xlsx_worker",
+    "sponsorship": "campaigns.sponsorship_xlsx_worker",
+    "financial": "campaigns.financial_xlsx_worker",
+}
+
+DEFAULT_POOL_SIZE = 2
+# Recicla o processo filho depois de N planilhas para devolver memória ao SO.
+DEFAULT_TASKS_PER_CHILD = 50
+# Segundos além do timeout antes de matar um filho que não responde ao alarme.
+HARD_TIMEOUT_GRACE = 30
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+class XlsxParseError(RuntimeError):
+    """Falha ao executar o parser no pool (timeout, crash ou exceção)."""
+
+
+class ParserTimeout(BaseException):
+    """Levantada no processo filho quando o parse passa do timeout.
+
+    BaseException: os parsers convertem ``Exception`` em erro de planilha.
+    """
+
+
+def _raise_timeout(signum, frame):
+    raise ParserTimeout()
+
+
+def _init_worker() -> None:
+    from campaigns.xlsx_worker import _disable_lxml
+
+    _disable_lxml()
+    import openpyxl  # noqa: F401  (aquece o import para a primeira planilha)
+
+
+def _run_parser(kind: str, path: str, timeout: float | None = None) -> dict[str, Any]:
+    parse = importlib.import_module(PARSERS[kind]).parse
+    if not timeout or threading.current_thread() is not threading.main_thread():
+        return parse(path)
+
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    faulthandler.dump_traceback_later(timeout + HARD_TIMEOUT_GRACE, exit=True)
+    try:
+        return parse(path)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        faulthandler.cancel_dump_traceback_later()
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _pool_settings() -> tuple[int, int]:
+    from django.conf import settings
+
+    size = int(getattr(settings, "XLSX_PARSER_POOL_SIZE", DEFAULT_POOL_SIZE) or DEFAULT_POOL_SIZE)
+    per_child = int(getattr(settings, "XLSX_PARSER_TASKS_PER_CHILD", DEFAULT_TASKS_PER_CHILD) or 0)
+    return max(1, size), max(0, per_child)
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Pool do processo atual, criado na primeira planilha."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            size, per_child = _pool_settings()
+            kwargs: dict[str, Any] = {
+                "max_workers": size,
+                "mp_context": multiprocessing.get_context("spawn"),
+                "initializer": _init_worker,
+            }
+            if per_child:
+                kwargs["max_tasks_per_child"] = per_child
+            _pool = ProcessPoolExecutor(**kwargs)
+        return _pool
+
+
+def shutdown_pool(*, terminate: bool = False) -> None:
+    """Descarta o pool (o próximo parse cria outro). ``terminate`` mata filhos presos."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is None:
+        return
+    if terminate:
+        for proc in list(getattr(pool, "_processes", {}).values()):
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+    pool.shutdown(wait=not terminate, cancel_futures=True)
+
+
+def run_parser(kind: str, path: str, *, timeout: float | None = None) -> dict[str, Any]:
+    """Executa o parser ``kind`` sobre ``path`` num processo do pool.
+
+    ``timeout`` vale a partir do início do parse (ver docstring do módulo).
+    Raises XlsxParseError com uma mensagem curta quando o parser estoura o
+    tempo, derruba o processo filho ou levanta exceção.
+    """
+    if kind not in PARSERS:
+        raise ValueError(f"Parser desconhecido: {kind}")
+
+    future = get_pool().submit(_run_parser, kind, path, timeout)
+    try:
+        return future.result()
+    except ParserTimeout as exc:
+        logger.warning("XLSX parser %s timed out after %ss on %s", kind, timeout, path)
+        raise XlsxParseError("Timeout ao processar arquivo") from exc
+    except BrokenProcessPool as exc:
+        logger.error("XLSX parser %s crashed the worker process on %s", kind, path)
+        shutdown_pool(terminate=True)
+        raise XlsxParseError("O processo de leitura da planilha foi encerrado inesperadamente.") from exc
+    except Exception as exc:
+        logger.warning("XLSX parser %s failed on %s", kind, path, exc_info=True)
+        raise XlsxParseError(f"{type(exc).__name__}: {exc}"[:300]) from exc
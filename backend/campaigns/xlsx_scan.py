@@ -0,0 +1,63 @@
+"""Varreduras de cabeçalho compartilhadas pelos parsers de planilha.
+
+Sem Django e sem openpyxl: recebe linhas já lidas (tuplas de valores, como
+``ws.iter_rows(values_only=True)``) e roda nos processos do ``xlsx_pool``.
+Cada função lê cada célula uma única vez.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+def first_match(rows: Iterable[Iterable[Any]], parse: Callable[[Any], T | None]) -> T | None:
+    """Primeiro ``parse(v)`` não-None, lendo linha a linha da esquerda para a direita."""
+    for row in rows:
+        for v in row:
+            if v is None:
+                continue
+            found = parse(v)
+            if found is not None:
+                return found
+    return None
+
+
+def carry_forward(row: Iterable[Any], parse: Callable[[Any], T | None], width: int) -> list[T | None]:
+    """Para cada coluna (0-based, até ``width``), o último ``parse(v)`` não-None à esquerda dela, inclusive.
+
+    É o rótulo de um cabeçalho mesclado: "Janeiro" na coluna 5 vale para as
+    colunas seguintes até aparecer "Fevereiro".
+    """
+    out: list[T | None] = [None] * width
+    current: T | None = None
+    filled = 0
+    for v in row:
+        if filled >= width:
+            break
+        if v is not None:
+            found = parse(v)
+            if found is not None:
+                current = found
+        out[filled] = current
+        filled += 1
+    if current is not None:
+        out[filled:] = [current] * (width - filled)
+    return out
+
+
+def label_by_column(
+    rows: Iterable[Iterable[Any]], parse: Callable[[Any], T | None], width: int
+) -> dict[int, T]:
+    """Rótulo de cada coluna (1-based) a partir de várias linhas de cabeçalho.
+
+    ``carry_forward`` em cada linha; quando mais de uma linha rotula a coluna,
+    vale a mais de baixo. Colunas sem rótulo ficam fora do dict.
+    """
+    labels: list[T | None] = [None] * width
+    for row in rows:
+        for idx, found in enumerate(carry_forward(row, parse, width)):
+            if found is not None:
+                labels[idx] = found
+    return {idx: found for idx, found in enumerate(labels, start=1) if found is not None}
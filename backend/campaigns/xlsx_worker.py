@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 from datetime import date, datetime, time
+from itertools import chain, islice
 import json
 import re
 import sys
 from typing import Any
 
+from campaigns.xlsx_scan import first_match, label_by_column
+
 
 class DateTimeEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -54,7 +57,13 @@ _MONTHS: dict[str, int] = {
 }
 
 
+_lxml_blocked = False
+
+
 def _disable_lxml() -> None:
+    global _lxml_blocked
+    if _lxml_blocked:
+        return
     try:
         import importlib.abc
         import importlib.machinery
@@ -74,6 +83,7 @@ def _disable_lxml() -> None:
             raise ImportError("lxml disabled")
 
     sys.meta_path.insert(0, _BlockLxml())
+    _lxml_blocked = True
 
 
 def _norm(s: str) -> str:
@@ -193,29 +203,43 @@ def _maybe_month(v: Any) -> int | None:
     return None
 
 
-def _infer_year(ws: Any, *, until_row: int) -> int:
-    for r in range(1, max(1, min(until_row, ws.max_row)) + 1):
-        for c in range(1, ws.max_column + 1):
-            v = ws.cell(row=r, column=c).value
-            if v is None:
-                continue
-            s = str(v)
-            m4 = re.search(r"\b(20\d{2})\b", s)
-            if m4:
-                y = int(m4.group(1))
-                if 2000 <= y <= 2100:
-                    return y
-            m2 = re.search(r"\b(\d{2})\s*/\s*(\d{2})\b", s)
-            if m2:
-                y2 = int(m2.group(2))
-                if 0 <= y2 <= 99:
-                    return 2000 + y2
-    return datetime.now().year
-
-
-def _find_table_header_row(ws: Any) -> int | None:
-    for r in range(1, min(ws.max_row, 200) + 1):
-        row_vals = [ws.cell(row=r, column=c).value for c in range(1, ws.max_column + 1)]
+# Linhas lidas antes de decidir o layout da aba: cabeçalho da tabela (até a
+# linha 200) + linha de dias (até 12 abaixo), e a tabela de peças (cabeçalho
+# até a linha 120 + 80 linhas). O resto da aba é lido em streaming.
+HEAD_ROWS = 212
+
+
+def _cell(rows: list[tuple], r: int, c: int) -> Any:
+    """Valor da célula (r, c), 1-based, num buffer de linhas; None fora dele."""
+    if r < 1 or r > len(rows):
+        return None
+    row = rows[r - 1]
+    return row[c - 1] if 0 < c <= len(row) else None
+
+
+def _year_from_value(v: Any) -> int | None:
+    s = str(v)
+    m4 = re.search(r"\b(20\d{2})\b", s)
+    if m4:
+        y = int(m4.group(1))
+        if 2000 <= y <= 2100:
+            return y
+    m2 = re.search(r"\b(\d{2})\s*/\s*(\d{2})\b", s)
+    if m2:
+        y2 = int(m2.group(2))
+        if 0 <= y2 <= 99:
+            return 2000 + y2
+    return None
+
+
+def _infer_year(rows: list[tuple], *, until_row: int) -> int:
+    year = first_match(rows[: max(1, until_row)], _year_from_value)
+    return year if year is not None else datetime.now().year
+
+
+def _find_table_header_row(rows: list[tuple]) -> int | None:
+    for r in range(1, min(len(rows), 200) + 1):
+        row_vals = rows[r - 1]
         tokens = [_norm(str(v)) for v in row_vals if v is not None and str(v).strip() != ""]
         if not tokens:
             continue
@@ -224,11 +248,11 @@ def _find_table_header_row(ws: Any) -> int | None:
     return None
 
 
-def _find_day_row(ws: Any, *, start_row: int) -> int | None:
+def _find_day_row(rows: list[tuple], *, start_row: int) -> int | None:
     best_row = None
     best_count = 0
-    for r in range(start_row, min(ws.max_row, start_row + 12) + 1):
-        row_vals = [ws.cell(row=r, column=c).value for c in range(1, ws.max_column + 1)]
+    for r in range(start_row, min(len(rows), start_row + 12) + 1):
+        row_vals = rows[r - 1]
         count = 0
         for v in row_vals:
             n = _parse_int(v)
@@ -242,14 +266,14 @@ def _find_day_row(ws: Any, *, start_row: int) -> int | None:
     return best_row
 
 
-def _extract_piece_table(ws: Any) -> list[dict[str, Any]]:
+def _extract_piece_table(rows: list[tuple]) -> list[dict[str, Any]]:
     header_row = None
     code_col = None
     title_col = None
     sec_col = None
 
-    for r in range(1, min(ws.max_row, 120) + 1):
-        row_vals = [ws.cell(row=r, column=c).value for c in range(1, min(ws.max_column, 200) + 1)]
+    for r in range(1, min(len(rows), 120) + 1):
+        row_vals = rows[r - 1][:200]
         norm_vals = [_norm(str(v)) if v is not None else "" for v in row_vals]
         if "pc" not in norm_vals:
             continue
@@ -276,10 +300,10 @@ def _extract_piece_table(ws: Any) -> list[dict[str, Any]]:
         return []
 
     pieces: list[dict[str, Any]] = []
-    for r in range(header_row + 1, min(ws.max_row, header_row + 80) + 1):
-        code = ws.cell(row=r, column=code_col).value
-        title = ws.cell(row=r, column=title_col).value
-        sec = ws.cell(row=r, column=sec_col).value if sec_col is not None else None
+    for r in range(header_row + 1, min(len(rows), header_row + 80) + 1):
+        code = _cell(rows, r, code_col)
+        title = _cell(rows, r, title_col)
+        sec = _cell(rows, r, sec_col) if sec_col is not None else None
         code_s = str(code).strip().upper() if code is not None else ""
         title_s = str(title).strip() if title is not None else ""
         if not code_s and not title_s:
@@ -307,21 +331,41 @@ def _split_piece_codes(v: Any) -> list[str]:
     return sorted(set(codes))
 
 
-def main() -> int:
-    if len(sys.argv) < 2:
-        return 2
-    path = sys.argv[1]
+def parse(path: str) -> dict[str, Any]:
+    """Lê a planilha e devolve o payload JSON-safe (o mesmo que ``main`` imprime)."""
     _disable_lxml()
     import openpyxl  # type: ignore
 
-    wb = openpyxl.load_workbook(path, data_only=True)
+    # read_only: as linhas são lidas do XML sob demanda, sem montar a aba
+    # inteira em memória (planos anuais têm 365+ colunas de dias).
+    wb = openpyxl.load_workbook(path, data_only=True, read_only=True)
+    try:
+        return _parse_workbook(wb)
+    finally:
+        wb.close()
+
+
+def _pad(row: tuple, width: int) -> list[Any]:
+    values = list(row)
+    if len(values) < width:
+        values.extend([None] * (width - len(values)))
+    return values
+
+
+def _parse_workbook(wb: Any) -> dict[str, Any]:
     parsed_rows: list[dict[str, Any]] = []
     detected: dict[str, Any] = {"sheets": {}}
     total_rows = 0
     pieces_map: dict[str, dict[str, Any]] = {}
 
     for ws in wb.worksheets:
-        for p in _extract_piece_table(ws):
+        # A tag <dimension> nem sempre é confiável; sem ela as linhas vêm com
+        # o tamanho real e as linhas ausentes vêm vazias, mantendo a numeração.
+        ws.reset_dimensions()
+        rows_iter = ws.iter_rows(values_only=True)
+        head = list(islice(rows_iter, HEAD_ROWS))
+
+        for p in _extract_piece_table(head):
             code = str(p.get("code") or "").strip().upper()
             if not code:
                 continue
@@ -333,7 +377,7 @@ def main() -> int:
                 if p.get("duration_sec") and not pieces_map[code].get("duration_sec"):
                     pieces_map[code]["duration_sec"] = p.get("duration_sec")
         media_type, media_channel = detect_media_from_sheet(ws.title)
-        header_row_idx = _find_table_header_row(ws)
+        header_row_idx = _find_table_header_row(head)
         if header_row_idx is None:
             detected["sheets"][ws.title] = {
                 "media_type": media_type,
@@ -346,9 +390,9 @@ def main() -> int:
             }
             continue
 
-        header_values = [ws.cell(row=header_row_idx, column=c).value for c in range(1, ws.max_column + 1)]
-        day_row_idx = _find_day_row(ws, start_row=header_row_idx)
-        year_hint = _infer_year(ws, until_row=header_row_idx)
+        header_values = list(head[header_row_idx - 1])
+        day_row_idx = _find_day_row(head, start_row=header_row_idx)
+        year_hint = _infer_year(head, until_row=header_row_idx)
 
         headers = [_norm(str(v)) if v is not None else "" for v in header_values]
         col_by_key: dict[str, int] = {}
@@ -384,20 +428,13 @@ def main() -> int:
                     date_cols.append((idx, maybe_date))
 
         if day_row_idx is not None:
-            day_values = [ws.cell(row=day_row_idx, column=c).value for c in range(1, ws.max_column + 1)]
-            month_by_col: dict[int, int] = {}
-            for col_idx in range(1, ws.max_column + 1):
-                month = None
-                for r in range(header_row_idx, day_row_idx):
-                    last = None
-                    for c in range(1, col_idx + 1):
-                        mv = _maybe_month(ws.cell(row=r, column=c).value)
-                        if mv is not None:
-                            last = mv
-                    if last is not None:
-                        month = last
-                if month is not None:
-                    month_by_col[col_idx] = month
+            day_values = list(head[day_row_idx - 1])
+            month_by_col = label_by_column(head[header_row_idx - 1 : day_row_idx - 1], _maybe_month, len(day_values))
+            # Só colunas de dia entram na sequência de meses: rótulos de texto
+            # como "MARKET" contêm "mar" e viravam um março antes de janeiro.
+            month_by_col = {
+                c: m for c, m in month_by_col.items() if (_parse_int(day_values[c - 1]) or 0) in range(1, 32)
+            }
 
             # Ajustar anos para transições (ex: Dez 2025 -> Jan 2026)
             # Se year_hint=2026 e temos dezembro antes de janeiro, dezembro é 2025
@@ -445,10 +482,18 @@ def main() -> int:
         }
 
         start_data_row = (day_row_idx + 1) if day_row_idx is not None else (header_row_idx + 1)
+        row_width = max([len(header_values), *col_by_key.values(), *(c for c, _ in date_cols)])
         last_seen: dict[str, str] = {}
-        for r in range(start_data_row, ws.max_row + 1):
-            total_rows += 1
-            row_values = [ws.cell(row=r, column=c).value for c in range(1, ws.max_column + 1)]
+        # Linhas vazias só contam em total_rows se houver conteúdo depois delas
+        # (igual a iterar até ws.max_row no modo completo).
+        pending_blank = 0
+        for row in chain(head[start_data_row - 1:], rows_iter):
+            if not row:
+                pending_blank += 1
+                continue
+            total_rows += pending_blank + 1
+            pending_blank = 0
+            row_values = _pad(row, row_width)
             if not any(v is not None and str(v).strip() != "" for v in row_values):
                 continue
 
@@ -550,7 +595,13 @@ def main() -> int:
         "rows": parsed_rows,
         "pieces": list(pieces_map.values()),
     }
-    sys.stdout.write(json.dumps(out, ensure_ascii=False, cls=DateTimeEncoder))
+    return json.loads(json.dumps(out, ensure_ascii=False, cls=DateTimeEncoder))
+
+
+def main() -> int:
+    if len(sys.argv) < 2:
+        return 2
+    sys.stdout.write(json.dumps(parse(sys.argv[1]), ensure_ascii=False))
     return 0
 
 
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 
 
@@ -97,14 +98,45 @@ else:
         }
     }
 
-# ── Cache (file-based to persist across server restarts) ──
+# ── Cache: LRU por processo (web.cache.TieredCache) na frente do cache compartilhado ──
+# Com REDIS_URL o compartilhado é o Redis (requer o pacote redis); sem ele, o
+# cache em arquivo (persiste entre restarts, mas faz I/O de disco a cada leitura).
+# ``manage.py test`` usa LocMem: o .cache em disco sobreviveria entre execuções.
+TESTING = sys.argv[1:2] == ["test"]
+REDIS_URL = os.environ.get("REDIS_URL", "")
+if TESTING:
+    _SHARED_CACHE = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "shared"}
+elif REDIS_URL:
+    _SHARED_CACHE = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+else:
+    _SHARED_CACHE = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": str(BASE_DIR / ".cache")}
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
-        "LOCATION": str(BASE_DIR / ".cache"),
+        "BACKEND": "web.cache.TieredCache",
+        "LOCATION": "default",
         "TIMEOUT": 86400,  # 24h default
-    }
+        "OPTIONS": {
+            "SHARED": "shared",
+            "LOCAL_MAX_ENTRIES": int(os.environ.get("CACHE_LOCAL_MAX_ENTRIES", "1000")),
+            # Segundos que um valor lido do compartilhado vale no processo.
+            "LOCAL_TIMEOUT": int(os.environ.get("CACHE_LOCAL_TIMEOUT", "30")),
+        },
+    },
+    "shared": {**_SHARED_CACHE, "TIMEOUT": 86400},
 }
+# Contexto calculado das telas de dashboard (dashboard, DashON, Consolidated ON,
+# Analytics, Veiculação). A chave leva a versão dos dados do cliente, então
+# syncs/imports invalidam na hora; o TTL só limita o espaço. 0 desliga.
+# Desligado nos testes: o TestCase desfaz as escritas sem rodar o on_commit
+# que incrementa a versão, e os ids se repetem entre testes.
+VIEW_CACHE_TIMEOUT = int(os.environ.get("VIEW_CACHE_TIMEOUT", "0" if TESTING else "3600"))
+# Insights de IA (web.services.ai_cache): com os dados mudados, o resultado
+# anterior é servido e regenerado em background, em até N threads. Uma chamada
+# ao LLM por cliente/período por vez; quem chega depois espera até
+# AI_CACHE_WAIT segundos pelo resultado em vez de chamar de novo.
+AI_REFRESH_CONCURRENCY = int(os.environ.get("AI_REFRESH_CONCURRENCY", "2"))
+AI_CACHE_WAIT = int(os.environ.get("AI_CACHE_WAIT", "60"))
+AI_CACHE_LOCK_TIMEOUT = int(os.environ.get("AI_CACHE_LOCK_TIMEOUT", "180"))
 
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -150,6 +182,22 @@ LOGOUT_REDIRECT_URL = "/login/"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# --- Parse de planilhas ---
+# Processos do pool (por worker do Gunicorn) que leem .xlsx fora do processo web.
+XLSX_PARSER_POOL_SIZE = int(os.environ.get("XLSX_PARSER_POOL_SIZE", "2"))
+XLSX_PARSER_TASKS_PER_CHILD = int(os.environ.get("XLSX_PARSER_TASKS_PER_CHILD", "50"))
+# Resultados de parse guardados por SHA-256 do arquivo + versão do parser (LRU por tamanho; 0 desliga).
+XLSX_PARSE_CACHE_DIR = os.environ.get("XLSX_PARSE_CACHE_DIR", str(BASE_DIR / ".cache" / "xlsx_parse"))
+XLSX_PARSE_CACHE_MAX_BYTES = int(os.environ.get("XLSX_PARSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# --- Upload de peças ---
+# Threads que calculam o SHA-256 dos arquivos de um upload em lote.
+ASSET_HASH_CONCURRENCY = int(os.environ.get("ASSET_HASH_CONCURRENCY", "4"))
+# O ffprobe roda depois do upload, numa fila em threads do próprio servidor;
+# desligue se ``manage.py probe_creative_assets`` rodar como worker/cron.
+ASSET_PROBE_IN_PROCESS = os.environ.get("ASSET_PROBE_IN_PROCESS", "true").lower() in ("1", "true", "yes")
+ASSET_PROBE_CONCURRENCY = int(os.environ.get("ASSET_PROBE_CONCURRENCY", "2"))
+
 # --- Google Ads Integration ---
 GOOGLE_ADS_CLIENT_ID = os.environ.get("GOOGLE_ADS_CLIENT_ID", "")
 GOOGLE_ADS_CLIENT_SECRET = os.environ.get("GOOGLE_ADS_CLIENT_SECRET", "")
@@ -158,6 +206,13 @@ GOOGLE_ADS_REDIRECT_URI = os.environ.get(
     "GOOGLE_ADS_REDIRECT_URI",
     "http://localhost:8000/integracoes/google-ads/callback/",
 )
+# Contas-filhas de um MCC sincronizadas em paralelo (threads).
+GOOGLE_ADS_SYNC_CONCURRENCY = int(os.environ.get("GOOGLE_ADS_SYNC_CONCURRENCY", "4"))
+# Novas tentativas quando a API responde 429/503 (cota excedida).
+GOOGLE_ADS_MAX_RETRIES = int(os.environ.get("GOOGLE_ADS_MAX_RETRIES", "3"))
+# Downloads de imagens dos criativos: total em paralelo e por host.
+GOOGLE_ADS_DOWNLOAD_CONCURRENCY = int(os.environ.get("GOOGLE_ADS_DOWNLOAD_CONCURRENCY", "8"))
+GOOGLE_ADS_DOWNLOAD_PER_HOST = int(os.environ.get("GOOGLE_ADS_DOWNLOAD_PER_HOST", "4"))
 
 # --- Meta Ads Integration ---
 META_ADS_APP_ID = os.environ.get("META_ADS_APP_ID", "")
@@ -167,6 +222,22 @@ META_ADS_REDIRECT_URI = os.environ.get(
     "http://localhost:8000/integracoes/meta-ads/callback/",
 )
 
+# --- Ad platform sync ---
+# Syncs incrementais buscam desde o último dia sincronizado menos esta janela,
+# para capturar conversões/custos reprocessados tardiamente pelas plataformas.
+ADS_SYNC_LOOKBACK_DAYS = int(os.environ.get("ADS_SYNC_LOOKBACK_DAYS", "3"))
+# Os botões de sync enfileiram SyncJob; em produção rode ``manage.py run_sync_worker``.
+# Sem worker, a fila é processada numa thread do próprio servidor — padrão com
+# DEBUG (dev); em staging sem worker, ligue SYNC_JOBS_IN_PROCESS=1.
+SYNC_JOBS_IN_PROCESS = os.environ.get(
+    "SYNC_JOBS_IN_PROCESS", "true" if DEBUG and not TESTING else "false"
+).lower() in ("1", "true", "yes")
+# Intervalo (s) em que o worker marca o job em execução como vivo; jobs sem
+# heartbeat há mais de SYNC_JOB_STALE_MINUTES (ou ``--stale-minutes`` do
+# run_sync_worker) são tratados como órfãos e voltam para a fila.
+SYNC_JOB_HEARTBEAT_SECONDS = int(os.environ.get("SYNC_JOB_HEARTBEAT_SECONDS", "30"))
+SYNC_JOB_STALE_MINUTES = int(os.environ.get("SYNC_JOB_STALE_MINUTES", "10"))
+
 # --- E-mail ---
 # Em produção, configure as variáveis abaixo para usar SMTP.
 # Em desenvolvimento, os e-mails são exibidos no console.
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import GoogleAdsAccount, SyncLog, MetaAdsAccount, MetaSyncLog
+from .models import GoogleAdsAccount, SyncLog, MetaAdsAccount, MetaSyncLog, SyncJob
 
 
 @admin.register(GoogleAdsAccount)
@@ -27,3 +27,9 @@ class MetaAdsAccountAdmin(admin.ModelAdmin):
 class MetaSyncLogAdmin(admin.ModelAdmin):
     list_display = ("account", "started_at", "finished_at", "status", "campaigns_synced", "metrics_synced")
     list_filter = ("status",)
+
+
+@admin.register(SyncJob)
+class SyncJobAdmin(admin.ModelAdmin):
+    list_display = ("provider", "account_id", "status", "created_at", "started_at", "finished_at", "worker")
+    list_filter = ("provider", "status")
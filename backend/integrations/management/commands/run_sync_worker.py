@@ -0,0 +1,60 @@
+"""Worker da fila de sync (SyncJob) do Google Ads / Meta Ads.
+
+Usage:
+    python manage.py run_sync_worker               # roda continuamente
+    python manage.py run_sync_worker --once        # processa a fila e sai (cron)
+    python manage.py run_sync_worker --sleep=10    # intervalo entre consultas à fila
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from integrations.services.jobs import requeue_stale_jobs, run_pending_jobs, stale_after, worker_name
+
+
+class Command(BaseCommand):
+    help = "Processa os jobs de sincronização enfileirados pela tela de Integrações"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Processa os jobs pendentes e encerra",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=5.0,
+            help="Segundos entre consultas quando a fila está vazia (default: 5)",
+        )
+        parser.add_argument(
+            "--stale-minutes",
+            type=int,
+            default=None,
+            help="Jobs em execução sem heartbeat há mais tempo que isso voltam para a fila "
+            "(default: SYNC_JOB_STALE_MINUTES, 10)",
+        )
+
+    def handle(self, *args, **options):
+        worker = worker_name()
+        if options["stale_minutes"] is None:
+            max_age = stale_after()
+        else:
+            max_age = timedelta(minutes=options["stale_minutes"])
+        self.stdout.write(f"Worker {worker} iniciado.")
+
+        while True:
+            close_old_connections()
+            requeued = requeue_stale_jobs(max_age)
+            if requeued:
+                self.stdout.write(self.style.WARNING(f"{requeued} job(s) travados devolvidos à fila."))
+
+            done = run_pending_jobs(worker)
+            if done:
+                self.stdout.write(self.style.SUCCESS(f"{done} job(s) processados."))
+            if options["once"]:
+                return
+            time.sleep(options["sleep"])
@@ -3,13 +3,17 @@
 Usage:
     python manage.py sync_google_ads              # sync all active accounts
     python manage.py sync_google_ads --cliente-id=1  # sync specific client
-    python manage.py sync_google_ads --days=7      # last 7 days only
+    python manage.py sync_google_ads --full        # backfill --days (ignora a marca d'água)
+    python manage.py sync_google_ads --full --days=180
+
+Roda pela fila de SyncJob (``jobs.sync_now``): uma conta que já está sendo
+sincronizada pelo worker ou pela tela é pulada, em vez de sincronizada em dobro.
 """
 
 from django.core.management.base import BaseCommand
 
-from integrations.models import GoogleAdsAccount
-from integrations.services.google_ads import full_sync
+from integrations.models import GoogleAdsAccount, SyncJob, SyncLog
+from integrations.services.jobs import sync_now
 
 
 class Command(BaseCommand):
@@ -26,7 +30,12 @@ class Command(BaseCommand):
             "--days",
             type=int,
             default=30,
-            help="Quantidade de dias de métricas para buscar (default: 30)",
+            help="Dias de métricas no backfill — primeiro sync ou --full (default: 30)",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Força backfill completo em vez do sync incremental",
         )
 
     def handle(self, *args, **options):
@@ -42,8 +51,14 @@ class Command(BaseCommand):
         days = options["days"]
         for account in accounts:
             self.stdout.write(f"Sincronizando: {account} ...")
-            log = full_sync(account, days=days)
-            if log.status == "success":
+            job = sync_now(SyncJob.Provider.GOOGLE_ADS, account.id, days=days, full=options["full"])
+            log = SyncLog.objects.filter(id=job.log_id).first() if job.log_id else None
+            if log is None:
+                if job.status == SyncJob.Status.RUNNING:
+                    self.stdout.write(self.style.WARNING(f"  Pulado — sync já em andamento (job #{job.id})"))
+                else:
+                    self.stdout.write(self.style.ERROR(f"  ERRO — {job.error_message[:200]}"))
+            elif log.status == "success":
                 self.stdout.write(
                     self.style.SUCCESS(
                         f"  OK — {log.campaigns_synced} campanhas, {log.metrics_synced} métricas"
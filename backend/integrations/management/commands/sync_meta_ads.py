@@ -1,9 +1,18 @@
-"""Management command to sync Meta Ads campaigns and metrics."""
+"""Management command to sync Meta Ads campaigns and metrics.
+
+Usage:
+    python manage.py sync_meta_ads                 # incremental, all active accounts
+    python manage.py sync_meta_ads --cliente-id=1  # specific client
+    python manage.py sync_meta_ads --full --days=180  # on-demand backfill
+
+Runs through the SyncJob queue (``jobs.sync_now``): an account already being
+synced by the worker or the Integrações page is skipped, not synced twice.
+"""
 
 from django.core.management.base import BaseCommand
 
-from integrations.models import MetaAdsAccount
-from integrations.services.meta_ads import full_sync
+from integrations.models import MetaAdsAccount, MetaSyncLog, SyncJob
+from integrations.services.jobs import sync_now
 
 
 class Command(BaseCommand):
@@ -20,7 +29,12 @@ class Command(BaseCommand):
             "--days",
             type=int,
             default=30,
-            help="Number of days of metrics to sync (default: 30).",
+            help="Days of metrics to backfill on first sync or with --full (default: 30).",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Force a full backfill instead of the incremental sync.",
         )
 
     def handle(self, *args, **options):
@@ -36,9 +50,16 @@ class Command(BaseCommand):
 
         days = options["days"]
         for account in accounts:
-            self.stdout.write(f"Syncing {account} (last {days} days)...")
-            log = full_sync(account, days=days)
-            if log.status == "success":
+            mode = f"backfill {days} days" if options["full"] else "incremental"
+            self.stdout.write(f"Syncing {account} ({mode})...")
+            job = sync_now(SyncJob.Provider.META_ADS, account.id, days=days, full=options["full"])
+            log = MetaSyncLog.objects.filter(id=job.log_id).first() if job.log_id else None
+            if log is None:
+                if job.status == SyncJob.Status.RUNNING:
+                    self.stdout.write(self.style.WARNING(f"  SKIPPED — sync already running (job #{job.id})"))
+                else:
+                    self.stdout.write(self.style.ERROR(f"  FAILED — {job.error_message[:200]}"))
+            elif log.status == "success":
                 self.stdout.write(
                     self.style.SUCCESS(
                         f"  OK — {log.campaigns_synced} campaigns, {log.metrics_synced} metrics"
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0002_metaadsaccount_metasynclog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='googleadsaccount',
+            name='metrics_synced_through',
+            field=models.DateField(blank=True, help_text='Último dia com métricas sincronizadas (vazio = próximo sync faz backfill completo)', null=True),
+        ),
+        migrations.AddField(
+            model_name='metaadsaccount',
+            name='metrics_synced_through',
+            field=models.DateField(blank=True, help_text='Último dia com métricas sincronizadas (vazio = próximo sync faz backfill completo)', null=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('integrations', '0003_sync_watermark'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='synclog',
+            name='customer_id',
+            field=models.CharField(blank=True, default='', help_text='Conta-filha sincronizada (vazio = a própria conta)', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='synclog',
+            name='parent',
+            field=models.ForeignKey(blank=True, help_text='Sync da conta Manager (MCC) que disparou este sync de conta-filha', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='child_logs', to='integrations.synclog'),
+        ),
+    ]
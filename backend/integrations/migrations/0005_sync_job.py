@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-17 02:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('integrations', '0004_synclog_child_accounts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(choices=[('google_ads', 'Google Ads'), ('meta_ads', 'Meta Ads')], max_length=20)),
+                ('account_id', models.PositiveIntegerField(help_text='ID do GoogleAdsAccount / MetaAdsAccount, conforme o provider')),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('queued', 'Na fila'), ('running', 'Em execução'), ('success', 'Sucesso'), ('error', 'Erro')], default='queued', max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('worker', models.CharField(blank=True, default='', max_length=120)),
+                ('log_id', models.PositiveIntegerField(blank=True, help_text='SyncLog / MetaSyncLog gerado pela execução', null=True)),
+                ('error_message', models.TextField(blank=True, default='')),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sync_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Job de sincronização',
+                'verbose_name_plural': 'Jobs de sincronização',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='syncjob_status_created_idx'), models.Index(fields=['provider', 'account_id', 'status'], name='syncjob_account_status_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core import signing
 from django.db import models
 from django.utils import timezone
@@ -21,6 +22,11 @@ class GoogleAdsAccount(models.Model):
     token_expiry = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     last_sync = models.DateTimeField(null=True, blank=True)
+    metrics_synced_through = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Último dia com métricas sincronizadas (vazio = próximo sync faz backfill completo)",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -76,6 +82,20 @@ class SyncLog(models.Model):
         on_delete=models.CASCADE,
         related_name="sync_logs",
     )
+    parent = models.ForeignKey(
+        "self",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="child_logs",
+        help_text="Sync da conta Manager (MCC) que disparou este sync de conta-filha",
+    )
+    customer_id = models.CharField(
+        max_length=20,
+        blank=True,
+        default="",
+        help_text="Conta-filha sincronizada (vazio = a própria conta)",
+    )
     started_at = models.DateTimeField(default=timezone.now)
     finished_at = models.DateTimeField(null=True, blank=True)
     status = models.CharField(max_length=10, choices=Status.choices, default=Status.RUNNING)
@@ -112,6 +132,11 @@ class MetaAdsAccount(models.Model):
     token_expiry = models.DateTimeField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     last_sync = models.DateTimeField(null=True, blank=True)
+    metrics_synced_through = models.DateField(
+        null=True,
+        blank=True,
+        help_text="Último dia com métricas sincronizadas (vazio = próximo sync faz backfill completo)",
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -168,3 +193,62 @@ class MetaSyncLog(models.Model):
 
     def __str__(self) -> str:
         return f"{self.account} - {self.started_at} ({self.status})"
+
+
+# ---------------------------------------------------------------------------
+# Fila de jobs de sync (processada pelo comando run_sync_worker)
+# ---------------------------------------------------------------------------
+
+
+class SyncJob(models.Model):
+    class Provider(models.TextChoices):
+        GOOGLE_ADS = "google_ads", "Google Ads"
+        META_ADS = "meta_ads", "Meta Ads"
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Na fila"
+        RUNNING = "running", "Em execução"
+        SUCCESS = "success", "Sucesso"
+        ERROR = "error", "Erro"
+
+    provider = models.CharField(max_length=20, choices=Provider.choices)
+    account_id = models.PositiveIntegerField(
+        help_text="ID do GoogleAdsAccount / MetaAdsAccount, conforme o provider",
+    )
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="sync_jobs",
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Atualizado periodicamente pelo worker enquanto o sync roda.
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=120, blank=True, default="")
+    log_id = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="SyncLog / MetaSyncLog gerado pela execução",
+    )
+    error_message = models.TextField(blank=True, default="")
+
+    class Meta:
+        verbose_name = "Job de sincronização"
+        verbose_name_plural = "Jobs de sincronização"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="syncjob_status_created_idx"),
+            models.Index(fields=["provider", "account_id", "status"], name="syncjob_account_status_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_provider_display()} #{self.account_id} ({self.status})"
+
+    @property
+    def is_done(self) -> bool:
+        return self.status in (self.Status.SUCCESS, self.Status.ERROR)
@@ -0,0 +1,148 @@
+"""Bounded concurrent HTTP downloader for creative files.
+
+Creative syncs used to ``urlopen`` every image inside the row loop — one
+TCP/TLS handshake and one blocking round trip per asset. ``fetch_all`` runs
+the downloads on a small thread pool instead: each worker keeps one
+keep-alive connection per host, and a per-host semaphore caps how many
+requests hit the same CDN at once.
+"""
+
+from __future__ import annotations
+
+import http.client
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable
+from urllib.parse import urljoin, urlsplit
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "DashMonitor/1.0"
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_PER_HOST = 4
+MAX_REDIRECTS = 3
+
+_REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+
+
+@dataclass
+class Download:
+    url: str
+    data: bytes | None = None
+    content_type: str = ""
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.data is not None
+
+
+class Downloader:
+    """Thread pool of keep-alive HTTP(S) connections with a per-host limit."""
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        per_host: int = DEFAULT_PER_HOST,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._host_slots: dict[str, threading.BoundedSemaphore] = {}
+        self._connections: list[http.client.HTTPConnection] = []
+
+    def _slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    def _connection(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        conn = conns.get((scheme, netloc))
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+            conn = conns[(scheme, netloc)] = cls(netloc, timeout=self.timeout)
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _send(conn: http.client.HTTPConnection, path: str) -> tuple[int, http.client.HTTPMessage, bytes]:
+        conn.request("GET", path, headers={"User-Agent": USER_AGENT})
+        resp = conn.getresponse()
+        return resp.status, resp.headers, resp.read()
+
+    def _get(self, scheme: str, netloc: str, path: str) -> tuple[int, http.client.HTTPMessage, bytes]:
+        conn = self._connection(scheme, netloc)
+        try:
+            return self._send(conn, path)
+        except (http.client.HTTPException, ConnectionError):
+            # Keep-alive fechada pelo servidor entre dois pedidos: o http.client
+            # reconecta sozinho depois do close(); tenta uma vez.
+            conn.close()
+            return self._send(conn, path)
+
+    def fetch(self, url: str) -> Download:
+        """GET ``url`` (following redirects). Errors are returned, not raised."""
+        result = Download(url)
+        current = url
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                parts = urlsplit(current)
+                if parts.scheme not in ("http", "https") or not parts.netloc:
+                    raise ValueError(f"unsupported URL: {current!r}")
+                path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+                with self._slot(parts.netloc):
+                    status, headers, body = self._get(parts.scheme, parts.netloc, path)
+                if status in _REDIRECT_STATUSES and headers.get("Location"):
+                    current = urljoin(current, headers["Location"])
+                    continue
+                if status != 200:
+                    raise RuntimeError(f"HTTP {status}")
+                result.data = body
+                result.content_type = headers.get("Content-Type", "")
+                return result
+            raise RuntimeError("too many redirects")
+        except Exception as exc:
+            result.error = str(exc) or exc.__class__.__name__
+        return result
+
+    def fetch_all(self, urls: Iterable[str]) -> dict[str, Download]:
+        """Download every distinct URL concurrently. Returns ``{url: Download}``."""
+        unique = list(dict.fromkeys(u for u in urls if u))
+        if not unique:
+            return {}
+        workers = min(self.max_workers, len(unique))
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="creative-dl") as pool:
+                return dict(zip(unique, pool.map(self.fetch, unique)))
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._connections = self._connections, []
+        for conn in conns:
+            conn.close()
+
+
+def fetch_all(
+    urls: Iterable[str],
+    *,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    per_host: int = DEFAULT_PER_HOST,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> dict[str, Download]:
+    """Shortcut for ``Downloader(...).fetch_all(urls)``."""
+    return Downloader(max_workers=max_workers, per_host=per_host, timeout=timeout).fetch_all(urls)
@@ -13,12 +13,16 @@ from __future__ import annotations
 
 import json
 import logging
+import threading
+import time
 import urllib.request
 import urllib.error
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, timedelta
 from typing import Any
 
 from django.conf import settings
+from django.db import connections
 from django.utils import timezone
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
@@ -26,8 +30,13 @@ from google_auth_oauthlib.flow import Flow
 
 from accounts.models import Cliente
 from campaigns.models import Campaign, CreativeAsset, Piece, PlacementCreative, PlacementLine, PlacementDay
+from campaigns.data_version import CAMPAIGNS, PLACEMENTS, bump_data_version
+from campaigns.rollups import refresh_placement_rollups
 
 from ..models import GoogleAdsAccount, SyncLog
+from .bulk import BulkUpsertWriter, line_ids_by_ref, micros_to_decimal
+from .downloads import fetch_all
+from .sync_window import metrics_window_days
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +44,14 @@ SCOPES = ["https://www.googleapis.com/auth/adwords"]
 GOOGLE_ADS_API_VERSION = "v23"
 GOOGLE_ADS_BASE_URL = f"https://googleads.googleapis.com/{GOOGLE_ADS_API_VERSION}"
 
+# HTTP statuses the Ads API uses for quota / transient overload.
+_RETRYABLE_STATUSES = {429, 503}
+_MAX_BACKOFF_SECONDS = 60
+
+# Contas-filhas de um MCC sincronizam em threads que compartilham o mesmo
+# GoogleAdsAccount; a renovação do token precisa acontecer uma vez só.
+_token_lock = threading.Lock()
+
 
 def _client_config() -> dict:
     return {
@@ -83,6 +100,14 @@ def _ensure_fresh_token(account: GoogleAdsAccount) -> str:
     if not account.is_token_expired and account.access_token:
         return account.access_token
 
+    with _token_lock:
+        # Another worker may have refreshed while we waited for the lock.
+        if not account.is_token_expired and account.access_token:
+            return account.access_token
+        return _refresh_token(account)
+
+
+def _refresh_token(account: GoogleAdsAccount) -> str:
     creds = Credentials(
         token=account.access_token,
         refresh_token=account.refresh_token,
@@ -172,6 +197,16 @@ def list_client_accounts(access_token: str, manager_customer_id: str) -> list[di
     return clients
 
 
+def _retry_delay(error: urllib.error.HTTPError, attempt: int) -> float:
+    """Seconds to wait before retrying: ``Retry-After`` when sent, else exponential."""
+    retry_after = error.headers.get("Retry-After") if error.headers else None
+    try:
+        delay = float(retry_after) if retry_after else 2 ** attempt
+    except ValueError:
+        delay = 2 ** attempt
+    return min(delay, _MAX_BACKOFF_SECONDS)
+
+
 def _ads_rest_search(
     access_token: str,
     customer_id: str,
@@ -205,16 +240,27 @@ def _ads_rest_search(
             payload["pageToken"] = page_token
 
         body = json.dumps(payload).encode("utf-8")
-        req = urllib.request.Request(url, data=body, headers=headers, method="POST")
-
-        try:
-            with urllib.request.urlopen(req, timeout=60) as resp:
-                data = json.loads(resp.read().decode("utf-8"))
-        except urllib.error.HTTPError as e:
-            error_body = e.read().decode("utf-8", errors="replace")
-            logger.error("Google Ads REST error %s: %s", e.code, error_body[:500])
-            friendly = _parse_ads_error(error_body)
-            raise RuntimeError(friendly) from e
+        attempt = 0
+        while True:
+            req = urllib.request.Request(url, data=body, headers=headers, method="POST")
+            try:
+                with urllib.request.urlopen(req, timeout=60) as resp:
+                    data = json.loads(resp.read().decode("utf-8"))
+                break
+            except urllib.error.HTTPError as e:
+                error_body = e.read().decode("utf-8", errors="replace")
+                if e.code in _RETRYABLE_STATUSES and attempt < settings.GOOGLE_ADS_MAX_RETRIES:
+                    attempt += 1
+                    delay = _retry_delay(e, attempt)
+                    logger.warning(
+                        "Google Ads rate limited (%s) on customer %s; retry %d in %.0fs",
+                        e.code, cid, attempt, delay,
+                    )
+                    time.sleep(delay)
+                    continue
+                logger.error("Google Ads REST error %s: %s", e.code, error_body[:500])
+                friendly = _parse_ads_error(error_body)
+                raise RuntimeError(friendly) from e
 
         all_rows.extend(data.get("results", []))
 
@@ -320,12 +366,15 @@ def sync_metrics(
     days: int = 30,
     target_customer_id: str | None = None,
     login_customer_id: str | None = None,
+    refresh_rollups: bool = True,
 ) -> int:
     """Sync daily metrics from Google Ads → PlacementDay. Returns count.
 
     Args:
         target_customer_id: Child account ID to query (for MCC access).
         login_customer_id: Manager account ID for auth header.
+        refresh_rollups: Recalcula o agregado do período ao final. Os syncs
+            paralelos de contas-filhas desligam e recalculam uma vez só.
     """
     access_token = _ensure_fresh_token(account)
     parent_campaign = _get_or_create_campaign(account)
@@ -348,41 +397,36 @@ def sync_metrics(
 
     rows = _ads_rest_search(access_token, query_cid, query, login_customer_id=login_customer_id)
 
-    count = 0
-    for row in rows:
-        campaign_id = str(row.get("campaign", {}).get("id", ""))
-        if not campaign_id:
-            continue
-
-        try:
-            placement_line = PlacementLine.objects.get(
-                campaign=parent_campaign,
-                external_ref=campaign_id,
-            )
-        except PlacementLine.DoesNotExist:
-            continue
-
-        segments = row.get("segments", {})
-        metrics = row.get("metrics", {})
-
-        metric_date = segments.get("date", "")
-        if not metric_date:
-            continue
-
-        cost_micros = int(metrics.get("costMicros", 0))
-        cost_reais = cost_micros / 1_000_000
+    line_ids = line_ids_by_ref(parent_campaign)
+    writer = BulkUpsertWriter(
+        PlacementDay,
+        unique_fields=["placement_line", "date"],
+        update_fields=["impressions", "clicks", "cost"],
+    )
 
-        PlacementDay.objects.update_or_create(
-            placement_line=placement_line,
-            date=metric_date,
-            defaults={
-                "impressions": int(metrics.get("impressions", 0)),
-                "clicks": int(metrics.get("clicks", 0)),
-                "cost": cost_reais,
-            },
-        )
-        count += 1
+    count = 0
+    with writer:
+        for row in rows:
+            line_id = line_ids.get(str(row.get("campaign", {}).get("id", "")))
+            if not line_id:
+                continue
+
+            metric_date = row.get("segments", {}).get("date", "")
+            if not metric_date:
+                continue
+
+            metrics = row.get("metrics", {})
+            writer.add(PlacementDay(
+                placement_line_id=line_id,
+                date=metric_date,
+                impressions=int(metrics.get("impressions", 0)),
+                clicks=int(metrics.get("clicks", 0)),
+                cost=micros_to_decimal(metrics.get("costMicros", 0)),
+            ))
+            count += 1
 
+    if refresh_rollups:
+        refresh_placement_rollups([parent_campaign.id], date_from=start_date, date_to=end_date)
     return count
 
 
@@ -420,46 +464,57 @@ def sync_ad_groups(
 
     rows = _ads_rest_search(access_token, query_cid, query, login_customer_id=login_customer_id)
 
+    status_map = {"ENABLED": "enabled", "PAUSED": "paused", "REMOVED": "removed"}
+    line_ids = line_ids_by_ref(parent_campaign)
+
+    # Pass 1: upsert the ad groups themselves
+    resolved = []
+    with BulkUpsertWriter(
+        AdGroup,
+        unique_fields=["placement_line", "external_ref"],
+        update_fields=["name", "platform", "status"],
+    ) as groups:
+        for row in rows:
+            ag = row.get("adGroup", {})
+            ag_id = str(ag.get("id", ""))
+            line_id = line_ids.get(str(row.get("campaign", {}).get("id", "")))
+            if not line_id or not ag_id:
+                continue
+            groups.add(AdGroup(
+                placement_line_id=line_id,
+                external_ref=ag_id,
+                name=ag.get("name", ""),
+                platform="google",
+                status=status_map.get(ag.get("status", ""), "enabled"),
+            ))
+            resolved.append((line_id, ag_id, row))
+
+    # Pass 2: daily metrics, keyed by the ad group ids resolved in one query
+    ag_ids = {
+        (line_id, ref): pk
+        for pk, line_id, ref in AdGroup.objects.filter(
+            placement_line__campaign=parent_campaign,
+        ).values_list("id", "placement_line_id", "external_ref")
+    }
     count = 0
-    for row in rows:
-        campaign_id = str(row.get("campaign", {}).get("id", ""))
-        ag = row.get("adGroup", {})
-        ag_id = str(ag.get("id", ""))
-        if not campaign_id or not ag_id:
-            continue
-
-        try:
-            placement_line = PlacementLine.objects.get(
-                campaign=parent_campaign, external_ref=campaign_id,
-            )
-        except PlacementLine.DoesNotExist:
-            continue
-
-        status_map = {"ENABLED": "enabled", "PAUSED": "paused", "REMOVED": "removed"}
-
-        ad_group_obj, _ = AdGroup.objects.update_or_create(
-            placement_line=placement_line,
-            external_ref=ag_id,
-            defaults={
-                "name": ag.get("name", ""),
-                "platform": "google",
-                "status": status_map.get(ag.get("status", ""), "enabled"),
-            },
-        )
-
-        seg_date = row.get("segments", {}).get("date", "")
-        metrics = row.get("metrics", {})
-        if seg_date:
-            cost_micros = int(metrics.get("costMicros", 0))
-            AdGroupDay.objects.update_or_create(
-                ad_group=ad_group_obj,
+    with BulkUpsertWriter(
+        AdGroupDay,
+        unique_fields=["ad_group", "date"],
+        update_fields=["impressions", "clicks", "cost"],
+    ) as days_writer:
+        for line_id, ag_id, row in resolved:
+            seg_date = row.get("segments", {}).get("date", "")
+            ad_group_pk = ag_ids.get((line_id, ag_id))
+            if not seg_date or not ad_group_pk:
+                continue
+            metrics = row.get("metrics", {})
+            days_writer.add(AdGroupDay(
+                ad_group_id=ad_group_pk,
                 date=seg_date,
-                defaults={
-                    "impressions": int(metrics.get("impressions", 0)),
-                    "clicks": int(metrics.get("clicks", 0)),
-                    "cost": cost_micros / 1_000_000,
-                },
-            )
+                impressions=int(metrics.get("impressions", 0)),
+                clicks=int(metrics.get("clicks", 0)),
+                cost=micros_to_decimal(metrics.get("costMicros", 0)),
+            ))
             count += 1
 
     return count
@@ -516,62 +571,74 @@ def sync_ads(
     }
     status_map = {"ENABLED": "enabled", "PAUSED": "paused", "REMOVED": "removed"}
 
-    count = 0
-    for row in rows:
-        campaign_id = str(row.get("campaign", {}).get("id", ""))
-        ag_id = str(row.get("adGroup", {}).get("id", ""))
-        ad_data = row.get("adGroupAd", {}).get("ad", {})
-        ad_id = str(ad_data.get("id", ""))
-        if not campaign_id or not ag_id or not ad_id:
-            continue
-
-        try:
-            placement_line = PlacementLine.objects.get(
-                campaign=parent_campaign, external_ref=campaign_id,
-            )
-        except PlacementLine.DoesNotExist:
-            continue
-
-        # Find or skip ad_group
-        try:
-            ad_group_obj = AdGroup.objects.get(
-                placement_line=placement_line, external_ref=ag_id,
-            )
-        except AdGroup.DoesNotExist:
-            continue
-
-        final_urls = ad_data.get("finalUrls", [])
-        final_url = final_urls[0] if final_urls else ""
-        raw_type = ad_data.get("type", "")
+    line_ids = line_ids_by_ref(parent_campaign)
+    ag_ids = {
+        (line_id, ref): pk
+        for pk, line_id, ref in AdGroup.objects.filter(
+            placement_line__campaign=parent_campaign,
+        ).values_list("id", "placement_line_id", "external_ref")
+    }
 
-        ad_obj, _ = Ad.objects.update_or_create(
-            ad_group=ad_group_obj,
-            external_ref=ad_id,
-            defaults={
-                "name": ad_data.get("name", ""),
-                "headline": ad_data.get("name", "")[:250],
-                "final_url": final_url[:500] if final_url else "",
-                "ad_type": ad_type_map.get(raw_type, "other"),
-                "platform": "google",
-                "status": status_map.get(
+    # Pass 1: upsert the ads (skipping rows whose line/ad group is unknown)
+    resolved = []
+    with BulkUpsertWriter(
+        Ad,
+        unique_fields=["ad_group", "external_ref"],
+        update_fields=["name", "headline", "final_url", "ad_type", "platform", "status"],
+    ) as ads_writer:
+        for row in rows:
+            ag_id = str(row.get("adGroup", {}).get("id", ""))
+            ad_data = row.get("adGroupAd", {}).get("ad", {})
+            ad_id = str(ad_data.get("id", ""))
+            line_id = line_ids.get(str(row.get("campaign", {}).get("id", "")))
+            ad_group_pk = ag_ids.get((line_id, ag_id))
+            if not line_id or not ad_group_pk or not ad_id:
+                continue
+
+            final_urls = ad_data.get("finalUrls", [])
+            final_url = final_urls[0] if final_urls else ""
+            raw_type = ad_data.get("type", "")
+
+            ads_writer.add(Ad(
+                ad_group_id=ad_group_pk,
+                external_ref=ad_id,
+                name=ad_data.get("name", ""),
+                headline=ad_data.get("name", "")[:250],
+                final_url=final_url[:500] if final_url else "",
+                ad_type=ad_type_map.get(raw_type, "other"),
+                platform="google",
+                status=status_map.get(
                     row.get("adGroupAd", {}).get("status", ""), "enabled"
                 ),
-            },
-        )
-
-        seg_date = row.get("segments", {}).get("date", "")
-        metrics = row.get("metrics", {})
-        if seg_date:
-            cost_micros = int(metrics.get("costMicros", 0))
-            AdDay.objects.update_or_create(
-                ad=ad_obj,
+            ))
+            resolved.append((ad_group_pk, ad_id, row))
+
+    # Pass 2: daily metrics
+    ad_ids = {
+        (ad_group_pk, ref): pk
+        for pk, ad_group_pk, ref in Ad.objects.filter(
+            ad_group__placement_line__campaign=parent_campaign,
+        ).values_list("id", "ad_group_id", "external_ref")
+    }
+    count = 0
+    with BulkUpsertWriter(
+        AdDay,
+        unique_fields=["ad", "date"],
+        update_fields=["impressions", "clicks", "cost"],
+    ) as days_writer:
+        for ad_group_pk, ad_id, row in resolved:
+            seg_date = row.get("segments", {}).get("date", "")
+            ad_pk = ad_ids.get((ad_group_pk, ad_id))
+            if not seg_date or not ad_pk:
+                continue
+            metrics = row.get("metrics", {})
+            days_writer.add(AdDay(
+                ad_id=ad_pk,
                 date=seg_date,
-                defaults={
-                    "impressions": int(metrics.get("impressions", 0)),
-                    "clicks": int(metrics.get("clicks", 0)),
-                    "cost": cost_micros / 1_000_000,
-                },
-            )
+                impressions=int(metrics.get("impressions", 0)),
+                clicks=int(metrics.get("clicks", 0)),
+                cost=micros_to_decimal(metrics.get("costMicros", 0)),
+            ))
             count += 1
 
     return count
@@ -587,12 +654,12 @@ def sync_creatives(
     Queries the ad_group_ad_asset_view to discover image/video assets
     associated with ads (especially Display campaigns), then creates
     Piece and CreativeAsset records linked to the parent Campaign.
+    Images not yet known (one batched lookup) are downloaded concurrently
+    and stored once per checksum.
 
     Returns count of assets synced.
     """
     import hashlib
-    import os
-    import tempfile
     from django.core.files.base import ContentFile
 
     access_token = _ensure_fresh_token(account)
@@ -632,8 +699,9 @@ def sync_creatives(
         logger.warning("Creative sync query failed: %s", e)
         return 0
 
-    count = 0
+    line_ids = line_ids_by_ref(parent_campaign)
     seen_assets = set()  # avoid duplicates
+    jobs: list[dict[str, Any]] = []
 
     for row in rows:
         campaign_id = str(row.get("campaign", {}).get("id", ""))
@@ -659,11 +727,8 @@ def sync_creatives(
         seen_assets.add(dedup_key)
 
         # Find the PlacementLine for this campaign
-        try:
-            placement_line = PlacementLine.objects.get(
-                campaign=parent_campaign, external_ref=campaign_id,
-            )
-        except PlacementLine.DoesNotExist:
+        line_id = line_ids.get(campaign_id)
+        if line_id is None:
             continue
 
         # Determine piece type and metadata
@@ -732,64 +797,178 @@ def sync_creatives(
 
         # Link Piece to PlacementLine
         PlacementCreative.objects.get_or_create(
-            placement_line=placement_line,
+            placement_line_id=line_id,
             piece=piece,
         )
 
-        # Download image and create CreativeAsset (if we have a URL)
-        if image_url and not CreativeAsset.objects.filter(
-            piece=piece, metadata__google_asset_id=asset_id,
-        ).exists():
-            try:
-                req = urllib.request.Request(image_url, method="GET")
-                req.add_header("User-Agent", "DashMonitor/1.0")
-                with urllib.request.urlopen(req, timeout=30) as resp:
-                    img_data = resp.read()
-                    content_type = resp.headers.get("Content-Type", "image/jpeg")
-
-                # Determine file extension
-                ext_map = {
-                    "image/jpeg": ".jpg",
-                    "image/png": ".png",
-                    "image/gif": ".gif",
-                    "image/webp": ".webp",
-                }
-                ext = ext_map.get(content_type.split(";")[0].strip(), ".jpg")
-                checksum = hashlib.md5(img_data).hexdigest()
-                filename = f"gads_{asset_id}{ext}"
-
-                creative_asset = CreativeAsset(
-                    piece=piece,
-                    preview_url=image_url,
-                    checksum=checksum,
-                    metadata=metadata,
-                )
-                creative_asset.file.save(filename, ContentFile(img_data), save=True)
-                count += 1
-                logger.info(
-                    "Synced creative asset: %s (%s) for campaign %s",
-                    asset_name, field_type, campaign_id,
-                )
-            except Exception as e:
-                logger.warning("Failed to download asset %s: %s", asset_id, e)
-                # Still create the asset record with just the URL
-                CreativeAsset.objects.create(
-                    piece=piece,
-                    preview_url=image_url,
-                    metadata=metadata,
-                )
-                count += 1
+        if image_url:
+            jobs.append({
+                "piece": piece,
+                "asset_id": asset_id,
+                "image_url": image_url,
+                "metadata": metadata,
+                "label": f"{asset_name} ({field_type}) for campaign {campaign_id}",
+            })
 
-    return count
+    # Step 2: one lookup for assets already downloaded in earlier syncs
+    # (str(): o SQLite devolve a chave JSON "123" já convertida para int)
+    known = {
+        (piece_id, str(google_asset_id))
+        for piece_id, google_asset_id in CreativeAsset.objects.filter(
+            piece_id__in={job["piece"].id for job in jobs},
+            metadata__google_asset_id__in={job["asset_id"] for job in jobs},
+        ).values_list("piece_id", "metadata__google_asset_id")
+    }
+    jobs = [job for job in jobs if (job["piece"].id, job["asset_id"]) not in known]
+
+    # Step 3: download the new images concurrently (keep-alive, per-host limit)
+    downloads = fetch_all(
+        [job["image_url"] for job in jobs],
+        max_workers=settings.GOOGLE_ADS_DOWNLOAD_CONCURRENCY,
+        per_host=settings.GOOGLE_ADS_DOWNLOAD_PER_HOST,
+    )
+
+    ext_map = {
+        "image/jpeg": ".jpg",
+        "image/png": ".png",
+        "image/gif": ".gif",
+        "image/webp": ".webp",
+    }
+    assets: list[CreativeAsset] = []
+    for job in jobs:
+        creative_asset = CreativeAsset(
+            piece=job["piece"],
+            preview_url=job["image_url"],
+            metadata=job["metadata"],
+        )
+        download = downloads[job["image_url"]]
+        if download.ok:
+            content_type = download.content_type or "image/jpeg"
+            ext = ext_map.get(content_type.split(";")[0].strip(), ".jpg")
+            creative_asset.checksum = hashlib.sha256(download.data).hexdigest()
+            # Arquivos nomeados pelo checksum: a mesma imagem usada em vários
+            # anúncios/contas é gravada uma vez só.
+            filename = f"gads_{creative_asset.checksum}{ext}"
+            stored_name = creative_asset.file.field.generate_filename(creative_asset, filename)
+            if creative_asset.file.storage.exists(stored_name):
+                creative_asset.file.name = stored_name
+            else:
+                creative_asset.file.save(filename, ContentFile(download.data), save=False)
+            logger.info("Synced creative asset: %s", job["label"])
+        else:
+            # Still create the asset record with just the URL
+            logger.warning("Failed to download asset %s: %s", job["asset_id"], download.error)
+        assets.append(creative_asset)
+
+    CreativeAsset.objects.bulk_create(assets)
+    return len(assets)
 
 
-def full_sync(account: GoogleAdsAccount, days: int = 30) -> SyncLog:
-    """Run a full sync: campaigns + metrics. Returns the SyncLog entry.
+def _sync_child_account(
+    account: GoogleAdsAccount,
+    child_id: str,
+    *,
+    days: int,
+    manager_id: str,
+) -> tuple[int, int]:
+    """Campaigns → metrics → ad groups → ads → creatives for one MCC child.
+
+    Runs in a worker thread; closes the thread's DB connection when done.
+    """
+    try:
+        campaigns_count = sync_campaigns(
+            account,
+            target_customer_id=child_id,
+            login_customer_id=manager_id,
+        )
+        metrics_count = sync_metrics(
+            account,
+            days=days,
+            target_customer_id=child_id,
+            login_customer_id=manager_id,
+            refresh_rollups=False,
+        )
+        try:
+            sync_ad_groups(account, days=days, target_customer_id=child_id, login_customer_id=manager_id)
+            sync_ads(account, days=days, target_customer_id=child_id, login_customer_id=manager_id)
+        except Exception:
+            logger.warning("Ad group/ad sync failed for child %s (non-fatal)", child_id, exc_info=True)
+        try:
+            sync_creatives(account, target_customer_id=child_id, login_customer_id=manager_id)
+        except Exception:
+            logger.warning("Creative sync failed for child %s (non-fatal)", child_id, exc_info=True)
+        return campaigns_count, metrics_count
+    finally:
+        connections.close_all()
+
+
+def _sync_child_accounts(
+    account: GoogleAdsAccount,
+    log: SyncLog,
+    child_accounts: list[dict],
+    *,
+    days: int,
+    manager_id: str,
+) -> tuple[int, int, list[str]]:
+    """Sync every MCC child on a bounded thread pool.
+
+    Each child gets its own SyncLog (``parent=log``) so one failing or slow
+    child neither aborts nor hides the others. Returns
+    ``(campaigns, metrics, failed_child_ids)``.
+    """
+    # Created up front so workers never race on get_or_create.
+    parent_campaign = _get_or_create_campaign(account)
+    child_logs = {
+        child["id"]: SyncLog.objects.create(account=account, parent=log, customer_id=child["id"])
+        for child in child_accounts
+    }
+    workers = max(1, min(settings.GOOGLE_ADS_SYNC_CONCURRENCY, len(child_accounts)))
+
+    campaigns_count = 0
+    metrics_count = 0
+    failed: list[str] = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gads-child") as pool:
+        futures = {
+            pool.submit(_sync_child_account, account, child["id"], days=days, manager_id=manager_id): child
+            for child in child_accounts
+        }
+        for future in as_completed(futures):
+            child = futures[future]
+            child_log = child_logs[child["id"]]
+            try:
+                child_campaigns, child_metrics = future.result()
+            except Exception as exc:
+                logger.warning("Sync failed for child %s (%s)", child["id"], child["name"], exc_info=True)
+                child_log.status = SyncLog.Status.ERROR
+                child_log.error_message = str(exc)[:2000]
+                failed.append(child["id"])
+            else:
+                child_log.status = SyncLog.Status.SUCCESS
+                child_log.campaigns_synced = child_campaigns
+                child_log.metrics_synced = child_metrics
+                campaigns_count += child_campaigns
+                metrics_count += child_metrics
+            child_log.finished_at = timezone.now()
+            child_log.save()
+
+    refresh_placement_rollups(
+        [parent_campaign.id],
+        date_from=date.today() - timedelta(days=days),
+        date_to=date.today(),
+    )
+    return campaigns_count, metrics_count, failed
+
+
+def full_sync(account: GoogleAdsAccount, days: int = 30, *, full: bool = False) -> SyncLog:
+    """Run a sync: campaigns + metrics. Returns the SyncLog entry.
 
     Automatically detects manager (MCC) accounts and syncs each child
-    client account through the manager.
+    client account through the manager. Metrics are fetched incrementally
+    from the account's watermark (minus the restatement lookback); ``days``
+    only applies to the first sync or when ``full=True`` forces a backfill.
     """
     log = SyncLog.objects.create(account=account)
+    days = metrics_window_days(account, days, full=full)
     try:
         access_token = _ensure_fresh_token(account)
         manager_id = account.customer_id
@@ -823,32 +1002,16 @@ def full_sync(account: GoogleAdsAccount, days: int = 30) -> SyncLog:
                     "Verifique as permissoes no Google Ads."
                 ) from e
 
-            campaigns_count = 0
-            metrics_count = 0
-            for child in child_accounts:
-                child_id = child["id"]
-                logger.info("Syncing child account %s (%s)", child_id, child["name"])
-                campaigns_count += sync_campaigns(
-                    account,
-                    target_customer_id=child_id,
-                    login_customer_id=manager_id,
-                )
-                metrics_count += sync_metrics(
-                    account,
-                    days=days,
-                    target_customer_id=child_id,
-                    login_customer_id=manager_id,
-                )
-                # Sync ad groups, ads, and creatives for child accounts
-                try:
-                    sync_ad_groups(account, days=days, target_customer_id=child_id, login_customer_id=manager_id)
-                    sync_ads(account, days=days, target_customer_id=child_id, login_customer_id=manager_id)
-                except Exception:
-                    logger.warning("Ad group/ad sync failed for child %s (non-fatal)", child_id, exc_info=True)
-                try:
-                    sync_creatives(account, target_customer_id=child_id, login_customer_id=manager_id)
-                except Exception:
-                    logger.warning("Creative sync failed for child %s (non-fatal)", child_id, exc_info=True)
+            campaigns_count, metrics_count, failed = _sync_child_accounts(
+                account, log, child_accounts, days=days, manager_id=manager_id,
+            )
+            if failed:
+                log.campaigns_synced = campaigns_count
+                log.metrics_synced = metrics_count
+                raise RuntimeError(
+                    f"{len(failed)} de {len(child_accounts)} contas-filhas falharam: "
+                    + ", ".join(failed)
+                ) from e
 
         log.status = SyncLog.Status.SUCCESS
         log.campaigns_synced = campaigns_count
@@ -857,11 +1020,14 @@ def full_sync(account: GoogleAdsAccount, days: int = 30) -> SyncLog:
         log.save()
 
         account.last_sync = timezone.now()
-        account.save(update_fields=["last_sync", "updated_at"])
+        account.metrics_synced_through = date.today()
+        account.save(update_fields=["last_sync", "metrics_synced_through", "updated_at"])
     except Exception as exc:
         logger.exception("Google Ads sync failed for account %s", account)
         log.status = SyncLog.Status.ERROR
         log.error_message = str(exc)[:2000]
         log.finished_at = timezone.now()
         log.save()
+    # Mesmo um sync parcial grava linhas/peças: invalida os caches de tela.
+    bump_data_version([account.cliente_id], (CAMPAIGNS, PLACEMENTS))
     return log
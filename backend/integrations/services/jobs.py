@@ -0,0 +1,321 @@
+"""Fila de jobs de sync em banco (sem Redis/Celery).
+
+Os botões de sync da tela de Integrações apenas enfileiram um ``SyncJob``;
+quem executa é o comando ``run_sync_worker`` (ou, em dev, uma thread no
+próprio processo quando ``SYNC_JOBS_IN_PROCESS`` está ligado). A tela
+acompanha o andamento pelo endpoint de status, que lê o job e o
+SyncLog/MetaSyncLog da execução.
+
+Enquanto o sync roda, uma thread do worker atualiza ``heartbeat_at`` a cada
+``SYNC_JOB_HEARTBEAT_SECONDS``; só jobs sem heartbeat recente são tratados
+como abandonados (worker morto) e devolvidos à fila.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from ..models import GoogleAdsAccount, MetaAdsAccount, MetaSyncLog, SyncJob, SyncLog
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = (SyncJob.Status.QUEUED, SyncJob.Status.RUNNING)
+DEFAULT_HEARTBEAT_SECONDS = 30
+DEFAULT_STALE_MINUTES = 10
+
+# Resultado de ``enqueue_sync``
+ENQUEUED = "enqueued"      # job novo na fila
+ACTIVE = "active"          # a conta já tem um job equivalente ativo
+UPGRADED = "upgraded"      # o job na fila passou a ser sync completo
+FOLLOW_UP = "follow_up"    # sync em andamento; o completo roda em seguida
+
+_PROVIDERS = {
+    SyncJob.Provider.GOOGLE_ADS: (GoogleAdsAccount, SyncLog),
+    SyncJob.Provider.META_ADS: (MetaAdsAccount, MetaSyncLog),
+}
+
+_in_process_lock = threading.Lock()
+_in_process_thread: threading.Thread | None = None
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def enqueue_sync(
+    provider: str, account_id: int, *, days: int = 180, full: bool = False, user=None
+) -> tuple[SyncJob, str]:
+    """Enfileira um sync. Returns ``(job, resultado)`` — ver ``ENQUEUED`` etc.
+
+    Se a conta já tem um job ativo, ele é reaproveitado. Um pedido de sync
+    completo não se perde: o job ainda na fila vira completo; se o job ativo
+    já está rodando um sync incremental, um completo é enfileirado para
+    depois dele. Em ``SYNC_JOBS_IN_PROCESS`` acorda a thread da fila, que
+    também devolve à fila um job órfão (servidor reiniciado no meio do sync).
+    """
+    result = _enqueue(provider, account_id, days=days, full=full, user=user)
+    _wake_in_process_worker()
+    return result
+
+
+def _enqueue(provider: str, account_id: int, *, days: int, full: bool, user=None) -> tuple[SyncJob, str]:
+    active = list(
+        SyncJob.objects.filter(provider=provider, account_id=account_id, status__in=ACTIVE_STATUSES)
+        .order_by("created_at")
+    )
+    queued = next((job for job in active if job.status == SyncJob.Status.QUEUED), None)
+    if queued is not None:
+        if not full or queued.params.get("full"):
+            return queued, ACTIVE
+        params = {**queued.params, "full": True}
+        if SyncJob.objects.filter(id=queued.id, status=SyncJob.Status.QUEUED).update(params=params):
+            queued.params = params
+            return queued, UPGRADED
+        # Um worker pegou o job entre a leitura e o update: trata como em execução.
+        queued.refresh_from_db()
+        active = [queued]
+    running = next((job for job in active if job.status == SyncJob.Status.RUNNING), None)
+    if running is not None and (not full or running.params.get("full")):
+        return running, ACTIVE
+
+    job = SyncJob.objects.create(
+        provider=provider,
+        account_id=account_id,
+        params={"days": days, "full": full},
+        requested_by=user if getattr(user, "is_authenticated", False) else None,
+    )
+    return job, (FOLLOW_UP if running is not None else ENQUEUED)
+
+
+def sync_now(provider: str, account_id: int, *, days: int, full: bool = False, worker: str = "") -> SyncJob:
+    """Sync síncrono pela fila, para os comandos de cron (``sync_google_ads``/``sync_meta_ads``).
+
+    Passa pelo mesmo job que os botões e o ``run_sync_worker``, então nunca
+    roda ao mesmo tempo que outro sync da conta: se ela já tem um sync em
+    execução, devolve esse job (RUNNING) sem rodar nada.
+    """
+    job, _ = _enqueue(provider, account_id, days=days, full=full)
+    if _claim(job.id, worker):
+        job.refresh_from_db()
+        return run_job(job)
+    job.refresh_from_db()
+    return job
+
+
+def _claim(job_id: int, worker: str = "") -> bool:
+    now = timezone.now()
+    return bool(
+        _claimable_jobs().filter(id=job_id).update(
+            status=SyncJob.Status.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+            worker=(worker or worker_name())[:120],
+        )
+    )
+
+
+def _claimable_jobs():
+    """Jobs QUEUED de contas sem outro job RUNNING."""
+    busy = SyncJob.objects.filter(
+        provider=OuterRef("provider"), account_id=OuterRef("account_id"), status=SyncJob.Status.RUNNING
+    )
+    return SyncJob.objects.filter(status=SyncJob.Status.QUEUED).exclude(Exists(busy))
+
+
+def claim_next_job(worker: str = "") -> SyncJob | None:
+    """Marca o job mais antigo da fila como RUNNING e o devolve.
+
+    O UPDATE condicionado a ``status=queued`` garante que dois workers nunca
+    peguem o mesmo job, inclusive no SQLite (sem SELECT ... FOR UPDATE).
+    Jobs de uma conta que já tem sync rodando (o completo enfileirado por
+    ``enqueue_sync``) esperam o anterior terminar.
+    """
+    while True:
+        job_id = _claimable_jobs().order_by("created_at", "id").values_list("id", flat=True).first()
+        if job_id is None:
+            return None
+        if _claim(job_id, worker):
+            return SyncJob.objects.get(id=job_id)
+
+
+class _Heartbeat:
+    """Thread que marca ``heartbeat_at`` do job enquanto o sync roda."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.interval = int(getattr(settings, "SYNC_JOB_HEARTBEAT_SECONDS", DEFAULT_HEARTBEAT_SECONDS))
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name=f"sync-job-{job_id}-heartbeat", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self) -> None:
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    SyncJob.objects.filter(id=self.job_id, status=SyncJob.Status.RUNNING).update(
+                        heartbeat_at=timezone.now()
+                    )
+                except Exception:
+                    logger.warning("Could not update heartbeat of sync job %s", self.job_id, exc_info=True)
+        finally:
+            connections.close_all()
+
+
+def run_job(job: SyncJob) -> SyncJob:
+    """Executa o sync do job (já em RUNNING) e grava o resultado."""
+    from . import google_ads, meta_ads
+
+    account_model, _ = _PROVIDERS[job.provider]
+    runner = google_ads.full_sync if job.provider == SyncJob.Provider.GOOGLE_ADS else meta_ads.full_sync
+
+    account = account_model.objects.filter(id=job.account_id, is_active=True).first()
+    if account is None:
+        job.status = SyncJob.Status.ERROR
+        job.error_message = "Conta não encontrada ou desconectada."
+    else:
+        try:
+            with _Heartbeat(job.id):
+                log = runner(
+                    account,
+                    days=int(job.params.get("days", 180)),
+                    full=bool(job.params.get("full", False)),
+                )
+        except Exception as exc:  # full_sync já registra erros no log; isto é só salvaguarda
+            logger.exception("Sync job %s crashed", job.id)
+            job.status = SyncJob.Status.ERROR
+            job.error_message = str(exc)[:2000]
+        else:
+            job.log_id = log.id
+            job.status = SyncJob.Status.SUCCESS if log.status == "success" else SyncJob.Status.ERROR
+            job.error_message = log.error_message
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "log_id", "error_message", "finished_at"])
+    return job
+
+
+def run_pending_jobs(worker: str = "", limit: int | None = None) -> int:
+    """Processa a fila até esvaziar (ou ``limit`` jobs). Returns jobs run."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim_next_job(worker)
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
+
+
+def requeue_stale_jobs(max_age: timedelta) -> int:
+    """Devolve à fila jobs RUNNING cujo worker morreu sem concluir.
+
+    Um job é abandonado quando está sem heartbeat há mais de ``max_age``;
+    syncs longos com o worker vivo continuam rodando.
+    """
+    cutoff = timezone.now() - max_age
+    stale = Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    return SyncJob.objects.filter(stale, status=SyncJob.Status.RUNNING).update(
+        status=SyncJob.Status.QUEUED,
+        started_at=None,
+        heartbeat_at=None,
+        worker="",
+    )
+
+
+def job_status(job: SyncJob) -> dict:
+    """Estado do job para o polling da tela, incluindo o log em andamento."""
+    _, log_model = _PROVIDERS[job.provider]
+    log = None
+    if job.log_id:
+        log = log_model.objects.filter(id=job.log_id).first()
+    elif job.started_at:
+        # Ainda rodando: o log é criado no início do full_sync.
+        log_qs = log_model.objects.filter(account_id=job.account_id, started_at__gte=job.started_at)
+        if log_model is SyncLog:
+            log_qs = log_qs.filter(parent__isnull=True)
+        log = log_qs.order_by("started_at").first()
+
+    data = {
+        "id": job.id,
+        "provider": job.provider,
+        "account_id": job.account_id,
+        "status": job.status,
+        "done": job.is_done,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "error_message": job.error_message,
+        "log": None,
+    }
+    if log is not None:
+        data["log"] = {
+            "id": log.id,
+            "status": log.status,
+            "campaigns_synced": log.campaigns_synced,
+            "metrics_synced": log.metrics_synced,
+        }
+        if log_model is SyncLog:
+            children = list(log.child_logs.values_list("status", flat=True))
+            if children:
+                data["log"]["children_total"] = len(children)
+                data["log"]["children_done"] = sum(1 for s in children if s != SyncLog.Status.RUNNING)
+    return data
+
+
+def stale_after() -> timedelta:
+    return timedelta(minutes=int(getattr(settings, "SYNC_JOB_STALE_MINUTES", DEFAULT_STALE_MINUTES)))
+
+
+def _wake_in_process_worker() -> None:
+    if getattr(settings, "SYNC_JOBS_IN_PROCESS", False):
+        transaction.on_commit(_start_in_process_worker)
+
+
+def _start_in_process_worker() -> None:
+    """Dev/staging sem worker dedicado: drena a fila numa thread daemon."""
+    global _in_process_thread
+    with _in_process_lock:
+        if _in_process_thread is not None:
+            return
+        _in_process_thread = threading.Thread(target=_in_process_loop, name="sync-jobs", daemon=True)
+        _in_process_thread.start()
+
+
+def _in_process_loop() -> None:
+    """Faz o papel do ``run_sync_worker``: devolve jobs órfãos à fila e a drena.
+
+    A thread só se desliga (``_in_process_thread = None``) sob o lock e depois
+    de ver a fila vazia; um job enfileirado depois disso encontra a vaga livre
+    e sobe outra thread, em vez de ficar esperando uma thread de saída.
+    """
+    global _in_process_thread
+    try:
+        while True:
+            requeue_stale_jobs(stale_after())
+            run_pending_jobs()
+            with _in_process_lock:
+                if not _claimable_jobs().exists():
+                    _in_process_thread = None
+                    return
+    except Exception:
+        logger.exception("In-process sync worker failed")
+    finally:
+        with _in_process_lock:
+            if _in_process_thread is threading.current_thread():
+                _in_process_thread = None
+        connections.close_all()
@@ -17,15 +17,19 @@ import urllib.request
 import urllib.error
 import urllib.parse
 from datetime import date, timedelta
-from typing import Any
+from typing import Any, Iterator
 
 from django.conf import settings
 from django.utils import timezone
 
 from accounts.models import Cliente
 from campaigns.models import Campaign, PlacementLine, PlacementDay
+from campaigns.data_version import CAMPAIGNS, PLACEMENTS, bump_data_version
+from campaigns.rollups import refresh_placement_rollups
 
 from ..models import MetaAdsAccount, MetaSyncLog
+from .bulk import BULK_BATCH_SIZE, BulkUpsertWriter, line_ids_by_ref, to_decimal
+from .sync_window import metrics_window_days
 
 logger = logging.getLogger(__name__)
 
@@ -245,6 +249,27 @@ def _get_or_create_campaign(account: MetaAdsAccount) -> Campaign:
     return campaign
 
 
+def _iter_graph_pages(access_token: str, path: str, params: dict | None = None) -> Iterator[list[dict]]:
+    """Yield each page of ``data`` from a Graph API edge, following ``paging.next``.
+
+    Pages are handed to the caller one at a time so the sync writes as it
+    reads and memory stays flat regardless of history length.
+    """
+    data = _graph_get(access_token, path, params)
+    while True:
+        yield data.get("data", [])
+        next_url = data.get("paging", {}).get("next")
+        if not next_url:
+            return
+        req = urllib.request.Request(next_url, method="GET")
+        try:
+            with urllib.request.urlopen(req, timeout=60) as resp:
+                data = json.loads(resp.read().decode("utf-8"))
+        except Exception:
+            logger.warning("Meta pagination stopped early for %s", path, exc_info=True)
+            return
+
+
 def sync_campaigns(account: MetaAdsAccount) -> int:
     """Sync campaigns from Meta Ads → PlacementLine. Returns count."""
     access_token = _ensure_fresh_token(account)
@@ -252,75 +277,56 @@ def sync_campaigns(account: MetaAdsAccount) -> int:
     if not aid.startswith("act_"):
         aid = f"act_{aid}"
 
-    data = _graph_get(access_token, f"{aid}/campaigns", {
-        "fields": "id,name,status,objective,start_time,stop_time",
-        "limit": "500",
-    })
-
     parent_campaign = _get_or_create_campaign(account)
+    line_ids = line_ids_by_ref(parent_campaign)
+    base_fields = ["media_type", "media_channel", "market", "channel", "property_text"]
     count = 0
 
-    for camp in data.get("data", []):
-        campaign_id = camp.get("id", "")
-        if not campaign_id:
-            continue
-
-        defaults = {
-            "media_type": PlacementLine.MediaType.ONLINE,
-            "media_channel": PlacementLine.MediaChannel.META,
-            "market": account.descriptive_name or account.ad_account_id,
-            "channel": camp.get("name", ""),
-            "property_text": f"Meta Ads Campaign #{campaign_id}",
-        }
-
-        start = camp.get("start_time", "")
-        stop = camp.get("stop_time", "")
-        if start:
-            defaults["start_date"] = start[:10]  # ISO datetime → date
-        if stop:
-            defaults["end_date"] = stop[:10]
-
-        PlacementLine.objects.update_or_create(
-            campaign=parent_campaign,
-            external_ref=str(campaign_id),
-            defaults=defaults,
-        )
-        count += 1
-
-    # Handle pagination
-    paging = data.get("paging", {})
-    next_url = paging.get("next")
-    while next_url:
-        req = urllib.request.Request(next_url, method="GET")
-        try:
-            with urllib.request.urlopen(req, timeout=60) as resp:
-                page_data = json.loads(resp.read().decode("utf-8"))
-        except Exception:
-            break
-        for camp in page_data.get("data", []):
+    for page in _iter_graph_pages(access_token, f"{aid}/campaigns", {
+        "fields": "id,name,status,objective,start_time,stop_time",
+        "limit": "500",
+    }):
+        to_create: dict[str, PlacementLine] = {}
+        # bulk_update needs a fixed field list; group by which dates came back
+        # so a missing start/stop never overwrites a stored one with NULL.
+        to_update: dict[tuple[str, ...], list[PlacementLine]] = {}
+        for camp in page:
             campaign_id = camp.get("id", "")
             if not campaign_id:
                 continue
-            defaults = {
-                "media_type": PlacementLine.MediaType.ONLINE,
-                "media_channel": PlacementLine.MediaChannel.META,
-                "market": account.descriptive_name or account.ad_account_id,
-                "channel": camp.get("name", ""),
-                "property_text": f"Meta Ads Campaign #{campaign_id}",
-            }
+            ref = str(campaign_id)
+
+            line = PlacementLine(
+                campaign=parent_campaign,
+                external_ref=ref,
+                media_type=PlacementLine.MediaType.ONLINE,
+                media_channel=PlacementLine.MediaChannel.META,
+                market=account.descriptive_name or account.ad_account_id,
+                channel=camp.get("name", ""),
+                property_text=f"Meta Ads Campaign #{campaign_id}",
+            )
+            fields = list(base_fields)
             start = camp.get("start_time", "")
             stop = camp.get("stop_time", "")
             if start:
-                defaults["start_date"] = start[:10]
+                line.start_date = start[:10]  # ISO datetime → date
+                fields.append("start_date")
             if stop:
-                defaults["end_date"] = stop[:10]
-            PlacementLine.objects.update_or_create(
-                campaign=parent_campaign,
-                external_ref=str(campaign_id),
-                defaults=defaults,
-            )
+                line.end_date = stop[:10]
+                fields.append("end_date")
+
+            if ref in line_ids:
+                line.id = line_ids[ref]
+                to_update.setdefault(tuple(fields), []).append(line)
+            else:
+                to_create[ref] = line
             count += 1
-        next_url = page_data.get("paging", {}).get("next")
+
+        for fields, lines in to_update.items():
+            PlacementLine.objects.bulk_update(lines, list(fields), batch_size=BULK_BATCH_SIZE)
+        for line in PlacementLine.objects.bulk_create(list(to_create.values()), batch_size=BULK_BATCH_SIZE):
+            if line.pk:
+                line_ids[line.external_ref] = line.pk
 
     return count
 
@@ -337,64 +343,53 @@ def sync_metrics(account: MetaAdsAccount, days: int = 30) -> int:
     start_date = (date.today() - timedelta(days=days)).strftime("%Y-%m-%d")
     end_date = date.today().strftime("%Y-%m-%d")
 
-    data = _graph_get(access_token, f"{aid}/insights", {
-        "fields": "campaign_id,campaign_name,impressions,clicks,spend",
-        "level": "campaign",
-        "time_increment": "1",  # daily breakdown
-        "time_range": json.dumps({"since": start_date, "until": end_date}),
-        "limit": "500",
-    })
+    line_ids = line_ids_by_ref(parent_campaign)
+    writer = BulkUpsertWriter(
+        PlacementDay,
+        unique_fields=["placement_line", "date"],
+        update_fields=["impressions", "clicks", "cost"],
+    )
 
     count = 0
-    all_rows = data.get("data", [])
-
-    # Handle pagination
-    paging = data.get("paging", {})
-    next_url = paging.get("next")
-    while next_url:
-        req = urllib.request.Request(next_url, method="GET")
-        try:
-            with urllib.request.urlopen(req, timeout=60) as resp:
-                page_data = json.loads(resp.read().decode("utf-8"))
-        except Exception:
-            break
-        all_rows.extend(page_data.get("data", []))
-        next_url = page_data.get("paging", {}).get("next")
-
-    for row in all_rows:
-        campaign_id = row.get("campaign_id", "")
-        if not campaign_id:
-            continue
-
-        try:
-            placement_line = PlacementLine.objects.get(
-                campaign=parent_campaign,
-                external_ref=str(campaign_id),
-            )
-        except PlacementLine.DoesNotExist:
-            continue
-
-        metric_date = row.get("date_start", "")
-        if not metric_date:
-            continue
-
-        PlacementDay.objects.update_or_create(
-            placement_line=placement_line,
-            date=metric_date,
-            defaults={
-                "impressions": int(row.get("impressions", 0)),
-                "clicks": int(row.get("clicks", 0)),
-                "cost": float(row.get("spend", 0)),
-            },
-        )
-        count += 1
-
+    with writer:
+        for page in _iter_graph_pages(access_token, f"{aid}/insights", {
+            "fields": "campaign_id,campaign_name,impressions,clicks,spend",
+            "level": "campaign",
+            "time_increment": "1",  # daily breakdown
+            "time_range": json.dumps({"since": start_date, "until": end_date}),
+            "limit": "500",
+        }):
+            for row in page:
+                line_id = line_ids.get(str(row.get("campaign_id", "")))
+                if not line_id:
+                    continue
+
+                metric_date = row.get("date_start", "")
+                if not metric_date:
+                    continue
+
+                writer.add(PlacementDay(
+                    placement_line_id=line_id,
+                    date=metric_date,
+                    impressions=int(row.get("impressions", 0)),
+                    clicks=int(row.get("clicks", 0)),
+                    cost=to_decimal(row.get("spend", 0)),
+                ))
+                count += 1
+
+    refresh_placement_rollups([parent_campaign.id], date_from=start_date, date_to=end_date)
     return count
 
 
-def full_sync(account: MetaAdsAccount, days: int = 30) -> MetaSyncLog:
-    """Run a full sync: campaigns + metrics. Returns the MetaSyncLog entry."""
+def full_sync(account: MetaAdsAccount, days: int = 30, *, full: bool = False) -> MetaSyncLog:
+    """Run a sync: campaigns + metrics. Returns the MetaSyncLog entry.
+
+    Metrics are fetched incrementally from the account's watermark (minus the
+    restatement lookback); ``days`` only applies to the first sync or when
+    ``full=True`` forces a backfill.
+    """
     log = MetaSyncLog.objects.create(account=account)
+    days = metrics_window_days(account, days, full=full)
     try:
         campaigns_count = sync_campaigns(account)
         metrics_count = sync_metrics(account, days=days)
@@ -406,11 +401,14 @@ def full_sync(account: MetaAdsAccount, days: int = 30) -> MetaSyncLog:
         log.save()
 
         account.last_sync = timezone.now()
-        account.save(update_fields=["last_sync", "updated_at"])
+        account.metrics_synced_through = date.today()
+        account.save(update_fields=["last_sync", "metrics_synced_through", "updated_at"])
     except Exception as exc:
         logger.exception("Meta Ads sync failed for account %s", account)
         log.status = MetaSyncLog.Status.ERROR
         log.error_message = str(exc)[:2000]
         log.finished_at = timezone.now()
         log.save()
+    # Mesmo um sync parcial grava linhas/peças: invalida os caches de tela.
+    bump_data_version([account.cliente_id], (CAMPAIGNS, PLACEMENTS))
     return log
@@ -0,0 +1,25 @@
+"""Janela de métricas dos syncs incrementais (Google Ads / Meta Ads).
+
+Cada conta guarda em ``metrics_synced_through`` o último dia gravado com
+sucesso. O sync de rotina busca apenas a partir desse dia, recuando
+``ADS_SYNC_LOOKBACK_DAYS`` para pegar reprocessamentos da plataforma
+(conversões tardias, ajustes de custo). Sem marca — primeira execução, ou
+após limpar os dados — ou com ``full=True``, volta ao backfill de
+``backfill_days`` dias.
+"""
+
+from __future__ import annotations
+
+from datetime import date
+
+from django.conf import settings
+
+
+def metrics_window_days(account, backfill_days: int, *, full: bool = False) -> int:
+    """Quantos dias de métricas o próximo sync de ``account`` deve buscar."""
+    synced_through = getattr(account, "metrics_synced_through", None)
+    if full or synced_through is None:
+        return backfill_days
+    lookback = max(0, int(getattr(settings, "ADS_SYNC_LOOKBACK_DAYS", 3)))
+    return max(0, (date.today() - synced_through).days) + lookback
+
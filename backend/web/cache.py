@@ -0,0 +1,194 @@
+"""Cache em dois níveis: LRU em memória do processo + cache compartilhado.
+
+O ``FileBasedCache`` fazia stat/open/unpickle em disco a cada ``get`` nas
+requisições. ``TieredCache`` (o alias ``default``) guarda as leituras
+recentes num LRU local — limitado em entradas e com TTL curto — e delega ao
+alias ``shared``: Redis quando ``REDIS_URL`` está definido, o cache em
+arquivo só como fallback, LocMem nos testes.
+
+Um valor regravado por outro processo pode levar até ``LOCAL_TIMEOUT``
+segundos para aparecer aqui. O que precisa ser lido sempre do compartilhado
+(contadores, flags de invalidação) deve usar ``caches["shared"]`` direto.
+
+Chaves com dados de um cliente passam por ``cliente_key`` para ficarem no
+namespace dele. ``view_cache_key``/``get_view_context``/``set_view_context``
+guardam o contexto já calculado das telas de dashboard, com a versão dos
+dados do cliente (``campaigns.data_version``) na chave: um sync ou import
+incrementa a versão e a próxima carga recalcula.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Mapping
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils import timezone
+
+DEFAULT_LOCAL_MAX_ENTRIES = 1000
+DEFAULT_LOCAL_TIMEOUT = 30
+
+_MISSING = object()
+
+
+def cliente_key(cliente_id: int | None, *parts: Any) -> str:
+    """Chave no namespace do cliente: ``cliente:<id>:<parts...>``."""
+    return ":".join(["cliente", str(cliente_id or 0), *(str(p) for p in parts)])
+
+
+def view_cache_key(view: str, cliente_id: int | None, params: Mapping[str, Any], **extra: Any) -> str | None:
+    """Chave do contexto de uma tela: cliente + versão dos dados + dia + parâmetros.
+
+    ``params`` é normalmente ``request.GET``; ``extra`` leva o que mais muda o
+    resultado (role, plataforma). O dia entra porque as telas marcam
+    ON/OFF e janelas relativas a hoje. Returns None com o cache desligado.
+    """
+    if getattr(settings, "VIEW_CACHE_TIMEOUT", 0) <= 0:
+        return None
+    from campaigns.data_version import data_version
+
+    items = params.lists() if hasattr(params, "lists") else params.items()
+    raw = json.dumps(
+        [sorted((str(k), v) for k, v in items), sorted(extra.items())],
+        default=str,
+        sort_keys=True,
+    )
+    digest = hashlib.sha1(raw.encode()).hexdigest()[:20]
+    return cliente_key(
+        cliente_id, "view", view, f"v{data_version(cliente_id)}", timezone.localdate().isoformat(), digest,
+    )
+
+
+def get_view_context(key: str | None) -> dict[str, Any] | None:
+    return cache.get(key) if key else None
+
+
+def set_view_context(key: str | None, context: dict[str, Any]) -> None:
+    if key:
+        cache.set(key, context, timeout=settings.VIEW_CACHE_TIMEOUT)
+
+
+class _LocalLRU:
+    """LRU thread-safe de valores picklados (cópias independentes a cada get)."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            payload = entry[1]
+        return pickle.loads(payload)
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0 or self.max_entries <= 0:
+            self.delete(key)
+            return
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# Um LRU por LOCATION, compartilhado pelas threads do processo (o Django cria
+# uma instância de backend por thread).
+_local_stores: dict[str, _LocalLRU] = {}
+_local_stores_lock = threading.Lock()
+
+
+class TieredCache(BaseCache):
+    """Backend de cache: LRU local na frente do alias ``OPTIONS["SHARED"]``.
+
+    OPTIONS:
+        SHARED: alias do cache compartilhado (default ``"shared"``).
+        LOCAL_MAX_ENTRIES: entradas no LRU do processo (0 desliga o nível local).
+        LOCAL_TIMEOUT: segundos que uma entrada vale no nível local.
+    """
+
+    def __init__(self, location: str, params: dict[str, Any]):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self._shared_alias = options.get("SHARED", "shared")
+        self._local_timeout = float(options.get("LOCAL_TIMEOUT", DEFAULT_LOCAL_TIMEOUT))
+        max_entries = int(options.get("LOCAL_MAX_ENTRIES", DEFAULT_LOCAL_MAX_ENTRIES))
+        with _local_stores_lock:
+            self._local = _local_stores.setdefault(location or "default", _LocalLRU(max_entries))
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[self._shared_alias]
+
+    def _local_key(self, key: str, version: int | None) -> str:
+        return self.make_and_validate_key(key, version=version)
+
+    def _local_ttl(self, timeout: Any) -> float:
+        timeout = self.get_backend_timeout(timeout)
+        if timeout is None:
+            return self._local_timeout
+        return min(self._local_timeout, timeout - time.time())
+
+    def get(self, key, default=None, version=None):
+        local_key = self._local_key(key, version)
+        value = self._local.get(local_key)
+        if value is not _MISSING:
+            return value
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            return default
+        self._local.set(local_key, value, self._local_timeout)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout=timeout, version=version)
+        self._local.set(self._local_key(key, version), value, self._local_ttl(timeout))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout=timeout, version=version)
+        if added:
+            self._local.set(self._local_key(key, version), value, self._local_ttl(timeout))
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._local.delete(self._local_key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def has_key(self, key, version=None):
+        if self._local.get(self._local_key(key, version)) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local.delete(self._local_key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def clear(self):
+        self._local.clear()
+        self.shared.clear()
@@ -20,6 +20,8 @@ from django.utils import timezone
 
 from accounts.models import Cliente
 from campaigns.models import Campaign, PlacementLine, PlacementDay
+from campaigns.rollups import refresh_placement_rollups
+from integrations.services.bulk import BulkUpsertWriter
 
 
 # Map Excel veiculo values → PlacementLine.MediaChannel values
@@ -233,6 +235,14 @@ class Command(BaseCommand):
         imported = 0
         skipped = 0
         veiculos_summary = {}
+        # PlacementDay em lote: sem um sinal (bump de versão) por linha;
+        # refresh_placement_rollups incrementa a versão uma vez no final.
+        days_writer = BulkUpsertWriter(
+            PlacementDay,
+            unique_fields=["placement_line", "date"],
+            update_fields=["impressions", "clicks", "cost"],
+        )
+        today = date.today()
 
         for row in rows:
             veiculo_raw = row.get("veiculo", "").strip().lower()
@@ -288,21 +298,22 @@ class Command(BaseCommand):
                     },
                 )
 
-                # Create PlacementDay (use today as date since Excel has no date column)
-                today = date.today()
-                PlacementDay.objects.update_or_create(
+                # PlacementDay (use today as date since Excel has no date column)
+                days_writer.add(PlacementDay(
                     placement_line=placement_line,
                     date=today,
-                    defaults={
-                        "impressions": impressoes,
-                        "clicks": cliques,
-                        "cost": round(investimento, 2),
-                    },
-                )
+                    impressions=impressoes,
+                    clicks=cliques,
+                    cost=round(investimento, 2),
+                ))
 
             imported += 1
             veiculos_summary[veiculo_raw] = veiculos_summary.get(veiculo_raw, 0) + 1
 
+        if not dry_run:
+            days_writer.flush()
+            refresh_placement_rollups([campaign.id])
+
         # Summary
         self.stdout.write("")
         self.stdout.write(
@@ -95,7 +95,8 @@ class Command(BaseCommand):
                     "date_from": str(start_date), "date_to": str(end_date),
                     "benchmarks": {"ctr": 2.0, "cpc": 3.50, "cpm": 15.00},
                 }
-                result = generate_analytics_insights(ai_ctx, cliente_id=cliente.id)
+                # Relatório enviado agora: não serve resumo de dados antigos.
+                result = generate_analytics_insights(ai_ctx, cliente_id=cliente.id, allow_stale=False)
                 if result:
                     ai_summary = result.get("executive_summary", "")
                     recs = result.get("recommendations", [])
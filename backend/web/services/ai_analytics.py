@@ -16,6 +16,9 @@ from typing import Any, Optional
 
 from django.core.cache import cache
 
+from campaigns.data_version import CAMPAIGNS, FINANCIAL, PIS, PLACEMENTS, REGIONS, data_versions
+from web.cache import cliente_key
+
 logger = logging.getLogger(__name__)
 
 ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
@@ -70,7 +73,7 @@ def _get_client():
 
 
 def _build_cache_key(prefix: str, cliente_id: int, date_from: str, date_to: str, data_hash: str) -> str:
-    return f"ai:{prefix}:{cliente_id}:{date_from}:{date_to}:{data_hash}"
+    return cliente_key(cliente_id, "ai", prefix, date_from, date_to, data_hash)
 
 
 def _data_fingerprint(context: dict) -> str:
@@ -80,35 +83,83 @@ def _data_fingerprint(context: dict) -> str:
     return hashlib.md5(raw.encode()).hexdigest()[:8]
 
 
+BRIEFING_TTL = 86400  # 24 hours; entries are also superseded by data version bumps
+
+GOOGLE_CHANNELS = ["google", "youtube", "display", "search"]
+META_CHANNELS = ["meta"]
+ALL_DIGITAL = GOOGLE_CHANNELS + META_CHANNELS
+
+
 def build_deep_briefing(cliente_id: int, date_from: str = "", date_to: str = "") -> dict:
     """
-    Query the database to build a comprehensive data briefing for the AI.
-    Returns a dict with all relevant metrics, campaign details, trends,
-    financial data, and region investments — ready for the LLM prompt.
+    Data briefing for the AI: metrics, campaign details, trends, financial
+    data and region investments — ready for the LLM prompt.
+
+    Memoized per (cliente, date range) in a cache snapshot. Each section
+    records the versions of the data sources it reads
+    (``campaigns.data_version``); a call recomputes only the sections whose
+    sources were bumped since (e.g. a sync rebuilds the digital/offline
+    sections but keeps financial, regions and PIs). The PI section also
+    depends on the current day (``days_until``), so a snapshot from another
+    day is revalidated too. An unchanged snapshot costs two cache reads and
+    no queries.
     """
-    from collections import defaultdict
-    from datetime import timedelta
-    from django.db.models import Sum, Count, Min, Max, Avg, F, Q
-    from campaigns.models import (
-        Campaign, PlacementLine, PlacementDay, RegionInvestment,
-        FinancialSummary, MediaEfficiency, PIControl,
-    )
-    from accounts.models import Cliente
+    key = cliente_key(cliente_id, "ai", "briefing", date_from or "all", date_to or "all")
+    versions = data_versions(cliente_id, [None])
+    today = date.today().isoformat()
+    snapshot = cache.get(key)
+    if snapshot and snapshot.get("version") == versions[None] and snapshot.get("day") == today:
+        return _assemble_briefing(snapshot, date_from, date_to)
+
+    sources = sorted({src for _, srcs, _ in _BRIEFING_SECTIONS for src in srcs})
+    versions.update(data_versions(cliente_id, sources))
+    old_sections = (snapshot or {}).get("sections", {})
+    sections = {}
+    for name, srcs, builder in _BRIEFING_SECTIONS:
+        stamp = [versions[src] for src in srcs]
+        if name == "pis":
+            stamp.append(today)  # days_until muda com o dia
+        cached = old_sections.get(name)
+        if cached and cached["stamp"] == stamp:
+            sections[name] = cached
+            continue
+        data = builder(cliente_id, date_from, date_to)
+        if data is None:
+            return {}
+        sections[name] = {"stamp": stamp, "data": data}
+
+    snapshot = {"version": versions[None], "day": today, "sections": sections}
+    cache.set(key, snapshot, timeout=BRIEFING_TTL)
+    return _assemble_briefing(snapshot, date_from, date_to)
 
-    cliente = Cliente.objects.filter(id=cliente_id).first()
-    if not cliente:
-        return {}
 
+def _assemble_briefing(snapshot: dict, date_from: str, date_to: str) -> dict:
+    sections = snapshot["sections"]
     briefing: dict[str, Any] = {
-        "cliente": cliente.nome,
+        "cliente": sections["header"]["data"]["cliente"],
         "date_from": date_from,
         "date_to": date_to,
     }
+    for name, _, _ in _BRIEFING_SECTIONS[1:]:
+        briefing.update(sections[name]["data"])
+    return briefing
+
+
+def _briefing_header(cliente_id: int, date_from: str, date_to: str) -> Optional[dict]:
+    from accounts.models import Cliente
+
+    nome = Cliente.objects.filter(id=cliente_id).values_list("nome", flat=True).first()
+    if nome is None:
+        return None
+    return {"cliente": nome}
+
+
+def _briefing_campaigns(cliente_id: int, date_from: str, date_to: str) -> dict:
+    from campaigns.models import Campaign
 
-    # ── All campaigns for this client ─────────────────────────────
     campaigns = Campaign.objects.filter(cliente_id=cliente_id)
     campaign_list = []
-    for c in campaigns.select_related("cliente")[:20]:
+    for c in campaigns[:20]:
         campaign_list.append({
             "id": c.id,
             "name": c.name,
@@ -118,26 +169,21 @@ def build_deep_briefing(cliente_id: int, date_from: str = "", date_to: str = "")
             "end": str(c.end_date.date()) if c.end_date else "",
             "budget": float(c.total_budget or 0),
         })
-    briefing["campaigns"] = campaign_list
-    briefing["total_campaigns"] = campaigns.count()
-    briefing["active_campaigns"] = campaigns.filter(status="active").count()
+    return {
+        "campaigns": campaign_list,
+        "total_campaigns": campaigns.count(),
+        "active_campaigns": campaigns.filter(status="active").count(),
+    }
 
-    # ── Digital performance (PlacementDay) ────────────────────────
-    google_channels = ["google", "youtube", "display", "search"]
-    meta_channels = ["meta"]
-    all_digital = google_channels + meta_channels
 
-    lines = PlacementLine.objects.filter(
-        campaign__cliente_id=cliente_id,
-        media_channel__in=all_digital,
-    )
-    line_ids = list(lines.values_list("id", flat=True))
+def _briefing_digital(cliente_id: int, date_from: str, date_to: str) -> dict:
+    from django.db.models import Sum
+    from campaigns.models import Campaign
+    from web.services.reporting import reporting_days, reporting_lines
 
-    days_qs = PlacementDay.objects.filter(placement_line_id__in=line_ids)
-    if date_from:
-        days_qs = days_qs.filter(date__gte=date_from)
-    if date_to:
-        days_qs = days_qs.filter(date__lte=date_to)
+    briefing: dict[str, Any] = {}
+    lines = reporting_lines(cliente_id=cliente_id, channels=ALL_DIGITAL)
+    days_qs = reporting_days(cliente_id=cliente_id, channels=ALL_DIGITAL, date_from=date_from, date_to=date_to)
 
     totals = days_qs.aggregate(
         imp=Sum("impressions"), clk=Sum("clicks"), cost=Sum("cost"),
@@ -156,10 +202,9 @@ def build_deep_briefing(cliente_id: int, date_from: str = "", date_to: str = "")
     }
 
     # Per-platform breakdown
-    for label, channels in [("google", google_channels), ("meta", meta_channels)]:
-        ch_ids = list(lines.filter(media_channel__in=channels).values_list("id", flat=True))
-        if ch_ids:
-            ch = days_qs.filter(placement_line_id__in=ch_ids).aggregate(
+    for label, channels in [("google", GOOGLE_CHANNELS), ("meta", META_CHANNELS)]:
+        if lines.filter(media_channel__in=channels).exists():
+            ch = days_qs.filter(placement_line__media_channel__in=channels).aggregate(
                 imp=Sum("impressions"), clk=Sum("clicks"), cost=Sum("cost"),
             )
             ch_imp = ch["imp"] or 0
@@ -187,15 +232,18 @@ def build_deep_briefing(cliente_id: int, date_from: str = "", date_to: str = "")
 
     # ── Per-campaign performance ──────────────────────────────────
     camp_perf = []
-    for camp in campaigns[:15]:
-        camp_lines = list(PlacementLine.objects.filter(
-            campaign=camp, media_channel__in=all_digital,
-        ).values_list("id", flat=True))
-        if not camp_lines:
+    top_campaigns = list(Campaign.objects.filter(cliente_id=cliente_id)[:15])
+    camp_totals = {
+        row["placement_line__campaign_id"]: row
+        for row in days_qs.filter(placement_line__campaign_id__in=[c.id for c in top_campaigns])
+        .values("placement_line__campaign_id")
+        .annotate(imp=Sum("impressions"), clk=Sum("clicks"), cost=Sum("cost"))
+        .order_by()
+    }
+    for camp in top_campaigns:
+        cp = camp_totals.get(camp.id)
+        if cp is None:
             continue
-        cp = days_qs.filter(placement_line_id__in=camp_lines).aggregate(
-            imp=Sum("impressions"), clk=Sum("clicks"), cost=Sum("cost"),
-        )
         cp_imp = cp["imp"] or 0
         cp_clk = cp["clk"] or 0
         cp_cost = float(cp["cost"] or 0)
@@ -211,27 +259,35 @@ def build_deep_briefing(cliente_id: int, date_from: str = "", date_to: str = "")
         })
     if camp_perf:
         briefing["campaign_performance"] = camp_perf
+    return briefing
+
+
+def _briefing_offline(cliente_id: int, date_from: str, date_to: str) -> dict:
+    """Offline media (PlacementLine without digital channels)."""
+    from django.db.models import Count, Sum
+    from campaigns.models import PlacementLine
 
-    # ── Offline media (PlacementLine without digital channels) ────
     offline_lines = PlacementLine.objects.filter(
         campaign__cliente_id=cliente_id,
-    ).exclude(media_channel__in=all_digital)
+    ).exclude(media_channel__in=ALL_DIGITAL)
 
     offline_agg = offline_lines.aggregate(
         total_lines=Count("id"),
         total_insertions=Sum("days__insertions"),
     )
-    if offline_agg["total_lines"]:
-        # Group by channel
-        by_channel = list(
-            offline_lines.values("media_channel")
-            .annotate(
-                lines=Count("id"),
-                insertions=Sum("days__insertions"),
-            )
-            .order_by("-insertions")[:10]
+    if not offline_agg["total_lines"]:
+        return {}
+    # Group by channel
+    by_channel = list(
+        offline_lines.values("media_channel")
+        .annotate(
+            lines=Count("id"),
+            insertions=Sum("days__insertions"),
         )
-        briefing["offline_media"] = {
+        .order_by("-insertions")[:10]
+    )
+    return {
+        "offline_media": {
             "total_lines": offline_agg["total_lines"],
             "total_insertions": offline_agg["total_insertions"] or 0,
             "by_channel": [
@@ -239,10 +295,14 @@ def build_deep_briefing(cliente_id: int, date_from: str = "", date_to: str = "")
                 for c in by_channel
             ],
         }
+    }
+
+
+def _briefing_financial(cliente_id: int, date_from: str, date_to: str) -> dict:
+    from campaigns.models import Campaign
 
-    # ── Financial data ────────────────────────────────────────────
     financial_data = []
-    for camp in campaigns[:10]:
+    for camp in Campaign.objects.filter(cliente_id=cliente_id).select_related("financial_summary")[:10]:
         try:
             fs = camp.financial_summary
             financial_data.append({
@@ -254,31 +314,44 @@ def build_deep_briefing(cliente_id: int, date_from: str = "", date_to: str = "")
             })
         except Exception:
             pass
-    if financial_data:
-        briefing["financial"] = financial_data
+    return {"financial": financial_data} if financial_data else {}
+
+
+def _briefing_regions(cliente_id: int, date_from: str, date_to: str) -> dict:
+    from django.db.models import Sum
+    from campaigns.models import RegionInvestment
 
-    # ── Region investments ────────────────────────────────────────
     regions = list(
         RegionInvestment.objects.filter(campaign__cliente_id=cliente_id)
         .values("region_name")
         .annotate(total_pct=Sum("percentage"), total_valor=Sum("valor"))
         .order_by("-total_pct")[:10]
     )
-    if regions:
-        briefing["regions"] = [
+    if not regions:
+        return {}
+    return {
+        "regions": [
             {"name": r["region_name"], "pct": float(r["total_pct"] or 0), "valor": float(r["total_valor"] or 0)}
             for r in regions
         ]
+    }
 
-    # ── PI Control (upcoming due dates) ───────────────────────────
-    from datetime import date as date_cls
-    today = date_cls.today()
-    pis_pending = PIControl.objects.filter(
-        campaign__cliente_id=cliente_id,
-        status="pendente",
-    ).order_by("vencimento")[:10]
-    if pis_pending.exists():
-        briefing["pis_pending"] = [
+
+def _briefing_pis(cliente_id: int, date_from: str, date_to: str) -> dict:
+    """PI Control (upcoming due dates)."""
+    from campaigns.models import PIControl
+
+    today = date.today()
+    pis_pending = list(
+        PIControl.objects.filter(
+            campaign__cliente_id=cliente_id,
+            status="pendente",
+        ).order_by("vencimento")[:10]
+    )
+    if not pis_pending:
+        return {}
+    return {
+        "pis_pending": [
             {
                 "pi": pi.pi_numero, "rede": pi.rede, "praca": pi.praca,
                 "vencimento": str(pi.vencimento) if pi.vencimento else "",
@@ -287,8 +360,19 @@ def build_deep_briefing(cliente_id: int, date_from: str = "", date_to: str = "")
             }
             for pi in pis_pending
         ]
+    }
 
-    return briefing
+
+# (section, data sources it reads, builder) — in briefing order; "header" first.
+_BRIEFING_SECTIONS = [
+    ("header", (CAMPAIGNS,), _briefing_header),
+    ("campaigns", (CAMPAIGNS,), _briefing_campaigns),
+    ("digital", (CAMPAIGNS, PLACEMENTS), _briefing_digital),
+    ("offline", (PLACEMENTS,), _briefing_offline),
+    ("financial", (CAMPAIGNS, FINANCIAL), _briefing_financial),
+    ("regions", (REGIONS,), _briefing_regions),
+    ("pis", (PIS,), _briefing_pis),
+]
 
 
 def _safe_json_parse(text: str) -> Optional[dict]:
@@ -376,7 +460,7 @@ Regras importantes:
 - Responda APENAS com JSON válido, sem nenhum texto adicional"""
 
 
-def generate_analytics_insights(context: dict, cliente_id: int = 0) -> Optional[dict]:
+def generate_analytics_insights(context: dict, cliente_id: int = 0, *, allow_stale: bool = True) -> Optional[dict]:
     """
     Generate AI-powered insights from pre-computed analytics data.
 
@@ -384,25 +468,27 @@ def generate_analytics_insights(context: dict, cliente_id: int = 0) -> Optional[
         context: dict with total_imp, total_clk, global_ctr, cpc, cpm,
                  total_cost, benchmarks, efficiency_matrix, historical, etc.
         cliente_id: for cache key
+        allow_stale: when the data changed since the cached result, return
+                 that result and refresh in the background (default) instead
+                 of waiting for a new LLM call
 
     Returns:
         dict with insights, alerts, recommendations, executive_summary
         or None on failure
+
+    Cached per cliente + period with the fingerprint of the prompt data
+    (``web.services.ai_cache``): a sync changes the fingerprint and triggers
+    one coalesced refresh.
     """
+    from web.services.ai_cache import get_or_compute
+
     if not ANTHROPIC_API_KEY:
         logger.info("ANTHROPIC_API_KEY not set, skipping AI insights")
         return None
 
-    date_from = context.get("date_from", "") or "all"
-    date_to = context.get("date_to", "") or "all"
-    # Simple cache key: cliente + dates only (no data fingerprint)
-    # This ensures cache persists for 24h even if page is reloaded
-    cache_key = f"ai:insights:{cliente_id}:{date_from}:{date_to}"
-
-    cached = cache.get(cache_key)
-    if cached:
-        logger.debug("AI insights cache hit: %s", cache_key)
-        return cached
+    date_from = context.get("date_from", "")
+    date_to = context.get("date_to", "")
+    cache_key = cliente_key(cliente_id, "ai", "insights", date_from or "all", date_to or "all")
 
     # Build comprehensive briefing from DB when cliente_id is available
     if cliente_id:
@@ -455,22 +541,25 @@ def generate_analytics_insights(context: dict, cliente_id: int = 0) -> Optional[
         bench_cpc=benchmarks.get("cpc", 1.50),
         bench_cpm=benchmarks.get("cpm", 15.00),
     )
+    fingerprint = hashlib.md5(prompt.encode()).hexdigest()[:16]
 
-    try:
-        client = _get_client()
-        message = client.messages.create(
-            model=MODEL,
-            max_tokens=2500,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        result = _safe_json_parse(message.content[0].text)
-        if result:
-            cache.set(cache_key, result, timeout=CACHE_TTL)
-            logger.info("AI insights generated and cached for cliente=%s", cliente_id)
-        return result
-    except Exception:
-        logger.exception("Failed to generate AI insights")
-        return None
+    def call_llm() -> Optional[dict]:
+        try:
+            client = _get_client()
+            message = client.messages.create(
+                model=MODEL,
+                max_tokens=2500,
+                messages=[{"role": "user", "content": prompt}],
+            )
+            result = _safe_json_parse(message.content[0].text)
+            if result:
+                logger.info("AI insights generated for cliente=%s", cliente_id)
+            return result or None
+        except Exception:
+            logger.exception("Failed to generate AI insights")
+            return None
+
+    return get_or_compute(cache_key, fingerprint, call_llm, timeout=CACHE_TTL, allow_stale=allow_stale)
 
 
 # ── Persist Insights to DB ────────────────────────────────────────────────────
@@ -0,0 +1,178 @@
+"""
+Fingerprint-aware cache for slow AI results (stale-while-revalidate).
+
+Each entry stores the result together with the fingerprint of the data it
+was generated from. ``get_or_compute``:
+
+  - same fingerprint: returns the cached result;
+  - different fingerprint (data changed, e.g. after a sync): returns the
+    stale result right away and refreshes it on a small background pool;
+  - no entry: computes in the request.
+
+Computations are coalesced per key and fingerprint: inside the process
+through a shared ``Future``, across processes through a lock in the shared
+cache (``cache.add``). Only one LLM call per key and data version is in
+flight; concurrent callers on a cold key wait (up to ``AI_CACHE_WAIT``
+seconds) for the leader's result instead of making their own call, but a
+caller never joins a computation for older data.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_CONCURRENCY = 2
+DEFAULT_LOCK_TIMEOUT = 180  # seconds; upper bound of one computation (LLM call)
+DEFAULT_WAIT = 60
+POLL_INTERVAL = 0.5
+
+_refresh_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_inflight: dict[tuple[str, str], Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _shared():
+    return caches["shared" if "shared" in settings.CACHES else "default"]
+
+
+def _lock_key(key: str, fingerprint: str) -> str:
+    return f"{key}:computing:{fingerprint}"
+
+
+def _entry(key: str) -> Optional[dict]:
+    entry = cache.get(key)
+    # Entradas no formato antigo (resultado sem fingerprint) contam como ausentes.
+    if isinstance(entry, dict) and "fingerprint" in entry and "value" in entry:
+        return entry
+    return None
+
+
+def _get_refresh_pool() -> ThreadPoolExecutor:
+    global _refresh_pool
+    with _pool_lock:
+        if _refresh_pool is None:
+            workers = int(getattr(settings, "AI_REFRESH_CONCURRENCY", DEFAULT_REFRESH_CONCURRENCY) or 1)
+            _refresh_pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ai-refresh")
+        return _refresh_pool
+
+
+def _run(key: str, fingerprint: str, compute: Callable[[], Any], timeout: int, requested_at: str) -> Any:
+    """Compute and store ``key`` unless another process holds its lock.
+
+    The result is not stored if an entry for other data, requested after
+    this one (``requested_at``), was stored in the meantime. Returns the
+    value, or ``None`` when the computation failed or another process is
+    already computing.
+    """
+    lock_timeout = int(getattr(settings, "AI_CACHE_LOCK_TIMEOUT", DEFAULT_LOCK_TIMEOUT))
+    if not _shared().add(_lock_key(key, fingerprint), fingerprint, timeout=lock_timeout):
+        return None
+    try:
+        value = compute()
+        current = _entry(key)
+        if current and current["fingerprint"] != fingerprint and current.get("requested_at", "") > requested_at:
+            # Um cálculo para dados mais novos terminou antes deste: não sobrescreve.
+            return value
+        if value is not None:
+            cache.set(
+                key,
+                {
+                    "fingerprint": fingerprint,
+                    "value": value,
+                    "requested_at": requested_at,
+                    "computed_at": timezone.now().isoformat(),
+                },
+                timeout=timeout,
+            )
+        return value
+    finally:
+        _shared().delete(_lock_key(key, fingerprint))
+
+
+def _start(key: str, fingerprint: str, compute: Callable[[], Any], timeout: int, *, background: bool) -> Future:
+    """Future of the in-process computation of ``key`` for ``fingerprint`` (joining one already running)."""
+    with _inflight_lock:
+        future = _inflight.get((key, fingerprint))
+        if future is not None:
+            return future
+        future = _inflight[(key, fingerprint)] = Future()
+    requested_at = timezone.now().isoformat()
+
+    def task():
+        try:
+            future.set_result(_run(key, fingerprint, compute, timeout, requested_at))
+        except Exception as exc:
+            logger.exception("AI cache computation failed for %s", key)
+            future.set_exception(exc)
+        finally:
+            with _inflight_lock:
+                _inflight.pop((key, fingerprint), None)
+            if background:
+                connections.close_all()
+
+    if background:
+        _get_refresh_pool().submit(task)
+    else:
+        task()
+    return future
+
+
+def _wait_for_other_process(key: str, fingerprint: str, wait: float) -> Any:
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        entry = _entry(key)
+        if entry and entry["fingerprint"] == fingerprint:
+            return entry["value"]
+        if not _shared().get(_lock_key(key, fingerprint)):
+            return None
+        time.sleep(POLL_INTERVAL)
+    return None
+
+
+def get_or_compute(
+    key: str,
+    fingerprint: str,
+    compute: Callable[[], Any],
+    *,
+    timeout: int,
+    allow_stale: bool = True,
+) -> Any:
+    """Cached value of ``compute()`` for ``fingerprint`` (see module docstring).
+
+    ``compute`` returning ``None`` means failure: nothing is stored. With
+    ``allow_stale=False`` a changed fingerprint is recomputed in the
+    request instead of served stale. Returns ``None`` if there is no value
+    and none could be computed within ``AI_CACHE_WAIT`` seconds.
+    """
+    entry = _entry(key)
+    if entry and entry["fingerprint"] == fingerprint:
+        return entry["value"]
+    if entry and allow_stale:
+        _start(key, fingerprint, compute, timeout, background=True)
+        return entry["value"]
+
+    wait = float(getattr(settings, "AI_CACHE_WAIT", DEFAULT_WAIT))
+    future = _start(key, fingerprint, compute, timeout, background=False)
+    try:
+        value = future.result(timeout=wait)
+    except FutureTimeout:
+        return entry["value"] if entry else None
+    except Exception:
+        value = None
+    if value is None:
+        # Outro processo pode estar gerando a mesma chave.
+        value = _wait_for_other_process(key, fingerprint, wait)
+    if value is None and entry:
+        return entry["value"]
+    return value
@@ -0,0 +1,103 @@
+"""
+Statistics for the audit dashboard (Logs & Auditoria) and its JSON endpoint.
+
+Everything the page charts comes from a fixed number of queries, whatever
+the date range:
+
+  - one GROUP BY (day, event_type) over ``AuditDailyCount`` answers the
+    headline totals, the per-type pie and the per-day bars;
+  - one hourly bucket over the raw login rows, with the success/failure
+    split as conditional aggregates;
+  - one GROUP BY user for the most active users.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, time
+from typing import Any
+
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from accounts.models import AuditDailyCount, AuditLog
+
+# Cards do topo da página: chave do contexto -> event_type
+TOTAL_CARDS = {
+    "logins": AuditLog.EventType.LOGIN,
+    "login_failed": AuditLog.EventType.LOGIN_FAILED,
+    "pieces_deleted": AuditLog.EventType.PIECE_DELETED,
+    "campaigns_created": AuditLog.EventType.CAMPAIGN_CREATED,
+    "assets_uploaded": AuditLog.EventType.ASSET_UPLOADED,
+}
+
+
+def audit_logs_between(date_from: date, date_to: date):
+    """Raw AuditLog rows from ``date_from`` 00:00 to ``date_to`` 23:59:59 (local time)."""
+    return AuditLog.objects.filter(
+        created_at__gte=timezone.make_aware(datetime.combine(date_from, time.min)),
+        created_at__lte=timezone.make_aware(datetime.combine(date_to, time.max)),
+    )
+
+
+def audit_stats(date_from: date, date_to: date, *, top_users: int = 10) -> dict[str, Any]:
+    """Totals, chart series and top users of the audit log in ``[date_from, date_to]``.
+
+    Returns plain JSON-serializable data (used as-is by ``api_audit_stats``).
+    """
+    event_labels = dict(AuditLog.EventType.choices)
+
+    by_type: dict[str, int] = defaultdict(int)
+    by_day: dict[date, int] = defaultdict(int)
+    for row in (
+        AuditDailyCount.objects.filter(day__gte=date_from, day__lte=date_to, count__gt=0)
+        .values("day", "event_type")
+        .annotate(total=Sum("count"))
+        .order_by()
+    ):
+        by_type[row["event_type"]] += row["total"]
+        by_day[row["day"]] += row["total"]
+
+    totals = {"logs": sum(by_type.values())}
+    totals.update({key: by_type.get(event_type, 0) for key, event_type in TOTAL_CARDS.items()})
+
+    hourly = (
+        audit_logs_between(date_from, date_to)
+        .filter(event_type__in=[AuditLog.EventType.LOGIN, AuditLog.EventType.LOGIN_FAILED])
+        .annotate(hora=TruncHour("created_at"))
+        .values("hora")
+        .annotate(
+            success=Count("id", filter=Q(event_type=AuditLog.EventType.LOGIN)),
+            failed=Count("id", filter=Q(event_type=AuditLog.EventType.LOGIN_FAILED)),
+        )
+        .order_by("hora")
+    )
+    hours = list(hourly)
+
+    users = list(
+        audit_logs_between(date_from, date_to)
+        .filter(user__isnull=False)
+        .values("user__username", "user__first_name", "user__last_name")
+        .annotate(count=Count("id"))
+        .order_by("-count")[:top_users]
+    )
+
+    return {
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "totals": totals,
+        "events_by_type": [
+            {"event_type": event_type, "label": event_labels.get(event_type, event_type), "count": count}
+            for event_type, count in sorted(by_type.items(), key=lambda kv: (-kv[1], kv[0]))
+        ],
+        "logins_by_hour": {
+            "labels": [h["hora"].strftime("%d/%m %H:00") for h in hours],
+            "success": [h["success"] for h in hours],
+            "failed": [h["failed"] for h in hours],
+        },
+        "events_by_day": {
+            "labels": [day.strftime("%d/%m") for day in sorted(by_day)],
+            "counts": [by_day[day] for day in sorted(by_day)],
+        },
+        "top_users": users,
+    }
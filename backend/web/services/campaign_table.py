@@ -0,0 +1,87 @@
+"""
+Per-line campaign tables for DashON, Veiculação, Consolidated ON and Analytics.
+
+Aggregates impressions/clicks/cost for every PlacementLine in one grouped
+query over PlacementDay (instead of one ``aggregate()`` per line) and returns
+the row dicts the templates already consume.
+"""
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any
+
+from django.db.models import QuerySet, Sum
+
+
+def line_metrics(imp: int, clk: int, cst: float) -> dict[str, Any]:
+    """Derived KPIs for one row, rounded the way the templates display them."""
+    return {
+        "impressions": imp,
+        "clicks": clk,
+        "ctr": round((clk / imp * 100), 2) if imp > 0 else 0,
+        "cost": round(cst, 2),
+        "cpc": round((cst / clk), 2) if clk > 0 else 0,
+        "cpm": round((cst / imp * 1000), 2) if imp > 0 else 0,
+        "roi": round((clk / cst), 2) if cst > 0 else 0,
+    }
+
+
+def build_campaign_table(
+    lines_qs: QuerySet,
+    days_qs: QuerySet,
+    *,
+    skip_empty: bool = False,
+) -> list[dict[str, Any]]:
+    """Return one row per line in ``lines_qs`` with metrics summed over ``days_qs``.
+
+    Always two queries: one GROUP BY placement_line over ``days_qs`` and one
+    fetch of the lines (with campaign + cliente joined). ``skip_empty`` drops
+    lines with no impressions, clicks or cost in the period.
+    """
+    totals = {
+        row["placement_line_id"]: row
+        for row in days_qs.values("placement_line_id")
+        .annotate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
+        .order_by()
+    }
+
+    rows: list[dict[str, Any]] = []
+    for line in lines_qs.select_related("campaign", "campaign__cliente"):
+        agg = totals.get(line.id) or {}
+        imp = agg.get("imp") or 0
+        clk = agg.get("clk") or 0
+        cst = float(agg.get("cst") or 0)
+        if skip_empty and imp == 0 and clk == 0 and cst == 0:
+            continue
+        rows.append({
+            "id": line.id,
+            "name": line.channel or line.property_text or f"Campaign #{line.external_ref}",
+            "client": line.campaign.cliente.nome if line.campaign else "",
+            "media_channel": line.media_channel,
+            "channel": line.get_media_channel_display(),
+            "external_ref": line.external_ref,
+            "campaign_id": line.campaign_id,
+            **line_metrics(imp, clk, cst),
+        })
+    return rows
+
+
+def daily_by_line(days_qs: QuerySet, line_ids: list[int]) -> dict[str, dict[str, list]]:
+    """Daily impressions/clicks/cost series for several lines in one query."""
+    if not line_ids:
+        return {}
+    series: dict[str, dict[str, list]] = defaultdict(
+        lambda: {"labels": [], "impressions": [], "clicks": [], "cost": []}
+    )
+    for row in (
+        days_qs.filter(placement_line_id__in=line_ids)
+        .values("placement_line_id", "date")
+        .annotate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
+        .order_by("placement_line_id", "date")
+    ):
+        s = series[str(row["placement_line_id"])]
+        s["labels"].append(str(row["date"]))
+        s["impressions"].append(row["imp"] or 0)
+        s["clicks"].append(row["clk"] or 0)
+        s["cost"].append(float(row["cst"] or 0))
+    return dict(series)
@@ -0,0 +1,110 @@
+"""
+Date-series engine for the dashboard charts.
+
+Fetches daily totals once (one GROUP BY date over PlacementDayRollup) and
+answers every window the dashboard needs — current period, comparison
+period, 12-month evolution, 4-week heatmap and overall totals — by slicing
+and calendar-filling that result in Python.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable
+
+from django.db.models import QuerySet, Sum
+
+METRICS = ("insertions", "impressions", "clicks", "cost")
+
+
+def month_shift(base: date, months: int) -> date:
+    """First day of the month ``months`` away from ``base``."""
+    y = base.year + (base.month - 1 + months) // 12
+    m = (base.month - 1 + months) % 12 + 1
+    return date(y, m, 1)
+
+
+def date_range(start: date, end: date) -> list[date]:
+    """Every calendar day from ``start`` to ``end`` inclusive."""
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+class DailySeries:
+    """Daily metric totals keyed by date, loaded with a single query."""
+
+    def __init__(self, by_date: dict[date, dict[str, int | Decimal]]):
+        self.by_date = by_date
+
+    @classmethod
+    def from_queryset(
+        cls,
+        qs: QuerySet,
+        *,
+        metrics: Iterable[str] = METRICS,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> "DailySeries":
+        """Group ``qs`` (rows with a ``date`` field) by date in one query."""
+        if date_from:
+            qs = qs.filter(date__gte=date_from)
+        if date_to:
+            qs = qs.filter(date__lte=date_to)
+        metrics = tuple(metrics)
+        rows = qs.values("date").annotate(**{m: Sum(m) for m in metrics}).order_by()
+        return cls({r["date"]: {m: r[m] or 0 for m in metrics} for r in rows})
+
+    def value(self, day: date, metric: str = "insertions") -> int | Decimal:
+        row = self.by_date.get(day)
+        return row.get(metric, 0) if row else 0
+
+    def window(self, start: date, end: date, metric: str = "insertions") -> list[int | Decimal]:
+        """Calendar-filled values from ``start`` to ``end`` (missing days = 0)."""
+        return [self.value(d, metric) for d in date_range(start, end)]
+
+    def total(
+        self,
+        metric: str = "insertions",
+        *,
+        start: date | None = None,
+        end: date | None = None,
+    ) -> int | Decimal:
+        return sum(
+            (
+                row.get(metric, 0)
+                for d, row in self.by_date.items()
+                if (start is None or d >= start) and (end is None or d <= end)
+            ),
+            0,
+        )
+
+    def monthly(
+        self,
+        first_month: date,
+        months: int,
+        metric: str = "insertions",
+        *,
+        end: date | None = None,
+    ) -> list[int | Decimal]:
+        """Monthly totals for ``months`` months starting at ``first_month`` (days after ``end`` ignored)."""
+        buckets: dict[tuple[int, int], int | Decimal] = {}
+        for d, row in self.by_date.items():
+            if end is not None and d > end:
+                continue
+            key = (d.year, d.month)
+            buckets[key] = buckets.get(key, 0) + row.get(metric, 0)
+        out = []
+        for i in range(months):
+            m = month_shift(first_month, i)
+            out.append(buckets.get((m.year, m.month), 0))
+        return out
+
+    def weeks(self, first_monday: date, count: int, metric: str = "insertions") -> list[list[dict]]:
+        """Heatmap grid: ``count`` weeks of 7 days starting at ``first_monday``."""
+        grid = []
+        for w in range(count):
+            week_start = first_monday + timedelta(days=7 * w)
+            grid.append([
+                {"date": d.strftime("%d/%m"), "value": self.value(d, metric)}
+                for d in date_range(week_start, week_start + timedelta(days=6))
+            ])
+        return grid
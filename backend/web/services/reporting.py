@@ -0,0 +1,48 @@
+"""
+Line/day querysets for the reporting views (DashON, Veiculação, Consolidated
+ON, Analytics, the AI endpoints and the AI briefing).
+
+The views used to materialize ``line_ids = list(lines_qs.values_list("id"))``
+and filter ``PlacementDay`` with ``placement_line_id__in=line_ids`` — one
+bound parameter per line, several times per request, which for big tenants
+means huge statements and SQLite's "too many SQL variables". These helpers
+express the same slices as joins on ``placement_line__campaign__cliente_id``
+and ``placement_line__media_channel`` instead.
+"""
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db.models import QuerySet
+
+from campaigns.models import PlacementDay, PlacementLine
+
+
+def reporting_lines(*, cliente_id: int | None = None, channels: Iterable[str] | None = None) -> QuerySet:
+    """PlacementLine of the cliente (all clientes when None) in ``channels``."""
+    qs = PlacementLine.objects.all()
+    if channels is not None:
+        qs = qs.filter(media_channel__in=list(channels))
+    if cliente_id:
+        qs = qs.filter(campaign__cliente_id=cliente_id)
+    return qs
+
+
+def reporting_days(
+    *,
+    cliente_id: int | None = None,
+    channels: Iterable[str] | None = None,
+    date_from=None,
+    date_to=None,
+) -> QuerySet:
+    """PlacementDay of the lines ``reporting_lines`` would return, within the dates."""
+    qs = PlacementDay.objects.all()
+    if channels is not None:
+        qs = qs.filter(placement_line__media_channel__in=list(channels))
+    if cliente_id:
+        qs = qs.filter(placement_line__campaign__cliente_id=cliente_id)
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    return qs
@@ -1,11 +1,17 @@
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Sum
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.test.utils import override_settings
 from django.urls import reverse
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 import tempfile
 
-from campaigns.models import Campaign, CreativeAsset, Piece, PlacementCreative, PlacementDay, PlacementLine
+from campaigns.models import Campaign, CreativeAsset, Piece, PlacementCreative, PlacementDay, PlacementDayRollup, PlacementLine
+from campaigns.rollups import refresh_placement_rollups
 
 
 class LoginFlowTests(TestCase):
@@ -324,3 +330,1693 @@ class CampaignUploadFlowTests(TestCase):
         self.client.force_login(self.user_cliente)
         resp2 = self.client.get(reverse("web:api_campaign_detail", args=[self.campaign.id]))
         self.assertEqual(resp2.status_code, 200)
+
+
+class PlacementRollupTests(TestCase):
+    def setUp(self) -> None:
+        User = get_user_model()
+        self.cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente R", ativo=True)
+        self.admin = User.objects.create_user(
+            username="adm",
+            email="adm@email.com",
+            password="senha1234",
+            role=getattr(User, "Role").ADMIN,
+        )
+        self.campaign = Campaign.objects.create(cliente=self.cliente, name="Google Ads - R", status=Campaign.Status.ACTIVE)
+        self.lines = [
+            PlacementLine.objects.create(
+                campaign=self.campaign,
+                media_channel=PlacementLine.MediaChannel.SEARCH,
+                market="SP",
+                channel=f"Campanha {i}",
+                external_ref=str(i),
+            )
+            for i in range(3)
+        ]
+        for line in self.lines:
+            for day in (1, 2):
+                PlacementDay.objects.create(
+                    placement_line=line,
+                    date=date(2026, 3, day),
+                    impressions=100,
+                    clicks=10,
+                    cost=Decimal("5.50"),
+                )
+        refresh_placement_rollups([self.campaign.id])
+
+    def test_refresh_groups_lines_per_channel_market_and_date(self):
+        rows = PlacementDayRollup.objects.filter(campaign=self.campaign).order_by("date")
+        self.assertEqual(rows.count(), 2)
+        self.assertEqual(rows[0].cliente_id, self.cliente.id)
+        self.assertEqual(rows[0].impressions, 300)
+        self.assertEqual(rows[0].clicks, 30)
+        self.assertEqual(rows[0].cost, Decimal("16.50"))
+
+    def test_windowed_refresh_only_rewrites_requested_dates(self):
+        PlacementDay.objects.filter(date=date(2026, 3, 2)).update(impressions=1)
+        PlacementDay.objects.filter(date=date(2026, 3, 1)).update(impressions=7)
+        refresh_placement_rollups([self.campaign.id], date_from="2026-03-02", date_to="2026-03-02")
+        by_date = dict(PlacementDayRollup.objects.values_list("date", "impressions"))
+        self.assertEqual(by_date[date(2026, 3, 1)], 300)
+        self.assertEqual(by_date[date(2026, 3, 2)], 3)
+
+    def test_veiculacao_totals_come_from_rollup(self):
+        self.client.force_login(self.admin)
+        session = self.client.session
+        session["selected_cliente_id"] = self.cliente.id
+        session.save()
+        resp = self.client.get(reverse("web:veiculacao_google"))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["total_impressions"], 600)
+        self.assertEqual(resp.context["total_clicks"], 60)
+
+    def _rollup(self):
+        return set(PlacementDayRollup.objects.values_list("cliente_id", "market", "date", "impressions"))
+
+    def test_row_level_day_edits_refresh_the_rollup(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            day = PlacementDay.objects.get(placement_line=self.lines[0], date=date(2026, 3, 1))
+            day.impressions = 400
+            day.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = PlacementDay.objects.get(placement_line=self.lines[1], date=date(2026, 3, 2))
+            moved.date = date(2026, 3, 5)
+            moved.save()
+        self.assertEqual(
+            self._rollup(),
+            {
+                (self.cliente.id, "SP", date(2026, 3, 1), 600),
+                (self.cliente.id, "SP", date(2026, 3, 2), 200),
+                (self.cliente.id, "SP", date(2026, 3, 5), 100),
+            },
+        )
+
+    def test_admin_day_delete_refreshes_the_rollup(self):
+        from django.contrib.admin.sites import site
+        from django.test import RequestFactory
+
+        model_admin = site._registry[PlacementDay]
+        request = RequestFactory().post("/")
+        with self.captureOnCommitCallbacks(execute=True):
+            model_admin.delete_queryset(request, PlacementDay.objects.filter(date=date(2026, 3, 2)))
+        with self.captureOnCommitCallbacks(execute=True):
+            model_admin.delete_model(request, PlacementDay.objects.filter(date=date(2026, 3, 1)).first())
+        self.assertEqual(self._rollup(), {(self.cliente.id, "SP", date(2026, 3, 1), 200)})
+
+    def test_line_edits_and_deletes_refresh_the_rollup(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            line = PlacementLine.objects.get(id=self.lines[0].id)
+            line.market = "RJ"
+            line.save()
+        self.assertEqual(
+            self._rollup(),
+            {
+                (self.cliente.id, "SP", date(2026, 3, 1), 200),
+                (self.cliente.id, "SP", date(2026, 3, 2), 200),
+                (self.cliente.id, "RJ", date(2026, 3, 1), 100),
+                (self.cliente.id, "RJ", date(2026, 3, 2), 100),
+            },
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            PlacementLine.objects.filter(market="SP").delete()
+        self.assertEqual(
+            self._rollup(),
+            {(self.cliente.id, "RJ", date(2026, 3, 1), 100), (self.cliente.id, "RJ", date(2026, 3, 2), 100)},
+        )
+
+    def test_moving_campaign_to_another_cliente_moves_its_rollup(self):
+        other = type(self.cliente).objects.create(nome="Cliente S", ativo=True)
+        campaign = Campaign.objects.get(id=self.campaign.id)
+        campaign.cliente = other
+        campaign.save()
+        self.assertEqual(set(PlacementDayRollup.objects.values_list("cliente_id", flat=True)), {other.id})
+
+
+class CampaignTableQueryCountTests(TestCase):
+    """Per-line tables must cost a constant number of queries, not one per line."""
+
+    def setUp(self) -> None:
+        User = get_user_model()
+        self.cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente Q", ativo=True)
+        self.admin = User.objects.create_user(
+            username="adm",
+            email="adm@email.com",
+            password="senha1234",
+            role=getattr(User, "Role").ADMIN,
+        )
+        self.campaign = Campaign.objects.create(cliente=self.cliente, name="Google Ads - Q", status=Campaign.Status.ACTIVE)
+        self.client.force_login(self.admin)
+        session = self.client.session
+        session["selected_cliente_id"] = self.cliente.id
+        session.save()
+
+    def _add_lines(self, count: int) -> None:
+        start = PlacementLine.objects.filter(campaign=self.campaign).count()
+        for i in range(start, start + count):
+            channel = PlacementLine.MediaChannel.META if i % 2 else PlacementLine.MediaChannel.SEARCH
+            line = PlacementLine.objects.create(
+                campaign=self.campaign,
+                media_channel=channel,
+                market="SP",
+                channel=f"Campanha {i}",
+                external_ref=str(i),
+            )
+            PlacementDay.objects.create(
+                placement_line=line,
+                date=date(2026, 3, 1),
+                impressions=1000 + i,
+                clicks=10,
+                cost=Decimal("12.00"),
+            )
+        refresh_placement_rollups([self.campaign.id])
+
+    def _count_queries(self, url: str) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        return len(ctx.captured_queries)
+
+    def test_views_query_count_does_not_grow_with_lines(self):
+        urls = [
+            reverse("web:veiculacao"),
+            reverse("web:dashon"),
+            reverse("web:consolidated_on"),
+            reverse("web:analytics"),
+        ]
+        self._add_lines(3)
+        small = {url: self._count_queries(url) for url in urls}
+        self._add_lines(30)
+        large = {url: self._count_queries(url) for url in urls}
+        self.assertEqual(small, large)
+
+    def test_dashon_table_keeps_template_shape(self):
+        self._add_lines(2)
+        resp = self.client.get(reverse("web:dashon"))
+        row = resp.context["campaigns_data"][0]
+        for key in ("id", "name", "client", "platform", "impressions", "clicks", "ctr", "cost", "cpc", "roi", "cpm"):
+            self.assertIn(key, row)
+        self.assertEqual(row["client"], "Cliente Q")
+
+
+class DashboardDateSeriesTests(TestCase):
+    def setUp(self) -> None:
+        from django.utils import timezone
+
+        User = get_user_model()
+        self.today = timezone.localdate()
+        self.cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente D", ativo=True)
+        self.user = User.objects.create_user(
+            username="cli",
+            email="cli@email.com",
+            password="senha1234",
+            role=getattr(User, "Role").CLIENTE,
+            cliente=self.cliente,
+        )
+        self.campaign = Campaign.objects.create(cliente=self.cliente, name="Plano D", status=Campaign.Status.ACTIVE)
+        line = PlacementLine.objects.create(campaign=self.campaign, media_channel=PlacementLine.MediaChannel.RADIO, market="Campinas")
+        for offset in range(40):
+            PlacementDay.objects.create(
+                placement_line=line,
+                date=self.today - timedelta(days=offset),
+                insertions=offset + 1,
+            )
+        refresh_placement_rollups([self.campaign.id])
+        self.client.force_login(self.user)
+
+    def test_dashboard_series_use_few_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(reverse("web:dashboard"))
+        self.assertEqual(resp.status_code, 200)
+        data_queries = [q for q in ctx.captured_queries if "campaigns_" in q["sql"]]
+        self.assertLess(len(data_queries), 10)
+
+    def test_dashboard_series_are_calendar_filled(self):
+        import json
+
+        resp = self.client.get(reverse("web:dashboard"))
+        days = json.loads(resp.context["days_insertions"])
+        previous = json.loads(resp.context["cmp_previous"])
+        self.assertEqual(len(days), 31)
+        self.assertEqual(days[-1], 1)  # hoje = offset 0
+        self.assertEqual(previous[-1], 32)  # dia anterior ao período = offset 31
+        self.assertEqual(previous[:22], [0] * 22)  # antes do primeiro dia importado
+        heatmap = json.loads(resp.context["heatmap_weeks"])
+        self.assertEqual(len(heatmap), 4)
+        self.assertTrue(all(len(week) == 7 for week in heatmap))
+        today_cell = heatmap[-1][self.today.weekday()]
+        self.assertEqual(today_cell["value"], 1)
+        self.assertEqual(resp.context["stats"]["insertions"], sum(range(1, 41)))
+        self.assertEqual(resp.context["stats"]["pracas_ativas"], 1)
+
+
+class BulkUpsertWriterTests(TestCase):
+    def setUp(self) -> None:
+        User = get_user_model()
+        cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente B", ativo=True)
+        campaign = Campaign.objects.create(cliente=cliente, name="Google Ads - B")
+        self.line = PlacementLine.objects.create(campaign=campaign, media_channel="search", market="B", external_ref="99")
+
+    def test_flush_inserts_and_updates_existing_days(self):
+        from integrations.services.bulk import BulkUpsertWriter, micros_to_decimal
+
+        PlacementDay.objects.create(placement_line=self.line, date=date(2026, 1, 1), insertions=4, impressions=1)
+        with BulkUpsertWriter(
+            PlacementDay,
+            unique_fields=["placement_line", "date"],
+            update_fields=["impressions", "clicks", "cost"],
+            batch_size=2,
+        ) as writer:
+            for day in (1, 2, 3):
+                writer.add(PlacementDay(
+                    placement_line_id=self.line.id,
+                    date=date(2026, 1, day),
+                    impressions=100 * day,
+                    clicks=day,
+                    cost=micros_to_decimal(1_234_567 * day),
+                ))
+        self.assertEqual(writer.written, 3)
+        days = {d.date.day: d for d in PlacementDay.objects.filter(placement_line=self.line)}
+        self.assertEqual(len(days), 3)
+        self.assertEqual(days[1].impressions, 100)
+        self.assertEqual(days[1].insertions, 4)  # campo fora de update_fields preservado
+        self.assertEqual(days[2].cost, Decimal("2.47"))
+
+    def test_duplicate_keys_in_one_chunk_are_collapsed(self):
+        from integrations.services.bulk import BulkUpsertWriter
+
+        writer = BulkUpsertWriter(
+            PlacementDay,
+            unique_fields=["placement_line", "date"],
+            update_fields=["impressions"],
+        )
+        writer.add(PlacementDay(placement_line_id=self.line.id, date=date(2026, 1, 1), impressions=1))
+        writer.add(PlacementDay(placement_line_id=self.line.id, date=date(2026, 1, 1), impressions=2))
+        self.assertEqual(writer.flush(), 1)
+        self.assertEqual(PlacementDay.objects.get(placement_line=self.line).impressions, 2)
+
+
+class MetaSyncStreamingTests(TestCase):
+    def setUp(self) -> None:
+        from integrations.models import MetaAdsAccount
+
+        User = get_user_model()
+        cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente M", ativo=True)
+        self.account = MetaAdsAccount.objects.create(cliente=cliente, ad_account_id="act_1", descriptive_name="M")
+
+    def _fake_pages(self, pages):
+        """Patch the first Graph call and urlopen so ``pages`` are served via paging.next."""
+        import io
+        import json
+        from unittest import mock
+
+        payloads = [
+            {"data": rows, "paging": {"next": f"https://graph.test/p{i + 1}"} if i + 1 < len(pages) else {}}
+            for i, rows in enumerate(pages)
+        ]
+        later = iter(payloads[1:])
+        return (
+            mock.patch("integrations.services.meta_ads._ensure_fresh_token", return_value="tok"),
+            mock.patch("integrations.services.meta_ads._graph_get", return_value=payloads[0]),
+            mock.patch(
+                "integrations.services.meta_ads.urllib.request.urlopen",
+                side_effect=lambda *a, **k: io.BytesIO(json.dumps(next(later)).encode()),
+            ),
+        )
+
+    def test_campaigns_and_metrics_stream_across_pages(self):
+        from integrations.services import meta_ads
+
+        p1, p2, p3 = self._fake_pages([
+            [{"id": "10", "name": "Camp A", "start_time": "2026-01-01T00:00:00+0000"}],
+            [{"id": "11", "name": "Camp B"}],
+        ])
+        with p1, p2, p3:
+            self.assertEqual(meta_ads.sync_campaigns(self.account), 2)
+        self.assertEqual(
+            set(PlacementLine.objects.values_list("external_ref", flat=True)), {"10", "11"}
+        )
+
+        # Re-sync updates in place instead of duplicating lines.
+        p1, p2, p3 = self._fake_pages([[{"id": "10", "name": "Camp A renamed"}]])
+        with p1, p2, p3:
+            meta_ads.sync_campaigns(self.account)
+        line = PlacementLine.objects.get(external_ref="10")
+        self.assertEqual(line.channel, "Camp A renamed")
+        self.assertIsNotNone(line.start_date)
+        self.assertEqual(PlacementLine.objects.count(), 2)
+
+        today = date.today().isoformat()
+        p1, p2, p3 = self._fake_pages([
+            [{"campaign_id": "10", "date_start": today, "impressions": "100", "clicks": "5", "spend": "1.50"}],
+            [
+                {"campaign_id": "11", "date_start": today, "impressions": "50", "clicks": "1", "spend": "0.3"},
+                {"campaign_id": "999", "date_start": today, "impressions": "1", "clicks": "0", "spend": "0"},
+            ],
+        ])
+        with p1, p2, p3:
+            self.assertEqual(meta_ads.sync_metrics(self.account, days=1), 2)
+        day = PlacementDay.objects.get(placement_line=line)
+        self.assertEqual((day.impressions, day.clicks, day.cost), (100, 5, Decimal("1.50")))
+        self.assertEqual(
+            PlacementDayRollup.objects.filter(campaign=line.campaign).aggregate(s=Sum("impressions"))["s"], 150
+        )
+
+
+class SyncWatermarkTests(TestCase):
+    def setUp(self) -> None:
+        from integrations.models import MetaAdsAccount
+
+        User = get_user_model()
+        cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente W", ativo=True)
+        self.account = MetaAdsAccount.objects.create(cliente=cliente, ad_account_id="act_2")
+
+    @override_settings(ADS_SYNC_LOOKBACK_DAYS=3)
+    def test_window_starts_at_watermark_minus_lookback(self):
+        from integrations.services.sync_window import metrics_window_days
+
+        self.assertEqual(metrics_window_days(self.account, 180), 180)  # nunca sincronizada
+        self.account.metrics_synced_through = date.today() - timedelta(days=1)
+        self.assertEqual(metrics_window_days(self.account, 180), 4)
+        self.assertEqual(metrics_window_days(self.account, 180, full=True), 180)
+
+    def test_full_sync_advances_watermark(self):
+        from unittest import mock
+        from integrations.services import meta_ads
+
+        with mock.patch.object(meta_ads, "sync_campaigns", return_value=0), \
+                mock.patch.object(meta_ads, "sync_metrics", return_value=0) as sync_metrics:
+            meta_ads.full_sync(self.account, days=180)
+            self.assertEqual(sync_metrics.call_args.kwargs["days"], 180)
+            self.account.refresh_from_db()
+            self.assertEqual(self.account.metrics_synced_through, date.today())
+
+            meta_ads.full_sync(self.account, days=180)
+            self.assertLess(sync_metrics.call_args.kwargs["days"], 180)
+
+
+class GoogleAdsManagerSyncTests(TestCase):
+    def setUp(self) -> None:
+        from integrations.models import GoogleAdsAccount
+
+        User = get_user_model()
+        cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente MCC", ativo=True)
+        self.account = GoogleAdsAccount.objects.create(cliente=cliente, customer_id="111-222-3333")
+
+    @override_settings(GOOGLE_ADS_SYNC_CONCURRENCY=2)
+    def test_children_sync_in_pool_with_one_log_each(self):
+        from unittest import mock
+        from integrations.models import SyncLog
+        from integrations.services import google_ads
+
+        def fake_campaigns(account, target_customer_id=None, login_customer_id=None):
+            if target_customer_id is None:
+                raise RuntimeError("REQUESTED_METRICS_FOR_MANAGER: manager")
+            if target_customer_id == "2":
+                raise RuntimeError("CUSTOMER_NOT_ENABLED")
+            return 5
+
+        children = [{"id": str(i), "name": f"Filha {i}"} for i in (1, 2, 3)]
+        with mock.patch.object(google_ads, "_ensure_fresh_token", return_value="tok"), \
+                mock.patch.object(google_ads, "list_client_accounts", return_value=children), \
+                mock.patch.object(google_ads, "sync_campaigns", side_effect=fake_campaigns), \
+                mock.patch.object(google_ads, "sync_metrics", return_value=7) as sync_metrics, \
+                mock.patch.object(google_ads, "sync_ad_groups"), \
+                mock.patch.object(google_ads, "sync_ads"), \
+                mock.patch.object(google_ads, "sync_creatives"):
+            log = google_ads.full_sync(self.account)
+
+        self.assertFalse(any(c.kwargs["refresh_rollups"] for c in sync_metrics.call_args_list))
+        child_logs = {c.customer_id: c for c in SyncLog.objects.filter(parent=log)}
+        self.assertEqual(set(child_logs), {"1", "2", "3"})
+        self.assertEqual(child_logs["1"].status, SyncLog.Status.SUCCESS)
+        self.assertEqual(child_logs["1"].metrics_synced, 7)
+        self.assertEqual(child_logs["2"].status, SyncLog.Status.ERROR)
+        self.assertIn("CUSTOMER_NOT_ENABLED", child_logs["2"].error_message)
+
+        # Falha parcial: o log pai registra o erro e os totais das filhas que concluíram.
+        self.assertEqual(log.status, SyncLog.Status.ERROR)
+        self.assertIn("1 de 3", log.error_message)
+        self.assertEqual(log.campaigns_synced, 10)
+        self.account.refresh_from_db()
+        self.assertIsNone(self.account.metrics_synced_through)
+
+
+@override_settings(MEDIA_ROOT=tempfile.gettempdir())
+class GoogleCreativeSyncTests(TestCase):
+    def setUp(self) -> None:
+        from integrations.models import GoogleAdsAccount
+        from integrations.services import google_ads
+
+        User = get_user_model()
+        cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente GC", ativo=True)
+        self.account = GoogleAdsAccount.objects.create(cliente=cliente, customer_id="444-555-6666")
+        self.campaign = google_ads._get_or_create_campaign(self.account)
+        PlacementLine.objects.create(
+            campaign=self.campaign,
+            media_channel=PlacementLine.MediaChannel.DISPLAY,
+            market="BR",
+            channel="Display",
+            external_ref="10",
+        )
+
+    def test_downloader_reuses_connections_and_limits_per_host(self):
+        import threading
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from integrations.services.downloads import fetch_all
+
+        state = {"active": 0, "peak": 0, "ports": set()}
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with lock:
+                    state["active"] += 1
+                    state["peak"] = max(state["peak"], state["active"])
+                    state["ports"].add(self.client_address[1])
+                time.sleep(0.02)
+                if self.path == "/missing":
+                    body, status = b"", 404
+                else:
+                    body, status = self.path.encode(), 200
+                self.send_response(status)
+                self.send_header("Content-Type", "image/png")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with lock:
+                    state["active"] -= 1
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            base = f"http://127.0.0.1:{server.server_port}"
+            urls = [f"{base}/img{i}.png" for i in range(12)] + [f"{base}/img0.png", f"{base}/missing"]
+            result = fetch_all(urls, max_workers=6, per_host=2)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(len(result), 13)
+        self.assertEqual(result[f"{base}/img3.png"].data, b"/img3.png")
+        self.assertFalse(result[f"{base}/missing"].ok)
+        self.assertIn("404", result[f"{base}/missing"].error)
+        self.assertLessEqual(state["peak"], 2)
+        self.assertLessEqual(len(state["ports"]), 6)
+
+    def test_sync_creatives_batches_lookup_and_stores_images_by_checksum(self):
+        from unittest import mock
+        from integrations.services import google_ads
+        from integrations.services.downloads import Download
+
+        def row(asset_id):
+            return {
+                "campaign": {"id": "10"},
+                "adGroupAd": {"ad": {"id": "99", "name": "Anúncio", "type": "RESPONSIVE_DISPLAY_AD"}},
+                "adGroupAdAssetView": {"fieldType": "MARKETING_IMAGE"},
+                "asset": {
+                    "id": asset_id,
+                    "type": "IMAGE",
+                    "name": f"Banner {asset_id}",
+                    "imageAsset": {"fullSize": {"url": f"https://cdn.example/{asset_id}.png"}},
+                },
+            }
+
+        def fake_fetch(urls, **kwargs):
+            return {u: Download(u, data=b"mesma imagem", content_type="image/png") for u in urls}
+
+        rows = [row("1"), row("2"), row("1")]
+        with mock.patch.object(google_ads, "_ensure_fresh_token", return_value="tok"), \
+                mock.patch.object(google_ads, "_ads_rest_search", return_value=rows), \
+                mock.patch.object(google_ads, "fetch_all", side_effect=fake_fetch) as fetch:
+            self.assertEqual(google_ads.sync_creatives(self.account), 2)
+            self.assertEqual(len(fetch.call_args.args[0]), 2)
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(google_ads.sync_creatives(self.account), 0)
+        self.assertEqual(fetch.call_args.args[0], [])
+        self.assertEqual(sum("google_asset_id" in q["sql"] for q in ctx.captured_queries), 1)
+
+        assets = list(CreativeAsset.objects.filter(piece__campaign=self.campaign))
+        self.assertEqual(len(assets), 2)
+        self.assertEqual({a.file.name for a in assets}, {assets[0].file.name})
+        self.assertIn(assets[0].checksum, assets[0].file.name)
+
+
+class SyncJobQueueTests(TestCase):
+    def setUp(self) -> None:
+        from integrations.models import MetaAdsAccount
+
+        User = get_user_model()
+        self.admin = User.objects.create_user(
+            username="adm_jobs",
+            email="adm_jobs@email.com",
+            password="senha1234",
+            role=getattr(User, "Role").ADMIN,
+        )
+        cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente J", ativo=True)
+        self.account = MetaAdsAccount.objects.create(cliente=cliente, ad_account_id="act_3")
+
+    def test_sync_button_enqueues_without_running_and_worker_completes(self):
+        from unittest import mock
+        from integrations.models import MetaSyncLog, SyncJob
+        from integrations.services import jobs, meta_ads
+
+        self.client.force_login(self.admin)
+        with mock.patch.object(meta_ads, "full_sync") as full_sync:
+            for _ in range(2):
+                resp = self.client.post(reverse("web:mads_sync", args=[self.account.id]))
+                self.assertEqual(resp.status_code, 302)
+            full_sync.assert_not_called()
+
+        job = SyncJob.objects.get()  # segundo clique reaproveita o job ativo
+        self.assertEqual(job.status, SyncJob.Status.QUEUED)
+        page = self.client.get(reverse("web:integracoes"))
+        self.assertContains(page, f'data-job-id="{job.id}"')
+        self.assertContains(page, f'data-status-url="{reverse("web:api_sync_job_status", args=[job.id])}"')
+
+        def fake_full_sync(account, days=30, *, full=False):
+            return MetaSyncLog.objects.create(
+                account=account, status=MetaSyncLog.Status.SUCCESS, campaigns_synced=2, metrics_synced=9
+            )
+
+        with mock.patch.object(meta_ads, "full_sync", side_effect=fake_full_sync):
+            self.assertEqual(jobs.run_pending_jobs("test"), 1)
+        self.assertIsNone(jobs.claim_next_job("test"))
+
+        data = self.client.get(reverse("web:api_sync_job_status", args=[job.id])).json()
+        self.assertTrue(data["job"]["done"])
+        self.assertEqual(data["job"]["status"], "success")
+        self.assertEqual(data["job"]["log"]["metrics_synced"], 9)
+
+    def test_full_sync_request_upgrades_or_follows_the_active_job(self):
+        from integrations.models import SyncJob
+        from integrations.services import jobs
+
+        provider = SyncJob.Provider.META_ADS
+        job, outcome = jobs.enqueue_sync(provider, self.account.id)
+        self.assertEqual(outcome, jobs.ENQUEUED)
+        self.assertEqual(jobs.enqueue_sync(provider, self.account.id), (job, jobs.ACTIVE))
+
+        upgraded, outcome = jobs.enqueue_sync(provider, self.account.id, full=True)
+        self.assertEqual((upgraded.id, outcome), (job.id, jobs.UPGRADED))
+        job.refresh_from_db()
+        self.assertTrue(job.params["full"])
+
+        # Em execução (incremental): o completo entra na fila e espera o atual terminar.
+        SyncJob.objects.filter(id=job.id).update(params={"days": 180, "full": False})
+        self.assertEqual(jobs.claim_next_job("test").id, job.id)
+        follow_up, outcome = jobs.enqueue_sync(provider, self.account.id, full=True)
+        self.assertEqual(outcome, jobs.FOLLOW_UP)
+        self.assertNotEqual(follow_up.id, job.id)
+        self.assertTrue(follow_up.params["full"])
+        self.assertIsNone(jobs.claim_next_job("other"))
+        self.assertEqual(jobs.enqueue_sync(provider, self.account.id, full=True), (follow_up, jobs.ACTIVE))
+
+        SyncJob.objects.filter(id=job.id).update(status=SyncJob.Status.SUCCESS)
+        self.assertEqual(jobs.claim_next_job("other").id, follow_up.id)
+
+    def test_in_process_worker_recovers_orphaned_jobs_and_frees_its_slot(self):
+        import threading
+        from unittest import mock
+        from django.utils import timezone
+        from integrations.models import MetaSyncLog, SyncJob
+        from integrations.services import jobs, meta_ads
+
+        long_ago = timezone.now() - timedelta(hours=1)
+        orphan = SyncJob.objects.create(
+            provider=SyncJob.Provider.META_ADS, account_id=self.account.id, status=SyncJob.Status.RUNNING,
+            started_at=long_ago, heartbeat_at=long_ago,
+        )
+        # Servidor reiniciado no meio do sync: o clique devolve o job órfão e acorda a thread.
+        with override_settings(SYNC_JOBS_IN_PROCESS=True), \
+                mock.patch.object(jobs, "_start_in_process_worker") as start, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(jobs.enqueue_sync(SyncJob.Provider.META_ADS, self.account.id), (orphan, jobs.ACTIVE))
+        start.assert_called_once()
+
+        def fake_full_sync(account, days=30, *, full=False):
+            return MetaSyncLog.objects.create(account=account, status=MetaSyncLog.Status.SUCCESS)
+
+        jobs._in_process_thread = threading.current_thread()
+        with mock.patch.object(meta_ads, "full_sync", side_effect=fake_full_sync), \
+                mock.patch.object(jobs, "connections"):
+            jobs._in_process_loop()
+        orphan.refresh_from_db()
+        self.assertEqual(orphan.status, SyncJob.Status.SUCCESS)
+        self.assertIsNone(jobs._in_process_thread)
+
+        with mock.patch.object(jobs.threading, "Thread") as thread:
+            jobs._start_in_process_worker()
+        thread.return_value.start.assert_called_once()
+        jobs._in_process_thread = None
+
+    def test_cron_command_runs_through_the_queue_and_skips_busy_accounts(self):
+        import io
+        from unittest import mock
+        from django.core.management import call_command
+        from django.utils import timezone
+        from integrations.models import MetaSyncLog, SyncJob
+        from integrations.services import meta_ads
+
+        def fake_full_sync(account, days=30, *, full=False):
+            return MetaSyncLog.objects.create(account=account, status=MetaSyncLog.Status.SUCCESS, metrics_synced=4)
+
+        with mock.patch.object(meta_ads, "full_sync", side_effect=fake_full_sync) as full_sync:
+            call_command("sync_meta_ads", "--days=7", stdout=io.StringIO())
+            full_sync.assert_called_once()
+            job = SyncJob.objects.get()
+            self.assertEqual((job.status, job.params["days"]), (SyncJob.Status.SUCCESS, 7))
+
+            running = SyncJob.objects.create(
+                provider=SyncJob.Provider.META_ADS, account_id=self.account.id, status=SyncJob.Status.RUNNING,
+                started_at=timezone.now(), heartbeat_at=timezone.now(),
+            )
+            out = io.StringIO()
+            call_command("sync_meta_ads", stdout=out)
+            full_sync.assert_called_once()  # não roda em paralelo com o job da tela/worker
+            self.assertIn(f"job #{running.id}", out.getvalue())
+
+    def test_only_jobs_without_recent_heartbeat_are_requeued(self):
+        from django.utils import timezone
+        from integrations.models import SyncJob
+        from integrations.services import jobs
+
+        long_ago = timezone.now() - timedelta(hours=5)
+        alive = SyncJob.objects.create(
+            provider=SyncJob.Provider.META_ADS, account_id=self.account.id, status=SyncJob.Status.RUNNING,
+            started_at=long_ago, heartbeat_at=timezone.now(),
+        )
+        dead = SyncJob.objects.create(
+            provider=SyncJob.Provider.META_ADS, account_id=self.account.id + 1, status=SyncJob.Status.RUNNING,
+            started_at=long_ago, heartbeat_at=long_ago,
+        )
+
+        self.assertEqual(jobs.requeue_stale_jobs(timedelta(minutes=10)), 1)
+        alive.refresh_from_db()
+        dead.refresh_from_db()
+        self.assertEqual(alive.status, SyncJob.Status.RUNNING)
+        self.assertEqual(dead.status, SyncJob.Status.QUEUED)
+        self.assertIsNone(dead.heartbeat_at)
+
+
+TIERED_TEST_CACHES = {
+    "default": {
+        "BACKEND": "web.cache.TieredCache",
+        "LOCATION": "tiered-tests",
+        "OPTIONS": {"SHARED": "shared", "LOCAL_MAX_ENTRIES": 2, "LOCAL_TIMEOUT": 60},
+    },
+    "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "tiered-tests-shared"},
+}
+
+
+@override_settings(CACHES=TIERED_TEST_CACHES)
+class TieredCacheTests(TestCase):
+    def setUp(self) -> None:
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def test_reads_are_served_from_process_lru(self):
+        from django.core.cache import cache, caches
+        from web.cache import cliente_key
+
+        key = cliente_key(7, "dashboard", "2026-01")
+        self.assertEqual(key, "cliente:7:dashboard:2026-01")
+        cache.set(key, {"total": 10})
+        self.assertEqual(caches["shared"].get(key), {"total": 10})
+
+        caches["shared"].delete(key)
+        hit = cache.get(key)
+        self.assertEqual(hit, {"total": 10})
+        hit["total"] = 99  # cópia: não contamina o nível local
+        self.assertEqual(cache.get(key), {"total": 10})
+
+        cache.delete(key)
+        self.assertIsNone(cache.get(key))
+
+    def test_local_tier_is_bounded_and_falls_back_to_shared(self):
+        from django.core.cache import cache, caches
+
+        for i in range(3):
+            cache.set(f"k{i}", i)
+        caches["shared"].set("k0", "novo")
+        self.assertEqual(cache.get("k0"), "novo")  # k0 saiu do LRU (máx. 2)
+        self.assertEqual(cache.get("k2"), 2)
+        self.assertEqual(cache.get("ausente", "default"), "default")
+
+        cache.set("curto", 1, timeout=0)
+        self.assertIsNone(cache.get("curto"))
+
+
+@override_settings(VIEW_CACHE_TIMEOUT=600)
+class ViewResultCacheTests(TestCase):
+    def setUp(self) -> None:
+        from django.core.cache import cache
+
+        cache.clear()
+        User = get_user_model()
+        self.cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente V", ativo=True)
+        self.admin = User.objects.create_user(
+            username="adm", email="adm@email.com", password="senha1234", role=getattr(User, "Role").ADMIN,
+        )
+        self.campaign = Campaign.objects.create(cliente=self.cliente, name="Google Ads - V", status=Campaign.Status.ACTIVE)
+        self.line = PlacementLine.objects.create(
+            campaign=self.campaign, media_channel=PlacementLine.MediaChannel.SEARCH, market="SP", channel="Busca", external_ref="1",
+        )
+        PlacementDay.objects.create(placement_line=self.line, date=date(2026, 3, 1), impressions=100, clicks=10, cost=Decimal("5"))
+        refresh_placement_rollups([self.campaign.id])
+        self.client.force_login(self.admin)
+        session = self.client.session
+        session["selected_cliente_id"] = self.cliente.id
+        session.save()
+
+    def test_dashon_is_cached_until_new_data_lands(self):
+        url = reverse("web:dashon")
+        with CaptureQueriesContext(connection) as cold:
+            first = self.client.get(url)
+        with CaptureQueriesContext(connection) as warm:
+            second = self.client.get(url)
+        self.assertEqual(second.context["total_impressions"], 100)
+        self.assertLess(len(warm.captured_queries), len(cold.captured_queries) // 2)
+        self.assertEqual(first.context["total_impressions"], 100)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PlacementDay.objects.create(placement_line=self.line, date=date(2026, 3, 2), impressions=50, clicks=5, cost=Decimal("2"))
+            refresh_placement_rollups([self.campaign.id])
+        self.assertEqual(self.client.get(url).context["total_impressions"], 150)
+
+    def test_veiculacao_is_invalidated_by_piece_and_line_edits(self):
+        url = reverse("web:veiculacao_google")
+        self.assertEqual(self.client.get(url).context["campaigns_data"][0]["pieces_count"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            piece = Piece.objects.create(campaign=self.campaign, code="A", title="Filme A", duration_sec=0)
+        self.assertEqual(self.client.get(url).context["campaigns_data"][0]["pieces_count"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            piece.delete()
+        self.assertEqual(self.client.get(url).context["campaigns_data"][0]["pieces_count"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.line.channel = "Busca Marca"
+            self.line.save()
+        self.assertEqual(self.client.get(url).context["campaigns_data"][0]["name"], "Busca Marca")
+
+    def test_module_visibility_and_other_params_are_not_shared(self):
+        url = reverse("web:dashon")
+        self.client.get(url)
+        self.cliente.dashon_hidden_modules = ["charts"]
+        self.cliente.save()
+        self.assertEqual(self.client.get(url).context["hidden_modules"], ["charts"])
+        filtered = self.client.get(url, {"date_from": "2026-03-02"})
+        self.assertEqual(filtered.context["total_impressions"], 0)
+
+    def test_cached_views_render_from_cache(self):
+        for name in ("web:dashboard", "web:consolidated_on", "web:analytics", "web:veiculacao", "web:veiculacao_google"):
+            with CaptureQueriesContext(connection) as cold:
+                first = self.client.get(reverse(name))
+            with CaptureQueriesContext(connection) as warm:
+                second = self.client.get(reverse(name))
+            self.assertEqual((first.status_code, second.status_code), (200, 200), name)
+            self.assertLess(len(warm.captured_queries), len(cold.captured_queries), name)
+
+
+class LargeTenantReportingTests(TestCase):
+    def setUp(self) -> None:
+        User = get_user_model()
+        self.cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente Grande", ativo=True)
+        self.admin = User.objects.create_user(
+            username="adm", email="adm@email.com", password="senha1234", role=getattr(User, "Role").ADMIN,
+        )
+        campaign = Campaign.objects.create(cliente=self.cliente, name="Google Ads - Grande", status=Campaign.Status.ACTIVE)
+        PlacementLine.objects.bulk_create(
+            [
+                PlacementLine(campaign=campaign, media_channel=PlacementLine.MediaChannel.SEARCH, market="SP", external_ref=str(i))
+                for i in range(10_050)
+            ],
+            batch_size=500,
+        )
+        lines = list(PlacementLine.objects.filter(campaign=campaign).order_by("id")[:3])
+        PlacementDay.objects.bulk_create([
+            PlacementDay(placement_line=line, date=date(2026, 3, 1), impressions=100, clicks=10, cost=Decimal("5"))
+            for line in lines
+        ])
+        refresh_placement_rollups([campaign.id])
+        self.client.force_login(self.admin)
+        session = self.client.session
+        session["selected_cliente_id"] = self.cliente.id
+        session.save()
+
+    def test_views_filter_days_by_join_not_id_lists(self):
+        for name in ("web:dashon", "web:consolidated_on", "web:analytics", "web:veiculacao_google"):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200, name)
+            longest = max(len(q["sql"]) for q in ctx.captured_queries)
+            self.assertLess(longest, 10_000, name)
+        self.assertEqual(self.client.get(reverse("web:dashon")).context["total_impressions"], 300)
+
+
+class XlsxParserPoolTests(TestCase):
+    def test_invalid_workbook_reports_error_and_pool_stays_usable(self):
+        from campaigns.services import parse_media_plan_xlsx
+        from campaigns.xlsx_pool import get_pool
+
+        upload = SimpleUploadedFile("plano.xlsx", b"isto nao e um xlsx")
+        for _ in range(2):
+            parsed = parse_media_plan_xlsx(upload)
+            self.assertFalse(parsed["ok"])
+            self.assertIn("Falha ao ler planilha .xlsx", parsed["errors"][0])
+        self.assertIs(get_pool(), get_pool())
+
+    def test_media_plan_rows_are_streamed_past_the_header_buffer(self):
+        import openpyxl
+        from campaigns.xlsx_pool import run_parser
+        from campaigns.xlsx_worker import HEAD_ROWS
+
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "OPEN TV"
+        ws.cell(row=2, column=1, value="Market")
+        ws.cell(row=2, column=2, value="Channel")
+        ws.cell(row=2, column=3, value="Program")
+        ws.cell(row=2, column=4, value="Março 2026")
+        for d in range(1, 11):
+            ws.cell(row=3, column=3 + d, value=d)
+        ws.append(["SP", "Globo", "Jornal", 2])
+        # Linha de dados muito além do buffer inicial, depois de um buraco.
+        far_row = HEAD_ROWS + 50
+        ws.cell(row=far_row, column=1, value="RJ")
+        ws.cell(row=far_row, column=2, value="SBT")
+        ws.cell(row=far_row, column=13, value=3)
+
+        with tempfile.NamedTemporaryFile(suffix=".xlsx") as tmp:
+            wb.save(tmp.name)
+            parsed = run_parser("media_plan", tmp.name, timeout=60)
+
+        self.assertEqual(parsed["total_rows"], far_row - 3)
+        self.assertEqual(
+            [(r["data"]["market"], r["data"]["program"], r["days"]) for r in parsed["rows"]],
+            [("SP", "Jornal", [["2026-03-01", 2]]), ("RJ", "Jornal", [["2026-03-10", 3]])],
+        )
+
+    def test_timeout_is_enforced_in_the_worker_without_killing_the_pool(self):
+        import time
+        from concurrent.futures import Future
+        from unittest import mock
+        from campaigns import xlsx_pool
+
+        def slow_parse(path):
+            try:
+                time.sleep(5)
+            except Exception:  # os parsers engolem Exception; o timeout passa por cima
+                return {"ok": False}
+            return {"ok": True}
+
+        with mock.patch.object(xlsx_pool.importlib, "import_module", return_value=mock.Mock(parse=slow_parse)):
+            started = time.monotonic()
+            with self.assertRaises(xlsx_pool.ParserTimeout):
+                xlsx_pool._run_parser("financial", "f.xlsx", 0.2)
+            self.assertLess(time.monotonic() - started, 2)
+
+        timed_out = Future()
+        timed_out.set_exception(xlsx_pool.ParserTimeout())
+        pool = mock.Mock(submit=mock.Mock(return_value=timed_out))
+        with mock.patch.object(xlsx_pool, "get_pool", return_value=pool), \
+                mock.patch.object(xlsx_pool, "shutdown_pool") as shutdown:
+            with self.assertRaisesMessage(xlsx_pool.XlsxParseError, "Timeout ao processar arquivo"):
+                xlsx_pool.run_parser("financial", "f.xlsx", timeout=60)
+        pool.submit.assert_called_once_with(xlsx_pool._run_parser, "financial", "f.xlsx", 60)
+        shutdown.assert_not_called()
+
+
+class XlsxHeaderScanTests(TestCase):
+    def test_label_by_column_carries_last_label_and_prefers_lower_rows(self):
+        from campaigns.xlsx_scan import label_by_column
+        from campaigns.xlsx_worker import _maybe_month
+
+        rows = [
+            (None, "Janeiro", None, None, "Fevereiro"),
+            (None, None, None, "Março"),
+        ]
+        self.assertEqual(label_by_column(rows, _maybe_month, 6), {2: 1, 3: 1, 4: 3, 5: 3, 6: 3})
+
+    def test_synthetic_annual_plan_dates_every_day_column(self):
+        from campaigns.management.commands.bench_media_plan_parse import build_synthetic_plan
+        from campaigns.xlsx_pool import run_parser
+
+        with tempfile.NamedTemporaryFile(suffix=".xlsx") as tmp:
+            build_synthetic_plan(tmp.name, year=2025, rows=4)
+            parsed = run_parser("media_plan", tmp.name, timeout=60)
+
+        self.assertEqual(parsed["detected"]["sheets"]["OPEN TV"]["date_columns_count"], 365)
+        dates = sorted(d for row in parsed["rows"] for d, _ in row["days"])
+        self.assertEqual((dates[0], dates[-1]), ("2025-01-01", "2025-12-31"))
+        self.assertIn("2025-03-01", dates)
+
+
+class XlsxParseCacheTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_dir = tmp.name
+
+    def test_same_bytes_are_parsed_once_per_parser(self):
+        from unittest import mock
+        from campaigns.services import parse_media_plan_xlsx, parse_sponsorship_xlsx
+
+        payload = {"sheets": ["OPEN TV"], "total_rows": 1, "detected": {}, "pieces": [], "rows": [
+            {"sheet": "OPEN TV", "data": {"market": "SP"}, "days": [["2026-03-01", 2]], "piece_codes": []},
+        ]}
+        with self.settings(XLSX_PARSE_CACHE_DIR=self.cache_dir), \
+                mock.patch("campaigns.parse_cache.run_parser", return_value=payload) as run:
+            first = parse_media_plan_xlsx(SimpleUploadedFile("a.xlsx", b"planilha"))
+            again = parse_media_plan_xlsx(SimpleUploadedFile("copia.xlsx", b"planilha"))
+            self.assertEqual(run.call_count, 1)
+            self.assertEqual(again["parsed_rows"], first["parsed_rows"])
+            self.assertEqual(again["parsed_rows"][0].days, [(date(2026, 3, 1), 2)])
+
+            parse_media_plan_xlsx(SimpleUploadedFile("a.xlsx", b"planilha v2"))
+            parse_sponsorship_xlsx(SimpleUploadedFile("a.xlsx", b"planilha"))
+            self.assertEqual(run.call_count, 3)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        import os
+        from unittest import mock
+        from campaigns.parse_cache import cached_run_parser
+
+        def fake_parse(kind, path, timeout=None):
+            return {"rows": ["linha"] * 1000}  # mesmo tamanho comprimido em todas as entradas
+
+        paths = []
+        for i in range(3):
+            path = os.path.join(self.cache_dir, f"in{i}.xlsx")
+            with open(path, "wb") as fh:
+                fh.write(b"arquivo %d" % i)
+            paths.append(path)
+        entries_dir = os.path.join(self.cache_dir, "entries")
+
+        with mock.patch("campaigns.parse_cache.run_parser", side_effect=fake_parse) as run:
+            with self.settings(XLSX_PARSE_CACHE_DIR=entries_dir):
+                cached_run_parser("media_plan", paths[0])
+                cached_run_parser("media_plan", paths[1])
+            entries = sorted(os.scandir(entries_dir), key=lambda e: e.name)
+            size = max(e.stat().st_size for e in entries)
+            for age, e in enumerate(entries):
+                os.utime(e.path, (1000 + age, 1000 + age))
+
+            with self.settings(XLSX_PARSE_CACHE_DIR=entries_dir, XLSX_PARSE_CACHE_MAX_BYTES=int(size * 2.5)):
+                cached_run_parser("media_plan", paths[0])  # hit: passa a ser o mais recente
+                self.assertEqual(run.call_count, 2)
+                cached_run_parser("media_plan", paths[2])  # estoura o limite
+                self.assertEqual(len(os.listdir(entries_dir)), 2)
+                cached_run_parser("media_plan", paths[0])
+                self.assertEqual(run.call_count, 3)
+                cached_run_parser("media_plan", paths[1])
+                self.assertEqual(run.call_count, 4)
+
+
+class MediaPlanBulkImportTests(TestCase):
+    def test_large_plan_imports_with_bounded_queries(self):
+        from unittest import mock
+        from campaigns import services
+
+        User = get_user_model()
+        cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente P", ativo=True)
+        campaign = Campaign.objects.create(cliente=cliente, name="Plano grande")
+
+        start = date(2026, 1, 1)
+        rows = [
+            services.ParsedPlacementRow(
+                sheet="OPEN TV",
+                media_type="offline",
+                media_channel="tv_aberta",
+                data={"market": f"Praça {i % 10}", "channel": "Canal", "program": f"Programa {i}"},
+                days=[(start + timedelta(days=d), 1 + d % 3) for d in range(100)],
+                piece_codes=["A", "B"] if i % 2 else [],
+            )
+            for i in range(500)
+        ]
+        parsed = {"ok": True, "parsed_rows": rows, "pieces": [{"code": "A", "title": "Filme A"}]}
+
+        with mock.patch.object(services, "parse_media_plan_xlsx", return_value=parsed), \
+                CaptureQueriesContext(connection) as ctx:
+            result = services.import_media_plan_xlsx(
+                campaign=campaign, uploaded_file=SimpleUploadedFile("p.xlsx", b""), replace_existing=True,
+            )
+
+        self.assertEqual(result["created"], {
+            "placement_lines": 500,
+            "placement_days": 50_000,
+            "pieces": 2,
+            "placement_creatives": 500,
+        })
+        self.assertEqual(PlacementDay.objects.filter(placement_line__campaign=campaign).count(), 50_000)
+        self.assertEqual(Piece.objects.get(campaign=campaign, code="B").title, "Peça B")
+        # Antes: um INSERT por dia (50k+). O SQLite limita o lote pelo número de
+        # parâmetros, então aqui são algumas centenas; no Postgres, dezenas.
+        self.assertLess(len(ctx.captured_queries), 1000)
+
+
+class CampaignsXlsxImportTests(TestCase):
+    def test_placement_days_are_written_in_bulk_with_one_version_bump(self):
+        import io
+        from unittest import mock
+        from django.core.management import call_command
+        from campaigns import signals
+        from web.management.commands import import_campaigns_xlsx
+
+        User = get_user_model()
+        cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente X", ativo=True)
+        rows = [
+            {"veiculo": "meta", "tema": f"Tema {i}", "campanha": "C", "investimento": "10.5", "impressoes": "100", "cliques": "3"}
+            for i in range(30)
+        ]
+        sheet = (["veiculo", "tema", "campanha", "investimento", "impressoes", "cliques"], rows, "sheet1")
+
+        with mock.patch.object(import_campaigns_xlsx, "_read_xlsx_sheet", return_value=sheet), \
+                mock.patch.object(signals, "bump_data_version") as signal_bump, \
+                CaptureQueriesContext(connection) as ctx:
+            call_command("import_campaigns_xlsx", "plano.xlsx", cliente_id=cliente.id, stdout=io.StringIO())
+
+        days = PlacementDay.objects.filter(placement_line__campaign__cliente=cliente)
+        self.assertEqual(days.count(), 30)
+        self.assertEqual(days.aggregate(cost=Sum("cost"))["cost"], Decimal("315.00"))
+        sqls = [q["sql"] for q in ctx.captured_queries]
+        self.assertEqual(sum('INSERT INTO "campaigns_placementday"' in sql for sql in sqls), 1)
+        # Só o sinal da campanha criada; os dias não disparam um bump por linha.
+        signal_bump.assert_called_once()
+
+
+class MediaPlanDiffImportTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente D", ativo=True)
+        self.campaign = Campaign.objects.create(cliente=cliente, name="Plano revisado")
+        self.start = date(2026, 3, 1)
+
+    def _row(self, program, days, **data):
+        from campaigns import services
+
+        return services.ParsedPlacementRow(
+            sheet="OPEN TV",
+            media_type="offline",
+            media_channel="tv_aberta",
+            data={"market": "SP", "channel": "Globo", "program": program, **data},
+            days=[(self.start + timedelta(days=d), ins) for d, ins in days],
+            piece_codes=["A"],
+        )
+
+    def _import(self, rows):
+        from unittest import mock
+        from campaigns import services
+
+        parsed = {"ok": True, "parsed_rows": rows, "pieces": [{"code": "A", "title": "Filme A"}]}
+        with mock.patch.object(services, "parse_media_plan_xlsx", return_value=parsed):
+            return services.import_media_plan_xlsx(
+                campaign=self.campaign, uploaded_file=SimpleUploadedFile("p.xlsx", b""), replace_existing=True,
+            )
+
+    def test_reimport_writes_only_changed_rows(self):
+        self._import([
+            self._row("Jornal", [(0, 1), (1, 2), (2, 3)]),
+            self._row("Novela", [(0, 1), (1, 1)]),
+            self._row("Novela", [(5, 4)]),
+            self._row("Futebol", [(3, 2)]),
+        ])
+        lines = {(l.program, l.id) for l in PlacementLine.objects.filter(campaign=self.campaign)}
+        jornal = PlacementLine.objects.get(campaign=self.campaign, program="Jornal")
+        kept_day = PlacementDay.objects.get(placement_line=jornal, date=self.start)
+        manual = Piece.objects.create(campaign=self.campaign, code="Z", title="Manual", duration_sec=0)
+        PlacementCreative.objects.create(placement_line=jornal, piece=manual)
+
+        result = self._import([
+            self._row("Jornal", [(0, 1), (1, 5), (4, 1)]),
+            self._row("Novela", [(0, 1), (1, 1)]),
+            self._row("Novela", [(5, 4)], duration_sec=30),
+            self._row("Reality", [(6, 2)]),
+        ])
+
+        self.assertEqual(result["changes"], {
+            "placement_lines": {"created": 1, "updated": 2, "deleted": 1, "unchanged": 1},
+            "placement_days": {"created": 2, "updated": 1, "deleted": 1},
+            "placement_creatives": {"created": 1},
+        })
+        after = {(l.program, l.id) for l in PlacementLine.objects.filter(campaign=self.campaign)}
+        self.assertEqual(len(lines & after), 3)
+        self.assertEqual(PlacementDay.objects.get(id=kept_day.id).insertions, 1)
+        self.assertEqual(
+            sorted(PlacementDay.objects.filter(placement_line=jornal).values_list("date", "insertions")),
+            [(self.start, 1), (self.start + timedelta(days=1), 5), (self.start + timedelta(days=4), 1)],
+        )
+        self.assertTrue(PlacementCreative.objects.filter(placement_line=jornal, piece=manual).exists())
+        self.assertEqual(
+            PlacementDayRollup.objects.filter(campaign=self.campaign).aggregate(t=Sum("insertions"))["t"],
+            1 + 5 + 1 + 1 + 1 + 4 + 2,
+        )
+
+    def test_identical_reimport_changes_nothing(self):
+        rows = [self._row("Jornal", [(0, 1), (1, 2)], start_date=datetime(2026, 3, 1, 8, 0))]
+        self._import(rows)
+        result = self._import(rows)
+        self.assertEqual(result["changes"]["placement_lines"], {"created": 0, "updated": 0, "deleted": 0, "unchanged": 1})
+        self.assertEqual(result["changes"]["placement_days"], {"created": 0, "updated": 0, "deleted": 0})
+
+
+@override_settings(MEDIA_ROOT=tempfile.gettempdir())
+class AssetIngestTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente E", ativo=True)
+        self.campaign = Campaign.objects.create(cliente=cliente, name="Peças")
+        self.admin = User.objects.create_user(
+            username="adm", email="adm@email.com", password="senha1234", role=getattr(User, "Role").ADMIN,
+        )
+
+    def test_batch_upload_dedupes_in_one_query_and_defers_ffprobe(self):
+        from unittest import mock
+        from campaigns.asset_ingest import probe_pending_assets
+        from campaigns.services import attach_assets_to_campaign
+
+        files = [SimpleUploadedFile(f"A_video_{i}.mp4", b"video %d" % i, content_type="video/mp4") for i in range(6)]
+        files.append(SimpleUploadedFile("A_copia.mp4", b"video 0", content_type="video/mp4"))
+        with mock.patch("campaigns.asset_ingest.try_ffprobe") as ffprobe, \
+                self.captureOnCommitCallbacks() as callbacks, \
+                CaptureQueriesContext(connection) as ctx:
+            result = attach_assets_to_campaign(campaign=self.campaign, files=files)
+        ffprobe.assert_not_called()
+        # Um único enfileiramento de probes (os demais callbacks invalidam o cache).
+        self.assertEqual(sum(c.__module__ == "campaigns.asset_ingest" for c in callbacks), 1)
+        self.assertEqual((result["created_assets"], result["skipped_duplicates"]), (6, 1))
+        self.assertEqual(sum("checksum" in q["sql"] and "SELECT" in q["sql"] for q in ctx.captured_queries), 1)
+        assets = CreativeAsset.objects.filter(piece__campaign=self.campaign)
+        self.assertEqual(set(assets.values_list("probe_status", flat=True)), {CreativeAsset.ProbeStatus.PENDING})
+
+        again = attach_assets_to_campaign(campaign=self.campaign, files=[SimpleUploadedFile("A_v.mp4", b"video 3")])
+        self.assertEqual((again["created_assets"], again["skipped_duplicates"]), (0, 1))
+
+        with mock.patch("campaigns.asset_ingest.try_ffprobe", return_value={"format": {"duration": "29.6"}}):
+            self.assertEqual(probe_pending_assets(), 6)
+        self.assertEqual(Piece.objects.get(campaign=self.campaign, code="A").duration_sec, 30)
+        asset = assets.first()
+        self.assertEqual(asset.probe_status, CreativeAsset.ProbeStatus.DONE)
+        self.assertEqual(asset.metadata["duration_sec"], 30)
+        self.assertEqual(asset.metadata["original_name"][:2], "A_")
+
+    def test_piece_upload_api_returns_before_probe(self):
+        from unittest import mock
+
+        piece = Piece.objects.create(campaign=self.campaign, code="B", title="Filme B", duration_sec=0)
+        self.client.force_login(self.admin)
+        with mock.patch("campaigns.asset_ingest.enqueue_probes") as enqueue, \
+                self.captureOnCommitCallbacks(execute=True):
+            resp = self.client.post(
+                reverse("web:api_upload_piece_asset", args=[piece.id]),
+                {"file": [SimpleUploadedFile("b.mp4", b"bbb"), SimpleUploadedFile("b2.mp4", b"bbb")]},
+            )
+        data = resp.json()
+        self.assertEqual(data["created"], 1)
+        self.assertEqual(data["assets"][0]["probe_status"], "pending")
+        enqueue.assert_called_once_with([data["assets"][0]["id"]])
+
+    def test_image_renditions_are_small_webp_shared_by_checksum(self):
+        import io
+        import os
+        from unittest import mock
+        from django.conf import settings
+        from django.core.management import call_command
+        from PIL import Image
+        from campaigns.asset_ingest import ingest_assets
+        from campaigns.renditions import build_renditions
+
+        buf = io.BytesIO()
+        Image.new("RGB", (2000, 1000), (200, 30, 30)).save(buf, format="PNG")
+        piece = Piece.objects.create(campaign=self.campaign, code="C", title="Banner C", duration_sec=0)
+        other = Piece.objects.create(campaign=self.campaign, code="D", title="Banner D", duration_sec=0)
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), \
+                mock.patch("campaigns.asset_ingest.enqueue_probes"):
+            first, second = ingest_assets([
+                (piece, SimpleUploadedFile("c.png", buf.getvalue(), content_type="image/png")),
+                (other, SimpleUploadedFile("d.png", buf.getvalue(), content_type="image/png")),
+            ])["assets"]
+            self.assertTrue(build_renditions(first))
+            first.refresh_from_db()
+            self.assertTrue(first.thumb_url.endswith("-thumb.webp"))
+            self.assertTrue(first.preview_url.endswith("-preview.webp"))
+            thumb_path = os.path.join(media_root, first.thumb_url.removeprefix(settings.MEDIA_URL))
+            with Image.open(thumb_path) as thumb:
+                self.assertEqual((thumb.format, thumb.size), ("WEBP", (320, 160)))
+
+            # O caminho relativo do storage continua válido ao editar o asset num form/admin.
+            from django.forms import modelform_factory
+            from campaigns.models import CreativeAsset
+            form_class = modelform_factory(CreativeAsset, fields=["preview_url", "thumb_url"])
+            form = form_class(
+                data={"preview_url": first.preview_url, "thumb_url": first.thumb_url}, instance=first
+            )
+            self.assertTrue(form.is_valid(), form.errors)
+
+            call_command("build_asset_renditions", campaign_id=self.campaign.id, stdout=io.StringIO())
+            second.refresh_from_db()
+            self.assertEqual(second.thumb_url, first.thumb_url)
+            renditions = os.listdir(os.path.dirname(thumb_path))
+            self.assertEqual(len(renditions), 2)
+
+    def test_renditions_close_the_source_file(self):
+        import io
+        from unittest import mock
+        from PIL import Image
+        from campaigns.asset_ingest import ingest_assets
+        from campaigns.renditions import build_renditions
+
+        buf = io.BytesIO()
+        frames = [Image.new("RGB", (64, 64), color) for color in ((255, 0, 0), (0, 255, 0))]
+        frames[0].save(buf, format="GIF", save_all=True, append_images=frames[1:])
+        piece = Piece.objects.create(campaign=self.campaign, code="G", title="Banner G", duration_sec=0)
+        opened = []
+        real_open = Image.open
+
+        def spy_open(*args, **kwargs):
+            image = real_open(*args, **kwargs)
+            opened.append(image._fp)  # arquivo que o Pillow mantém aberto para os demais quadros
+            return image
+
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root), \
+                mock.patch("campaigns.asset_ingest.enqueue_probes"):
+            (asset,) = ingest_assets([(piece, SimpleUploadedFile("g.gif", buf.getvalue(), content_type="image/gif"))])["assets"]
+            with mock.patch.object(Image, "open", spy_open):
+                self.assertTrue(build_renditions(asset))
+        # GIF animado mantém o arquivo aberto até close(); um backfill não pode vazar handles.
+        self.assertEqual(len(opened), 1)
+        self.assertTrue(opened[0].closed)
+
+
+class AuditBufferTests(TestCase):
+    def setUp(self) -> None:
+        User = get_user_model()
+        self.cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente A", ativo=True)
+        self.admin = User.objects.create_user(
+            username="adm", email="adm@email.com", password="senha1234", role=getattr(User, "Role").ADMIN,
+        )
+        self.campaign = Campaign.objects.create(cliente=self.cliente, name="Campanha A", status=Campaign.Status.ACTIVE)
+
+    def _request(self, view):
+        from django.test import RequestFactory
+
+        from accounts.middleware import CurrentRequestMiddleware
+
+        request = RequestFactory().post("/bulk/")
+        request.user = self.admin
+        return CurrentRequestMiddleware(view)(request)
+
+    def test_events_are_written_in_one_insert_at_response_end(self):
+        from accounts.models import AuditLog
+
+        piece_ids = []
+        seen_during_request = []
+
+        def view(request):
+            with self.captureOnCommitCallbacks(execute=True):
+                for i in range(5):
+                    piece = Piece.objects.create(campaign_id=self.campaign.id, title=f"Peca {i}", code=f"P{i}", duration_sec=0, type="video")
+                    piece_ids.append(piece.id)
+                self.campaign.name = "Campanha A2"
+                self.campaign.save()
+            seen_during_request.append(AuditLog.objects.count())
+            return None
+
+        with CaptureQueriesContext(connection) as ctx:
+            self._request(view)
+
+        self.assertEqual(seen_during_request, [0])
+        logs = AuditLog.objects.filter(user=self.admin)
+        self.assertEqual(logs.filter(event_type="piece_created").count(), 5)
+        self.assertEqual(logs.filter(event_type="campaign_updated").count(), 1)
+        self.assertEqual(set(logs.values_list("cliente_id", flat=True)), {self.cliente.id})
+        sqls = [q["sql"] for q in ctx.captured_queries]
+        self.assertEqual(sum('INSERT INTO "accounts_auditlog"' in sql for sql in sqls), 1)
+        # Só a checagem de existência em lote (ids apagados viram NULL), sem carregar Clientes por objeto.
+        self.assertEqual(len([sql for sql in sqls if 'FROM "accounts_cliente"' in sql]), 1)
+
+    def test_deleting_a_cliente_with_campaigns_keeps_its_audit_events(self):
+        from accounts.models import AuditLog, Cliente
+        from web import views
+
+        cliente_id = self.cliente.id
+
+        def view(request):
+            with self.captureOnCommitCallbacks(execute=True):
+                views.cliente_delete(request, cliente_id)
+            return None
+
+        from django.test import RequestFactory
+
+        from accounts.middleware import CurrentRequestMiddleware
+
+        request = RequestFactory().post("/clientes/deletar/", {"confirm_name": "Cliente A", "delete_mode": "all"})
+        request.user = self.admin
+        request.session = {}
+        CurrentRequestMiddleware(view)(request)
+
+        self.assertFalse(Cliente.objects.filter(id=cliente_id).exists())
+        self.assertTrue(AuditLog.objects.filter(event_type="cliente_deleted").exists())
+        deleted = AuditLog.objects.filter(event_type="campaign_deleted")
+        self.assertEqual(deleted.count(), 1)
+        self.assertIsNone(deleted.get().cliente_id)
+        connection.check_constraints(table_names=["accounts_auditlog"])
+
+    def test_one_bad_row_does_not_drop_the_rest(self):
+        from unittest import mock
+
+        from django.db import IntegrityError
+
+        from accounts import audit_buffer
+        from accounts.models import AuditLog
+
+        entries = [AuditLog.build("logout", user=self.admin), AuditLog.build("logout", user=self.admin)]
+        real_save = AuditLog.save
+        calls = []
+
+        def save(entry, *args, **kwargs):
+            calls.append(entry)
+            if len(calls) == 1:
+                raise IntegrityError("bad row")
+            return real_save(entry, *args, **kwargs)
+
+        with mock.patch.object(AuditLog.objects, "bulk_create", side_effect=IntegrityError("batch")), \
+                mock.patch.object(AuditLog, "save", save):
+            audit_buffer._write(entries)
+        self.assertEqual(AuditLog.objects.filter(event_type="logout").count(), 1)
+
+    def test_rolled_back_changes_are_not_audited(self):
+        from django.db import transaction
+
+        from accounts.models import AuditLog
+
+        def view(request):
+            with self.captureOnCommitCallbacks(execute=True):
+                try:
+                    with transaction.atomic():
+                        Piece.objects.create(campaign=self.campaign, title="Peca X", code="PX", duration_sec=0, type="video")
+                        raise RuntimeError("rollback")
+                except RuntimeError:
+                    pass
+            return None
+
+        self._request(view)
+        self.assertFalse(AuditLog.objects.filter(event_type="piece_created").exists())
+
+
+class AuditStorageTests(TestCase):
+    def setUp(self) -> None:
+        User = get_user_model()
+        self.admin = User.objects.create_user(
+            username="adm", email="adm@email.com", password="senha1234", role=getattr(User, "Role").ADMIN,
+        )
+
+    def test_dashboard_totals_come_from_daily_counters(self):
+        from django.utils import timezone
+
+        from accounts.models import AuditDailyCount, AuditLog
+
+        for _ in range(3):
+            AuditLog.log(AuditLog.EventType.LOGIN, user=self.admin)
+        AuditLog.log(AuditLog.EventType.LOGIN_FAILED)
+        today = timezone.localdate()
+        self.assertEqual(AuditDailyCount.objects.get(day=today, event_type="login").count, 3)
+
+        self.client.force_login(self.admin)
+        resp = self.client.get(reverse("web:logs_auditoria"), {"data_de": today.isoformat(), "data_ate": today.isoformat()})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["total_logs"], AuditLog.objects.count())
+        self.assertGreaterEqual(resp.context["total_logins"], 3)
+        self.assertEqual(resp.context["total_login_failed"], 1)
+
+    def test_cleanup_deletes_old_rows_and_counters_by_range(self):
+        import io
+
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        from accounts.audit_storage import add_daily_counts
+        from accounts.models import AuditDailyCount, AuditLog
+
+        now = timezone.now()
+        old = [
+            AuditLog(event_type="logout", created_at=now - timedelta(days=days))
+            for days in (400, 200, 120, 95)
+        ]
+        recent = AuditLog(event_type="logout", created_at=now - timedelta(days=10))
+        AuditLog.objects.bulk_create(old + [recent])
+        add_daily_counts(old + [recent])
+
+        call_command("cleanup_audit_logs", "--days", "90", stdout=io.StringIO())
+
+        self.assertEqual(list(AuditLog.objects.filter(event_type="logout").values_list("id", flat=True)), [recent.id])
+        self.assertEqual(
+            list(AuditDailyCount.objects.filter(event_type="logout").values_list("day", flat=True)),
+            [timezone.localdate(recent.created_at)],
+        )
+
+
+class AuditStatsTests(TestCase):
+    def setUp(self) -> None:
+        from django.utils import timezone
+
+        from accounts.audit_storage import add_daily_counts
+        from accounts.models import AuditLog
+
+        User = get_user_model()
+        self.admin = User.objects.create_user(
+            username="adm", email="adm@email.com", password="senha1234", role=getattr(User, "Role").ADMIN,
+        )
+        self.today = timezone.localdate()
+        now = timezone.now()
+        entries = []
+        for days in range(0, 120, 3):
+            entries += [
+                AuditLog(event_type="login", user=self.admin, created_at=now - timedelta(days=days)),
+                AuditLog(event_type="login_failed", created_at=now - timedelta(days=days)),
+                AuditLog(event_type="piece_deleted", user=self.admin, created_at=now - timedelta(days=days)),
+            ]
+        AuditLog.objects.bulk_create(entries)
+        add_daily_counts(entries)
+        self.client.force_login(self.admin)
+
+    def test_page_query_count_does_not_grow_with_the_range(self):
+        def load(days):
+            params = {"data_de": (self.today - timedelta(days=days)).isoformat(), "data_ate": self.today.isoformat()}
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(reverse("web:logs_auditoria"), params)
+            self.assertEqual(resp.status_code, 200)
+            return resp, len(ctx.captured_queries)
+
+        short, short_queries = load(1)
+        long, long_queries = load(150)
+        self.assertEqual(short_queries, long_queries)
+        self.assertEqual(long.context["total_pieces_deleted"], 40)
+        self.assertEqual(long.context["total_login_failed"], 40)
+
+    def test_json_endpoint(self):
+        from accounts.models import AuditLog
+
+        params = {"data_de": (self.today - timedelta(days=150)).isoformat(), "data_ate": self.today.isoformat()}
+        data = self.client.get(reverse("web:api_audit_stats"), params).json()
+        self.assertTrue(data["ok"])
+        self.assertEqual(data["totals"]["logs"], AuditLog.objects.count())
+        self.assertEqual(data["totals"]["login_failed"], 40)
+        self.assertEqual(sum(data["logins_by_hour"]["failed"]), 40)
+        self.assertEqual(sum(data["events_by_day"]["counts"]), data["totals"]["logs"])
+        self.assertEqual(data["top_users"][0]["user__username"], "adm")
+        self.assertEqual(data["events_by_type"][0]["label"], dict(AuditLog.EventType.choices)[data["events_by_type"][0]["event_type"]])
+
+
+class BriefingSnapshotTests(TestCase):
+    def setUp(self) -> None:
+        from django.core.cache import cache
+
+        from campaigns.models import FinancialSummary
+
+        cache.clear()
+        User = get_user_model()
+        self.cliente = getattr(User, "cliente").field.related_model.objects.create(nome="Cliente B", ativo=True)
+        self.campaign = Campaign.objects.create(cliente=self.cliente, name="Google Ads - B", status=Campaign.Status.ACTIVE)
+        self.line = PlacementLine.objects.create(
+            campaign=self.campaign, media_channel=PlacementLine.MediaChannel.SEARCH, market="SP", channel="Busca", external_ref="1",
+        )
+        PlacementDay.objects.create(placement_line=self.line, date=date(2026, 3, 1), impressions=100, clicks=10, cost=Decimal("5"))
+        FinancialSummary.objects.create(campaign=self.campaign, total_valor_tabela=Decimal("1000"))
+
+    def _spy_sections(self):
+        from unittest import mock
+
+        from web.services import ai_analytics
+
+        spies = [(name, sources, mock.Mock(wraps=builder)) for name, sources, builder in ai_analytics._BRIEFING_SECTIONS]
+        return mock.patch.object(ai_analytics, "_BRIEFING_SECTIONS", spies), {name: spy for name, _, spy in spies}
+
+    def test_repeat_calls_hit_the_snapshot(self):
+        from web.services.ai_analytics import build_deep_briefing
+
+        first = build_deep_briefing(self.cliente.id)
+        with CaptureQueriesContext(connection) as ctx:
+            second = build_deep_briefing(self.cliente.id)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(first, second)
+        self.assertEqual(second["digital"]["impressions"], 100)
+        self.assertEqual(second["financial"][0]["valor_tabela"], 1000.0)
+
+    def test_sync_recomputes_only_placement_sections(self):
+        from web.services.ai_analytics import build_deep_briefing
+
+        build_deep_briefing(self.cliente.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            PlacementDay.objects.bulk_create([
+                PlacementDay(placement_line=self.line, date=date(2026, 3, 2), impressions=50, clicks=5, cost=Decimal("2")),
+            ])
+            refresh_placement_rollups([self.campaign.id])
+
+        patcher, spies = self._spy_sections()
+        with patcher:
+            briefing = build_deep_briefing(self.cliente.id)
+        self.assertEqual(briefing["digital"]["impressions"], 150)
+        self.assertEqual(briefing["financial"][0]["valor_tabela"], 1000.0)
+        called = {name for name, spy in spies.items() if spy.called}
+        self.assertEqual(called, {"digital", "offline"})
+
+    def test_pi_section_is_rebuilt_on_a_new_day(self):
+        from unittest import mock
+
+        from web.services import ai_analytics
+
+        ai_analytics.build_deep_briefing(self.cliente.id)
+
+        class Tomorrow(date):
+            @classmethod
+            def today(cls):
+                return date.today() + timedelta(days=1)
+
+        patcher, spies = self._spy_sections()
+        with patcher, mock.patch.object(ai_analytics, "date", Tomorrow):
+            ai_analytics.build_deep_briefing(self.cliente.id)
+        called = {name for name, spy in spies.items() if spy.called}
+        self.assertEqual(called, {"pis"})
+
+    def test_renaming_the_cliente_refreshes_the_header(self):
+        from web.services.ai_analytics import build_deep_briefing
+
+        build_deep_briefing(self.cliente.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cliente.nome = "Cliente B2"
+            self.cliente.save()
+        self.assertEqual(build_deep_briefing(self.cliente.id)["cliente"], "Cliente B2")
+
+
+class AICacheTests(TestCase):
+    def setUp(self) -> None:
+        from django.core.cache import cache
+
+        cache.clear()
+
+    def test_fresh_entry_is_served_without_recomputing(self):
+        from web.services.ai_cache import get_or_compute
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {"n": len(calls)}
+
+        self.assertEqual(get_or_compute("k1", "fp1", compute, timeout=60), {"n": 1})
+        self.assertEqual(get_or_compute("k1", "fp1", compute, timeout=60), {"n": 1})
+        self.assertEqual(len(calls), 1)
+
+    def test_changed_fingerprint_serves_stale_and_refreshes_in_background(self):
+        import threading
+
+        from web.services import ai_cache
+
+        ai_cache.get_or_compute("k2", "old", lambda: {"v": "old"}, timeout=60)
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return {"v": "new"}
+
+        self.assertEqual(ai_cache.get_or_compute("k2", "new", slow, timeout=60), {"v": "old"})
+        future = ai_cache._inflight.get(("k2", "new"))
+        self.assertIsNotNone(future)
+        # Enquanto o refresh roda, novas chamadas não disparam outro.
+        self.assertEqual(ai_cache.get_or_compute("k2", "new", slow, timeout=60), {"v": "old"})
+        release.set()
+        future.result(timeout=5)
+        self.assertEqual(ai_cache.get_or_compute("k2", "new", lambda: {"v": "other"}, timeout=60), {"v": "new"})
+
+    def test_fresh_request_does_not_join_a_refresh_for_older_data(self):
+        import threading
+
+        from web.services import ai_cache
+
+        ai_cache.get_or_compute("k4", "v1", lambda: {"v": 1}, timeout=60)
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return {"v": 2}
+
+        self.assertEqual(ai_cache.get_or_compute("k4", "v2", slow, timeout=60), {"v": 1})
+        refresh = ai_cache._inflight[("k4", "v2")]
+        # Dados mudaram de novo enquanto o refresh de v2 roda: quem não aceita stale recalcula para v3.
+        self.assertEqual(ai_cache.get_or_compute("k4", "v3", lambda: {"v": 3}, timeout=60, allow_stale=False), {"v": 3})
+        release.set()
+        refresh.result(timeout=5)
+        self.assertEqual(ai_cache.get_or_compute("k4", "v3", lambda: {"v": "other"}, timeout=60), {"v": 3})
+
+    def test_concurrent_cold_requests_share_one_computation(self):
+        import threading
+
+        from web.services.ai_cache import get_or_compute
+
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"v": 1}
+
+        results = []
+        first = threading.Thread(target=lambda: results.append(get_or_compute("k3", "fp", slow, timeout=60)))
+        first.start()
+        started.wait(5)
+        second = threading.Thread(target=lambda: results.append(get_or_compute("k3", "fp", slow, timeout=60)))
+        second.start()
+        release.set()
+        first.join(5)
+        second.join(5)
+        self.assertEqual(results, [{"v": 1}, {"v": 1}])
+        self.assertEqual(len(calls), 1)
+
+    def test_insights_call_the_llm_once_per_data_fingerprint(self):
+        from unittest import mock
+
+        from web.services import ai_analytics
+
+        reply = mock.Mock()
+        reply.content = [mock.Mock(text='{"executive_summary": "ok", "insights": []}')]
+        client = mock.Mock()
+        client.messages.create.return_value = reply
+        context = {"total_imp": 100, "total_clk": 5, "date_from": "2026-03-01", "date_to": "2026-03-31"}
+        with mock.patch.object(ai_analytics, "ANTHROPIC_API_KEY", "test"), mock.patch.object(ai_analytics, "_get_client", return_value=client):
+            first = ai_analytics.generate_analytics_insights(context, cliente_id=0)
+            second = ai_analytics.generate_analytics_insights(context, cliente_id=0)
+            changed = ai_analytics.generate_analytics_insights({**context, "total_imp": 200}, cliente_id=0, allow_stale=False)
+        self.assertEqual(first, second)
+        self.assertEqual(changed["executive_summary"], "ok")
+        self.assertEqual(client.messages.create.call_count, 2)
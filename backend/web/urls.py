@@ -61,6 +61,7 @@ urlpatterns = [
     path("integracoes/meta-ads/callback/", views.mads_callback, name="mads_callback"),
     path("integracoes/meta-ads/<int:account_id>/disconnect/", views.mads_disconnect, name="mads_disconnect"),
     path("integracoes/meta-ads/<int:account_id>/sync/", views.mads_sync, name="mads_sync"),
+    path("api/sync-jobs/<int:job_id>/", views.api_sync_job_status, name="api_sync_job_status"),
     path("integracoes/meta-ads/clear-logs/", views.mads_clear_logs, name="mads_clear_logs"),
     path("integracoes/meta-ads/clear-data/", views.mads_clear_data, name="mads_clear_data"),
     path("api/veiculacao-data/", views.api_veiculacao_data, name="api_veiculacao_data"),
@@ -129,5 +130,6 @@ urlpatterns = [
     path("api/search-campaigns/", views.api_search_campaigns, name="api_search_campaigns"),
     path("configuracoes/", views.configuracoes, name="configuracoes"),
     path("logs-auditoria/", views.logs_auditoria, name="logs_auditoria"),
+    path("api/audit-stats/", views.api_audit_stats, name="api_audit_stats"),
     path("perfil/", views.user_profile, name="user_profile"),
 ]
@@ -1,6 +1,7 @@
 from accounts.models import AuditLog, Cliente
 
-from campaigns.models import Campaign, ContractUpload, CreativeAsset, FinancialUpload, MediaPlanUpload, Piece, PlacementCreative, PlacementDay, PlacementLine, RegionInvestment
+from campaigns.models import Campaign, ContractUpload, CreativeAsset, FinancialUpload, MediaPlanUpload, Piece, PlacementCreative, PlacementDay, PlacementDayRollup, PlacementLine, RegionInvestment
+from campaigns.rollups import refresh_placement_rollups
 from campaigns.services import import_financial_data, import_media_plan_xlsx, attach_assets_to_campaign, parse_financial_xlsx, parse_media_plan_xlsx
 from datetime import datetime, timedelta
 from django.contrib.auth import get_user_model
@@ -11,7 +12,6 @@ from django.core.mail import send_mail
 from django.db import models
 from django.db.models.functions import TruncMonth
 from django.db.models import Count, Max, Min, Sum
-from django.db.models.functions import TruncDate, TruncHour
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
 from django.template.loader import render_to_string
@@ -22,6 +22,10 @@ from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.views.decorators.csrf import csrf_exempt
 import json
 
+from .services.campaign_table import build_campaign_table, daily_by_line
+from .services.date_series import DailySeries, date_range, month_shift
+from .services.reporting import reporting_days, reporting_lines
+from .cache import get_view_context, set_view_context, view_cache_key
 from .authz import effective_cliente_id, effective_role, is_admin, require_admin, require_true_admin, selected_cliente_id
 from .forms import (
     CampaignEditForm,
@@ -353,6 +357,22 @@ def password_reset_complete(request: HttpRequest) -> HttpResponse:
     })
 
 
+def _rollup_qs(*, channels=None, cliente_id=None, campaigns=None, date_from=None, date_to=None):
+    """PlacementDayRollup filtrado — fonte dos totais e séries diárias dos dashboards."""
+    qs = PlacementDayRollup.objects.all()
+    if channels is not None:
+        qs = qs.filter(media_channel__in=channels)
+    if cliente_id:
+        qs = qs.filter(cliente_id=cliente_id)
+    if campaigns is not None:
+        qs = qs.filter(campaign__in=campaigns)
+    if date_from:
+        qs = qs.filter(date__gte=date_from)
+    if date_to:
+        qs = qs.filter(date__lte=date_to)
+    return qs
+
+
 def _render_module(request: HttpRequest, *, active: str, title: str) -> HttpResponse:
     role = effective_role(request)
     if role == "cliente":
@@ -500,52 +520,52 @@ def dashboard(request: HttpRequest) -> HttpResponse:
             campaigns_qs = Campaign.objects.filter(status="active")
             cliente = None
 
-    # Contadores
-    total_campaigns = campaigns_qs.count()
-
-    # Campanhas em andamento (now between start_date and end_date)
-    campaigns_live = campaigns_qs.filter(start_date__lte=now, end_date__gte=now).count()
+    # Contexto calculado em cache até o próximo sync/import do cliente
+    view_key = view_cache_key("dashboard", active_cliente_filter, request.GET, role=role)
+    data = get_view_context(view_key)
+    if data is not None:
+        return render(request, "web/dashboard.html", {**data, "clientes_list": clientes_list})
+
+    # Contadores (campanhas, em andamento e investimento numa única consulta)
+    campaign_stats = campaigns_qs.aggregate(
+        total=Count("id"),
+        live=Count("id", filter=models.Q(start_date__lte=now, end_date__gte=now)),
+        investment=Sum("total_budget"),
+    )
+    total_campaigns = campaign_stats["total"] or 0
+    campaigns_live = campaign_stats["live"] or 0
 
-    # Praças ativas agora (markets distintos com inserções hoje ou no período atual)
-    pracas_ativas = PlacementLine.objects.filter(
-        campaign__in=campaigns_qs,
-        days__date=today,
-        days__insertions__gt=0,
-    ).values("market").distinct().count()
+    # Contar linhas ativas vs inativas (último dia de veiculação de cada linha)
+    on_count = 0
+    off_count = 0
+    for max_day in (
+        PlacementLine.objects.filter(campaign__in=campaigns_qs)
+        .annotate(max_day=Max("days__date"))
+        .values_list("max_day", flat=True)
+    ):
+        if max_day is None:
+            continue
+        if max_day >= today:
+            on_count += 1
+        else:
+            off_count += 1
 
-    # Contar linhas ativas vs inativas
-    on_count = PlacementLine.objects.filter(
-        campaign__in=campaigns_qs
-    ).annotate(
-        max_day=Max("days__date")
-    ).filter(max_day__gte=today).count()
-
-    off_count = PlacementLine.objects.filter(
-        campaign__in=campaigns_qs
-    ).annotate(
-        max_day=Max("days__date")
-    ).filter(max_day__lt=today).count()
+    # Série diária única: todas as janelas abaixo são recortes dela
+    rollup_qs = _rollup_qs(campaigns=campaigns_qs)
+    series = DailySeries.from_queryset(rollup_qs)
 
     # Totais consolidados (inserções planejadas = todas as inserções)
-    totals = PlacementDay.objects.filter(placement_line__campaign__in=campaigns_qs).aggregate(
-        insertions=Sum("insertions"),
-        impressions=Sum("impressions"),
-        clicks=Sum("clicks"),
-        cost=Sum("cost"),
-    )
+    totals = {m: series.total(m) for m in ("insertions", "impressions", "clicks", "cost")}
     total_insertions_planned = totals.get("insertions") or 0
 
     # Inserções realizadas (até hoje)
-    insertions_done = PlacementDay.objects.filter(
-        placement_line__campaign__in=campaigns_qs,
-        date__lte=today,
-    ).aggregate(total=Sum("insertions"))["total"] or 0
+    insertions_done = series.total("insertions", end=today)
 
     # Percentual de execução
     exec_percent = round((insertions_done / total_insertions_planned * 100), 1) if total_insertions_planned > 0 else 0
 
     # Investimento total (budget das campanhas)
-    investment = campaigns_qs.aggregate(total=Sum("total_budget"))["total"] or 0
+    investment = campaign_stats["investment"] or 0
 
     # ========== DADOS PARA GRÁFICOS ==========
 
@@ -567,44 +587,14 @@ def dashboard(request: HttpRequest) -> HttpResponse:
         cmp_from = today - timedelta(days=30)
 
     # Current period series
-    cur_days = []
-    d = cmp_from
-    while d <= cmp_to:
-        cur_days.append(d)
-        d += timedelta(days=1)
-    cur_qs = (
-        PlacementDay.objects.filter(
-            placement_line__campaign__in=campaigns_qs,
-            date__gte=cmp_from,
-            date__lte=cmp_to,
-        )
-        .values("date")
-        .annotate(total=Sum("insertions"))
-    )
-    cur_map = {row["date"]: int(row["total"] or 0) for row in cur_qs}
-    days_labels = [d.strftime("%d/%m") for d in cur_days]
-    days_insertions = [cur_map.get(d, 0) for d in cur_days]
+    days_labels = [d.strftime("%d/%m") for d in date_range(cmp_from, cmp_to)]
+    days_insertions = [int(v) for v in series.window(cmp_from, cmp_to)]
 
     # Previous period series (mesmo tamanho imediatamente anterior)
     period_len = (cmp_to - cmp_from).days + 1
     prev_to = cmp_from - timedelta(days=1)
     prev_from = prev_to - timedelta(days=period_len - 1)
-    prev_days = []
-    d2 = prev_from
-    while d2 <= prev_to:
-        prev_days.append(d2)
-        d2 += timedelta(days=1)
-    prev_qs = (
-        PlacementDay.objects.filter(
-            placement_line__campaign__in=campaigns_qs,
-            date__gte=prev_from,
-            date__lte=prev_to,
-        )
-        .values("date")
-        .annotate(total=Sum("insertions"))
-    )
-    prev_map = {row["date"]: int(row["total"] or 0) for row in prev_qs}
-    cmp_previous = [prev_map.get(d, 0) for d in prev_days]
+    cmp_previous = [int(v) for v in series.window(prev_from, prev_to)]
 
     # Resumo de comparação
     cur_total = sum(days_insertions)
@@ -623,32 +613,9 @@ def dashboard(request: HttpRequest) -> HttpResponse:
     }
 
     # 1b. Evolução Mensal de Inserções (últimos 12 meses)
-    from datetime import date
-    def _month_shift(base: date, months: int) -> date:
-        y = base.year + (base.month - 1 + months) // 12
-        m = (base.month - 1 + months) % 12 + 1
-        return date(y, m, 1)
-
-    start_month = _month_shift(today.replace(day=1), -11)
-    months_qs = (
-        PlacementDay.objects.filter(
-            placement_line__campaign__in=campaigns_qs,
-            date__gte=start_month,
-            date__lte=today,
-        )
-        .annotate(month=TruncMonth("date"))
-        .values("month")
-        .annotate(total=Sum("insertions"))
-        .order_by("month")
-    )
-    months_map = {row["month"].strftime("%m/%y"): int(row["total"] or 0) for row in months_qs}
-    months_labels = []
-    months_insertions = []
-    for i in range(12):
-        m_date = _month_shift(start_month, i)
-        label = m_date.strftime("%m/%y")
-        months_labels.append(label)
-        months_insertions.append(months_map.get(label, 0))
+    start_month = month_shift(today.replace(day=1), -11)
+    months_labels = [month_shift(start_month, i).strftime("%m/%y") for i in range(12)]
+    months_insertions = [int(v) for v in series.monthly(start_month, 12, end=today)]
 
     # Comparativo mês atual vs anterior
     months_compare = {
@@ -682,26 +649,34 @@ def dashboard(request: HttpRequest) -> HttpResponse:
     region_labels = [r["region_name"] for r in region_investments]
     region_values = [float(r["total_pct"]) for r in region_investments]
 
+    # 3 + 4. Praças e canais: um único GROUP BY (praça, canal) no agregado,
+    # reduzido em Python para Top 5 praças, distribuição por canal e praças ativas hoje
+    market_totals: dict[str, int] = {}
+    channel_totals: dict[str, int] = {}
+    markets_today: set[str] = set()
+    for row in rollup_qs.values("market", "media_channel").annotate(
+        total=Sum("insertions"),
+        today_total=Sum("insertions", filter=models.Q(date=today)),
+    ).order_by():
+        total = row["total"] or 0
+        market_totals[row["market"]] = market_totals.get(row["market"], 0) + total
+        channel_totals[row["media_channel"]] = channel_totals.get(row["media_channel"], 0) + total
+        if row["today_total"]:
+            markets_today.add(row["market"])
+
+    # Praças ativas agora (markets distintos com inserções hoje)
+    pracas_ativas = len(markets_today)
+
     # 3. Top 5 Praças por Inserção (barra horizontal)
-    top_pracas = list(
-        PlacementDay.objects.filter(placement_line__campaign__in=campaigns_qs)
-        .values("placement_line__market")
-        .annotate(total=Sum("insertions"))
-        .order_by("-total")[:5]
-    )
-    pracas_labels = [p["placement_line__market"] for p in top_pracas]
-    pracas_values = [p["total"] for p in top_pracas]
+    top_pracas = sorted(market_totals.items(), key=lambda kv: kv[1], reverse=True)[:5]
+    pracas_labels = [m for m, _ in top_pracas]
+    pracas_values = [v for _, v in top_pracas]
 
     # 4. Distribuição por Canal (media_channel)
-    channel_dist = list(
-        PlacementDay.objects.filter(placement_line__campaign__in=campaigns_qs)
-        .values("placement_line__media_channel")
-        .annotate(total=Sum("insertions"))
-        .order_by("-total")
-    )
+    channel_dist = sorted(channel_totals.items(), key=lambda kv: kv[1], reverse=True)
     channel_labels_map = dict(PlacementLine.MediaChannel.choices)
-    channel_labels = [channel_labels_map.get(c["placement_line__media_channel"], c["placement_line__media_channel"]) for c in channel_dist]
-    channel_values = [c["total"] for c in channel_dist]
+    channel_labels = [channel_labels_map.get(ch, ch) for ch, _ in channel_dist]
+    channel_values = [v for _, v in channel_dist]
 
     # 5. Inserções por Peça - Top 5 criativos
     top_pieces = list(
@@ -720,62 +695,48 @@ def dashboard(request: HttpRequest) -> HttpResponse:
     pieces_values = [p["total"] for p in top_pieces if p['placement_line__placement_creatives__piece__code']]
 
     # 6. Heatmap - últimas 4 semanas (7 dias × 4 semanas)
-    heatmap_weeks = []
-    for week_offset in range(4):
-        week_start = today - timedelta(days=today.weekday() + 7 * (3 - week_offset))
-        week_data = []
-        for day_offset in range(7):
-            day_date = week_start + timedelta(days=day_offset)
-            day_total = PlacementDay.objects.filter(
-                placement_line__campaign__in=campaigns_qs,
-                date=day_date,
-            ).aggregate(total=Sum("insertions"))["total"] or 0
-            week_data.append({"date": day_date.strftime("%d/%m"), "value": day_total})
-        heatmap_weeks.append(week_data)
+    heatmap_weeks = series.weeks(today - timedelta(days=today.weekday() + 21), 4)
 
-    return render(
-        request,
-        "web/dashboard.html",
-        {
-            "active": "dashboard",
-            "page_title": "Dashboard",
-            "role": role,
-            "cliente": cliente,
-            "clientes_list": clientes_list,
-            "selected_cliente_id": active_cliente_filter,
-            "stats": {
-                "investment": investment,
-                "on_count": on_count,
-                "off_count": off_count,
-                "cost": totals.get("cost") or 0,
-                "insertions": total_insertions_planned,
-                "insertions_done": insertions_done,
-                "exec_percent": exec_percent,
-                "total_campaigns": total_campaigns,
-                "campaigns_live": campaigns_live,
-                "pracas_ativas": pracas_ativas,
-            },
-            # Dados para gráficos
-            "days_labels": json.dumps(days_labels),
-            "days_insertions": json.dumps(days_insertions),
-            "cmp_previous": json.dumps(cmp_previous),
-            "cmp_summary": cmp_summary,
-            "cmp_from": cmp_from.strftime("%Y-%m-%d"),
-            "cmp_to": cmp_to.strftime("%Y-%m-%d"),
-            "months_labels": json.dumps(months_labels),
-            "months_insertions": json.dumps(months_insertions),
-            "months_compare": months_compare,
-            "region_labels": json.dumps(region_labels),
-            "region_values": json.dumps(region_values),
-            "pracas_labels": json.dumps(pracas_labels),
-            "pracas_values": json.dumps(pracas_values),
-            "channel_labels": json.dumps(channel_labels),
-            "channel_values": json.dumps(channel_values),
-            "pieces_labels": json.dumps(pieces_labels),
-            "pieces_values": json.dumps(pieces_values),
-            "heatmap_weeks": json.dumps(heatmap_weeks),
+    data = {
+        "active": "dashboard",
+        "page_title": "Dashboard",
+        "role": role,
+        "cliente": cliente,
+        "selected_cliente_id": active_cliente_filter,
+        "stats": {
+            "investment": investment,
+            "on_count": on_count,
+            "off_count": off_count,
+            "cost": totals.get("cost") or 0,
+            "insertions": total_insertions_planned,
+            "insertions_done": insertions_done,
+            "exec_percent": exec_percent,
+            "total_campaigns": total_campaigns,
+            "campaigns_live": campaigns_live,
+            "pracas_ativas": pracas_ativas,
         },
-    )
+        # Dados para gráficos
+        "days_labels": json.dumps(days_labels),
+        "days_insertions": json.dumps(days_insertions),
+        "cmp_previous": json.dumps(cmp_previous),
+        "cmp_summary": cmp_summary,
+        "cmp_from": cmp_from.strftime("%Y-%m-%d"),
+        "cmp_to": cmp_to.strftime("%Y-%m-%d"),
+        "months_labels": json.dumps(months_labels),
+        "months_insertions": json.dumps(months_insertions),
+        "months_compare": months_compare,
+        "region_labels": json.dumps(region_labels),
+        "region_values": json.dumps(region_values),
+        "pracas_labels": json.dumps(pracas_labels),
+        "pracas_values": json.dumps(pracas_values),
+        "channel_labels": json.dumps(channel_labels),
+        "channel_values": json.dumps(channel_values),
+        "pieces_labels": json.dumps(pieces_labels),
+        "pieces_values": json.dumps(pieces_values),
+        "heatmap_weeks": json.dumps(heatmap_weeks),
+    }
+    set_view_context(view_key, data)
+    return render(request, "web/dashboard.html", {**data, "clientes_list": clientes_list})
 
 
 @login_required
@@ -1111,6 +1072,11 @@ def veiculacao(request: HttpRequest, platform: str = "all") -> HttpResponse:
             },
         )
 
+    view_key = view_cache_key("veiculacao", cliente_id, request.GET, platform=platform, role=role)
+    data = get_view_context(view_key)
+    if data is not None:
+        return render(request, "web/veiculacao.html", data)
+
     # Check if there are any connected accounts
     gads_qs = GoogleAdsAccount.objects.filter(is_active=True)
     mads_qs = MetaAdsAccount.objects.filter(is_active=True)
@@ -1134,23 +1100,16 @@ def veiculacao(request: HttpRequest, platform: str = "all") -> HttpResponse:
         has_accounts = imported_lines.exists()
 
     # Fetch placement data
-    lines_qs = PlacementLine.objects.filter(media_channel__in=channels)
-    if cliente_id:
-        lines_qs = lines_qs.filter(campaign__cliente_id=cliente_id)
-
-    line_ids = list(lines_qs.values_list("id", flat=True))
+    lines_qs = reporting_lines(channels=channels, cliente_id=cliente_id)
 
     # Date filter
     date_from = request.GET.get("date_from", "")
     date_to = request.GET.get("date_to", "")
-    days_qs = PlacementDay.objects.filter(placement_line_id__in=line_ids)
-    if date_from:
-        days_qs = days_qs.filter(date__gte=date_from)
-    if date_to:
-        days_qs = days_qs.filter(date__lte=date_to)
+    days_qs = reporting_days(channels=channels, cliente_id=cliente_id, date_from=date_from, date_to=date_to)
 
     # Aggregate stats
-    stats = days_qs.aggregate(
+    rollup_qs = _rollup_qs(channels=channels, cliente_id=cliente_id, date_from=date_from, date_to=date_to)
+    stats = rollup_qs.aggregate(
         total_impressions=Sum("impressions"),
         total_clicks=Sum("clicks"),
         total_cost=Sum("cost"),
@@ -1174,40 +1133,14 @@ def veiculacao(request: HttpRequest, platform: str = "all") -> HttpResponse:
         .values_list("campaign_id", "cnt")
     )
 
-    campaigns_data = []
-    for line in lines_qs.select_related("campaign", "campaign__cliente"):
-        line_days = days_qs.filter(placement_line=line)
-        agg = line_days.aggregate(
-            imp=Sum("impressions"),
-            clk=Sum("clicks"),
-            cst=Sum("cost"),
-        )
-        imp = agg["imp"] or 0
-        clk = agg["clk"] or 0
-        cst = float(agg["cst"] or 0)
-        line_ctr = (clk / imp * 100) if imp > 0 else 0
-        cpc = (cst / clk) if clk > 0 else 0
-        plat_label = "Meta Ads" if line.media_channel in meta_channels else "Google Ads"
-        camp_id = line.campaign_id
-        campaigns_data.append({
-            "id": line.id,
-            "name": line.channel or line.property_text or f"Campaign #{line.external_ref}",
-            "client": line.campaign.cliente.nome if line.campaign else "",
-            "channel": line.get_media_channel_display(),
-            "platform": plat_label,
-            "impressions": imp,
-            "clicks": clk,
-            "ctr": round(line_ctr, 2),
-            "cost": round(cst, 2),
-            "cpc": round(cpc, 2),
-            "external_ref": line.external_ref,
-            "campaign_id": camp_id,
-            "pieces_count": pieces_by_campaign.get(camp_id, 0),
-        })
+    campaigns_data = build_campaign_table(lines_qs, days_qs)
+    for row in campaigns_data:
+        row["platform"] = "Meta Ads" if row["media_channel"] in meta_channels else "Google Ads"
+        row["pieces_count"] = pieces_by_campaign.get(row["campaign_id"], 0)
 
     # Daily metrics for chart
     daily_metrics = list(
-        days_qs.values("date")
+        rollup_qs.values("date")
         .annotate(
             imp=Sum("impressions"),
             clk=Sum("clicks"),
@@ -1242,35 +1175,33 @@ def veiculacao(request: HttpRequest, platform: str = "all") -> HttpResponse:
         ).values_list("id", flat=True).first()
         parent_campaign_id = pc
 
-    return render(
-        request,
-        "web/veiculacao.html",
-        {
-            "active": active_key,
-            "page_title": page_title,
-            "table_title": table_title,
-            "empty_msg": empty_msg,
-            "show_platform_col": show_platform_col,
-            "has_accounts": has_accounts,
-            "parent_campaign_id": parent_campaign_id,
-            "user_is_admin": effective_role(request) != "cliente",
-            "total_impressions": total_impressions,
-            "total_clicks": total_clicks,
-            "total_cost": total_cost,
-            "ctr": round(ctr, 2),
-            "cpm": round(cpm, 2),
-            "alcance": alcance,
-            "campaigns_data": campaigns_data,
-            "chart_labels_json": json.dumps(chart_labels),
-            "chart_impressions_json": json.dumps(chart_impressions),
-            "chart_clicks_json": json.dumps(chart_clicks),
-            "chart_cost_json": json.dumps(chart_cost),
-            "pie_labels_json": json.dumps(pie_labels),
-            "pie_values_json": json.dumps(pie_values),
-            "date_from": date_from,
-            "date_to": date_to,
-        },
-    )
+    data = {
+        "active": active_key,
+        "page_title": page_title,
+        "table_title": table_title,
+        "empty_msg": empty_msg,
+        "show_platform_col": show_platform_col,
+        "has_accounts": has_accounts,
+        "parent_campaign_id": parent_campaign_id,
+        "user_is_admin": effective_role(request) != "cliente",
+        "total_impressions": total_impressions,
+        "total_clicks": total_clicks,
+        "total_cost": total_cost,
+        "ctr": round(ctr, 2),
+        "cpm": round(cpm, 2),
+        "alcance": alcance,
+        "campaigns_data": campaigns_data,
+        "chart_labels_json": json.dumps(chart_labels),
+        "chart_impressions_json": json.dumps(chart_impressions),
+        "chart_clicks_json": json.dumps(chart_clicks),
+        "chart_cost_json": json.dumps(chart_cost),
+        "pie_labels_json": json.dumps(pie_labels),
+        "pie_values_json": json.dumps(pie_values),
+        "date_from": date_from,
+        "date_to": date_to,
+    }
+    set_view_context(view_key, data)
+    return render(request, "web/veiculacao.html", data)
 
 
 @login_required
@@ -1296,6 +1227,19 @@ def dashon(request: HttpRequest) -> HttpResponse:
             },
         )
 
+    # Per-client module visibility
+    from accounts.models import Cliente as _Cliente
+    _cliente_obj = _Cliente.objects.filter(id=cliente_id).only("id", "dashon_hidden_modules").first()
+    module_context = {
+        "hidden_modules": list(_cliente_obj.dashon_hidden_modules or []) if _cliente_obj else [],
+        "can_manage_modules": is_admin(request.user),
+    }
+
+    view_key = view_cache_key("dashon", cliente_id, request.GET, role=role)
+    data = get_view_context(view_key)
+    if data is not None:
+        return render(request, "web/dashon.html", {**data, **module_context})
+
     # Check connected accounts
     gads_qs = GoogleAdsAccount.objects.filter(is_active=True)
     mads_qs = MetaAdsAccount.objects.filter(is_active=True)
@@ -1304,36 +1248,23 @@ def dashon(request: HttpRequest) -> HttpResponse:
         mads_qs = mads_qs.filter(cliente_id=cliente_id)
     has_accounts = gads_qs.exists() or mads_qs.exists()
 
-    # Per-client module visibility
-    from accounts.models import Cliente as _Cliente
-    _cliente_obj = _Cliente.objects.filter(id=cliente_id).only("id", "dashon_hidden_modules").first()
-    hidden_modules = list(_cliente_obj.dashon_hidden_modules or []) if _cliente_obj else []
-    can_manage_modules = is_admin(request.user)
-
     # Digital channels
     google_channels = ["google", "youtube", "display", "search"]
     meta_channels = ["meta"]
     other_digital = ["tiktok", "linkedin", "dv360", "dv360_youtube", "dv360_spotify", "dv360_eletromid", "dv360_netflix", "dv360_globoplay", "dv360_admooh"]
     all_channels = google_channels + meta_channels + other_digital
 
-    lines_qs = PlacementLine.objects.filter(media_channel__in=all_channels)
-    if cliente_id:
-        lines_qs = lines_qs.filter(campaign__cliente_id=cliente_id)
-
-    line_ids = list(lines_qs.values_list("id", flat=True))
+    lines_qs = reporting_lines(channels=all_channels, cliente_id=cliente_id)
 
     # Date filter — no default range so all synced data is shown
     date_from = request.GET.get("date_from", "")
     date_to = request.GET.get("date_to", "")
 
-    days_qs = PlacementDay.objects.filter(placement_line_id__in=line_ids)
-    if date_from:
-        days_qs = days_qs.filter(date__gte=date_from)
-    if date_to:
-        days_qs = days_qs.filter(date__lte=date_to)
+    days_qs = reporting_days(channels=all_channels, cliente_id=cliente_id, date_from=date_from, date_to=date_to)
 
     # ── Global stats ──
-    stats = days_qs.aggregate(
+    rollup_qs = _rollup_qs(channels=all_channels, cliente_id=cliente_id, date_from=date_from, date_to=date_to)
+    stats = rollup_qs.aggregate(
         total_impressions=Sum("impressions"),
         total_clicks=Sum("clicks"),
         total_cost=Sum("cost"),
@@ -1382,8 +1313,8 @@ def dashon(request: HttpRequest) -> HttpResponse:
                 prev_end = p_start - timedelta(days=1)
                 prev_start = prev_end - timedelta(days=p_len - 1)
 
-            prev_qs = PlacementDay.objects.filter(
-                placement_line_id__in=line_ids, date__gte=prev_start, date__lte=prev_end,
+            prev_qs = _rollup_qs(
+                channels=all_channels, cliente_id=cliente_id, date_from=prev_start, date_to=prev_end,
             )
             prev_stats = prev_qs.aggregate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
             prev_imp = prev_stats["imp"] or 0
@@ -1416,9 +1347,7 @@ def dashon(request: HttpRequest) -> HttpResponse:
     # ── Campaign live status ──
     from datetime import date as _date_cls
     today = _date_cls.today()
-    recent_days = PlacementDay.objects.filter(
-        placement_line_id__in=line_ids, date__gte=today - timedelta(days=3),
-    )
+    recent_days = reporting_days(channels=all_channels, cliente_id=cliente_id, date_from=today - timedelta(days=3))
     live_line_ids = set(recent_days.values_list("placement_line_id", flat=True).distinct())
     campaigns_on = len(live_line_ids)
     campaigns_total = len(set(days_qs.values_list("placement_line_id", flat=True).distinct()))
@@ -1427,13 +1356,10 @@ def dashon(request: HttpRequest) -> HttpResponse:
     # (problem_campaigns and projections moved after campaigns_data is built)
 
     # ── Per-platform stats ──
-    google_line_ids = list(lines_qs.filter(media_channel__in=google_channels).values_list("id", flat=True))
-    meta_line_ids = list(lines_qs.filter(media_channel__in=meta_channels).values_list("id", flat=True))
-
-    g_stats = days_qs.filter(placement_line_id__in=google_line_ids).aggregate(
+    g_stats = rollup_qs.filter(media_channel__in=google_channels).aggregate(
         imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"),
     )
-    m_stats = days_qs.filter(placement_line_id__in=meta_line_ids).aggregate(
+    m_stats = rollup_qs.filter(media_channel__in=meta_channels).aggregate(
         imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"),
     )
 
@@ -1455,13 +1381,13 @@ def dashon(request: HttpRequest) -> HttpResponse:
     google_daily = defaultdict(lambda: {"imp": 0, "clk": 0, "cst": 0})
     meta_daily = defaultdict(lambda: {"imp": 0, "clk": 0, "cst": 0})
 
-    for row in days_qs.filter(placement_line_id__in=google_line_ids).values("date").annotate(
+    for row in rollup_qs.filter(media_channel__in=google_channels).values("date").annotate(
         imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"),
     ).order_by("date"):
         d = str(row["date"])
         google_daily[d] = {"imp": row["imp"] or 0, "clk": row["clk"] or 0, "cst": float(row["cst"] or 0)}
 
-    for row in days_qs.filter(placement_line_id__in=meta_line_ids).values("date").annotate(
+    for row in rollup_qs.filter(media_channel__in=meta_channels).values("date").annotate(
         imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"),
     ).order_by("date"):
         d = str(row["date"])
@@ -1485,33 +1411,9 @@ def dashon(request: HttpRequest) -> HttpResponse:
         donut_values.append(meta_platform["cost"])
 
     # ── Top 10 campaigns by investment ──
-    campaigns_data = []
-    for line in lines_qs.select_related("campaign", "campaign__cliente"):
-        line_days = days_qs.filter(placement_line=line)
-        agg = line_days.aggregate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
-        imp = agg["imp"] or 0
-        clk = agg["clk"] or 0
-        cst = float(agg["cst"] or 0)
-        if imp == 0 and clk == 0 and cst == 0:
-            continue
-        line_ctr = round((clk / imp * 100), 2) if imp > 0 else 0
-        line_cpc = round((cst / clk), 2) if clk > 0 else 0
-        line_roi = round((clk / cst), 2) if cst > 0 else 0
-        line_cpm = round((cst / imp * 1000), 2) if imp > 0 else 0
-        platform = "Meta Ads" if line.media_channel in meta_channels else "Google Ads"
-        campaigns_data.append({
-            "id": line.id,
-            "name": line.channel or line.property_text or f"Campaign #{line.external_ref}",
-            "client": line.campaign.cliente.nome if line.campaign else "",
-            "platform": platform,
-            "impressions": imp,
-            "clicks": clk,
-            "ctr": line_ctr,
-            "cost": round(cst, 2),
-            "cpc": line_cpc,
-            "roi": line_roi,
-            "cpm": line_cpm,
-        })
+    campaigns_data = build_campaign_table(lines_qs, days_qs, skip_empty=True)
+    for row in campaigns_data:
+        row["platform"] = "Meta Ads" if row["media_channel"] in meta_channels else "Google Ads"
     campaigns_data.sort(key=lambda c: c["cost"], reverse=True)
 
     # Top 10 for bar chart
@@ -1523,10 +1425,9 @@ def dashon(request: HttpRequest) -> HttpResponse:
     # ── Channel performance comparison ──────────────────────────────
     channel_perf = []
     for ch_label, ch_ids in [("Google Ads", google_channels), ("Meta Ads", meta_channels)]:
-        ch_line_ids = list(lines_qs.filter(media_channel__in=ch_ids).values_list("id", flat=True))
-        if not ch_line_ids:
+        if not lines_qs.filter(media_channel__in=ch_ids).exists():
             continue
-        ch_qs = days_qs.filter(placement_line_id__in=ch_line_ids)
+        ch_qs = rollup_qs.filter(media_channel__in=ch_ids)
         ch_stats = ch_qs.aggregate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
         ch_imp = ch_stats["imp"] or 0
         ch_clk = ch_stats["clk"] or 0
@@ -1552,7 +1453,7 @@ def dashon(request: HttpRequest) -> HttpResponse:
         if c["cost"] > 0 and c["ctr"] < 1.0:
             problem_campaigns.append(c["name"])
 
-    days_in_period = max(1, len(set(d["date"] for d in days_qs.values("date"))))
+    days_in_period = max(1, rollup_qs.values("date").distinct().count())
     daily_avg_cost = total_cost / days_in_period if days_in_period > 0 else 0
     days_left_month = 30 - today.day
     projected_monthly_cost = round(total_cost + (daily_avg_cost * max(0, days_left_month)), 2)
@@ -1650,122 +1551,104 @@ def dashon(request: HttpRequest) -> HttpResponse:
 
     # ── Ad-level drill-down data ──────────────────────────────
     from campaigns.models import AdGroup, AdGroupDay, Ad, AdDay
+    top_line_ids = [c["id"] for c in campaigns_data[:20]]  # limit to top 20 campaigns
+    ag_days = AdGroupDay.objects.filter(ad_group__placement_line_id__in=top_line_ids)
+    if date_from:
+        ag_days = ag_days.filter(date__gte=date_from)
+    if date_to:
+        ag_days = ag_days.filter(date__lte=date_to)
+    ag_totals = {
+        row["ad_group_id"]: row
+        for row in ag_days.values("ad_group_id")
+        .annotate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
+        .order_by()
+    } if top_line_ids else {}
     ads_by_campaign = {}
-    for c in campaigns_data[:20]:  # limit to top 20 campaigns
-        line_id = c["id"]
-        ad_groups = AdGroup.objects.filter(placement_line_id=line_id).select_related("placement_line")
-        campaign_ads = []
-        for ag in ad_groups:
-            ag_days = AdGroupDay.objects.filter(ad_group=ag)
-            if date_from:
-                ag_days = ag_days.filter(date__gte=date_from)
-            if date_to:
-                ag_days = ag_days.filter(date__lte=date_to)
-            agg = ag_days.aggregate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
-            a_imp = agg["imp"] or 0
-            a_clk = agg["clk"] or 0
-            a_cst = float(agg["cst"] or 0)
-            if a_imp == 0 and a_clk == 0:
-                continue
-            campaign_ads.append({
-                "name": ag.name,
-                "type": "Ad Group",
-                "status": ag.status,
-                "impressions": a_imp,
-                "clicks": a_clk,
-                "ctr": round((a_clk / a_imp * 100), 2) if a_imp > 0 else 0,
-                "cost": round(a_cst, 2),
-                "cpc": round((a_cst / a_clk), 2) if a_clk > 0 else 0,
-            })
-        if campaign_ads:
-            ads_by_campaign[str(line_id)] = campaign_ads
+    for ag in AdGroup.objects.filter(placement_line_id__in=top_line_ids, id__in=list(ag_totals)).order_by("id"):
+        agg = ag_totals[ag.id]
+        a_imp = agg["imp"] or 0
+        a_clk = agg["clk"] or 0
+        a_cst = float(agg["cst"] or 0)
+        if a_imp == 0 and a_clk == 0:
+            continue
+        ads_by_campaign.setdefault(str(ag.placement_line_id), []).append({
+            "name": ag.name,
+            "type": "Ad Group",
+            "status": ag.status,
+            "impressions": a_imp,
+            "clicks": a_clk,
+            "ctr": round((a_clk / a_imp * 100), 2) if a_imp > 0 else 0,
+            "cost": round(a_cst, 2),
+            "cpc": round((a_cst / a_clk), 2) if a_clk > 0 else 0,
+        })
 
     # ── Daily breakdown per campaign for drill-down chart ──
-    campaign_daily = {}
-    for c in campaigns_data[:10]:
-        line_id = c["id"]
-        daily = list(
-            days_qs.filter(placement_line_id=line_id)
-            .values("date")
-            .annotate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
-            .order_by("date")
-        )
-        if daily:
-            campaign_daily[str(line_id)] = {
-                "labels": [str(d["date"]) for d in daily],
-                "impressions": [d["imp"] or 0 for d in daily],
-                "clicks": [d["clk"] or 0 for d in daily],
-                "cost": [float(d["cst"] or 0) for d in daily],
-            }
+    campaign_daily = daily_by_line(days_qs, [c["id"] for c in campaigns_data[:10]])
 
-    return render(
-        request,
-        "web/dashon.html",
-        {
-            "active": "dashon",
-            "page_title": "DashON",
-            "has_accounts": has_accounts,
-            "date_from": date_from,
-            "date_to": date_to,
-            "compare_on": compare_on,
-            "compare_from": compare_from,
-            "compare_to": compare_to,
-            # Global stats
-            "total_impressions": total_impressions,
-            "total_clicks": total_clicks,
-            "total_cost": round(total_cost, 2),
-            "ctr": ctr,
-            "cpc": cpc,
-            "cpm": dashon_cpm,
-            "alcance": dashon_alcance,
-            "active_campaigns": active_campaigns,
-            # Platform stats
-            "google": google_platform,
-            "meta": meta_platform,
-            # Charts JSON
-            "trend_labels_json": json.dumps(trend_labels),
-            "trend_google_imp_json": json.dumps(trend_google_imp),
-            "trend_meta_imp_json": json.dumps(trend_meta_imp),
-            "trend_google_cost_json": json.dumps(trend_google_cost),
-            "trend_meta_cost_json": json.dumps(trend_meta_cost),
-            "donut_labels_json": json.dumps(donut_labels),
-            "donut_values_json": json.dumps(donut_values),
-            "bar_labels_json": json.dumps(bar_labels),
-            "bar_values_json": json.dumps(bar_values),
-            "bar_colors_json": json.dumps(bar_colors),
-            # Table
-            "campaigns_data": campaigns_data,
-            # Channel comparison & ROI
-            "channel_perf": channel_perf,
-            "top_roi": top_roi,
-            "avg_roi": avg_roi,
-            "total_roi": total_roi,
-            # Period comparison
-            "comparison": dashon_comparison,
-            # Live status
-            "campaigns_on": campaigns_on,
-            "campaigns_off": campaigns_off,
-            "problem_campaigns": problem_campaigns,
-            # Projections
-            "daily_avg_cost": round(daily_avg_cost, 2),
-            "projected_monthly_cost": projected_monthly_cost,
-            "projected_monthly_clicks": projected_monthly_clicks,
-            "projected_roi": projected_roi,
-            # Smart insights
-            "smart_insights": smart_insights,
-            # Ad-level drill-down
-            "ads_by_campaign_json": json.dumps(ads_by_campaign),
-            "campaign_daily_json": json.dumps(campaign_daily),
-            # Business KPIs (estimated - no conversion model yet)
-            "total_roas": round(total_clicks * 0.05 / total_cost, 2) if total_cost > 0 else 0,  # estimated
-            "cost_per_lead": round(total_cost / max(total_clicks * 0.03, 1), 2),  # est 3% conv rate
-            "days_in_period": days_in_period,
-            # Per-client module visibility
-            "hidden_modules": hidden_modules,
-            "can_manage_modules": can_manage_modules,
-            "current_cliente_id": cliente_id,
-        },
-    )
+    data = {
+        "active": "dashon",
+        "page_title": "DashON",
+        "has_accounts": has_accounts,
+        "date_from": date_from,
+        "date_to": date_to,
+        "compare_on": compare_on,
+        "compare_from": compare_from,
+        "compare_to": compare_to,
+        # Global stats
+        "total_impressions": total_impressions,
+        "total_clicks": total_clicks,
+        "total_cost": round(total_cost, 2),
+        "ctr": ctr,
+        "cpc": cpc,
+        "cpm": dashon_cpm,
+        "alcance": dashon_alcance,
+        "active_campaigns": active_campaigns,
+        # Platform stats
+        "google": google_platform,
+        "meta": meta_platform,
+        # Charts JSON
+        "trend_labels_json": json.dumps(trend_labels),
+        "trend_google_imp_json": json.dumps(trend_google_imp),
+        "trend_meta_imp_json": json.dumps(trend_meta_imp),
+        "trend_google_cost_json": json.dumps(trend_google_cost),
+        "trend_meta_cost_json": json.dumps(trend_meta_cost),
+        "donut_labels_json": json.dumps(donut_labels),
+        "donut_values_json": json.dumps(donut_values),
+        "bar_labels_json": json.dumps(bar_labels),
+        "bar_values_json": json.dumps(bar_values),
+        "bar_colors_json": json.dumps(bar_colors),
+        # Table
+        "campaigns_data": campaigns_data,
+        # Channel comparison & ROI
+        "channel_perf": channel_perf,
+        "top_roi": top_roi,
+        "avg_roi": avg_roi,
+        "total_roi": total_roi,
+        # Period comparison
+        "comparison": dashon_comparison,
+        # Live status
+        "campaigns_on": campaigns_on,
+        "campaigns_off": campaigns_off,
+        "problem_campaigns": problem_campaigns,
+        # Projections
+        "daily_avg_cost": round(daily_avg_cost, 2),
+        "projected_monthly_cost": projected_monthly_cost,
+        "projected_monthly_clicks": projected_monthly_clicks,
+        "projected_roi": projected_roi,
+        # Smart insights
+        "smart_insights": smart_insights,
+        # Ad-level drill-down
+        "ads_by_campaign_json": json.dumps(ads_by_campaign),
+        "campaign_daily_json": json.dumps(campaign_daily),
+        # Business KPIs (estimated - no conversion model yet)
+        "total_roas": round(total_clicks * 0.05 / total_cost, 2) if total_cost > 0 else 0,  # estimated
+        "cost_per_lead": round(total_cost / max(total_clicks * 0.03, 1), 2),  # est 3% conv rate
+        "days_in_period": days_in_period,
+        # Per-client module visibility
+        "current_cliente_id": cliente_id,
+    }
+    set_view_context(view_key, data)
+    return render(request, "web/dashon.html", {**data, **module_context})
 
 
 # Allowed module IDs per page. Keep in sync with {% if 'X' in hidden_modules %} checks in templates.
@@ -1852,8 +1735,15 @@ def consolidated_on(request: HttpRequest) -> HttpResponse:
     # Per-client module visibility
     from accounts.models import Cliente as _Cliente
     _cliente_obj = _Cliente.objects.filter(id=cliente_id).only("id", "consolidated_hidden_modules").first()
-    hidden_modules = list(_cliente_obj.consolidated_hidden_modules or []) if _cliente_obj else []
-    can_manage_modules = is_admin(request.user)
+    module_context = {
+        "hidden_modules": list(_cliente_obj.consolidated_hidden_modules or []) if _cliente_obj else [],
+        "can_manage_modules": is_admin(request.user),
+    }
+
+    view_key = view_cache_key("consolidated_on", cliente_id, request.GET, role=role)
+    data = get_view_context(view_key)
+    if data is not None:
+        return render(request, "web/consolidated_on.html", {**data, **module_context})
 
     # All digital channels
     all_channels = [
@@ -1877,11 +1767,7 @@ def consolidated_on(request: HttpRequest) -> HttpResponse:
         "dv360": {"label": "DV360 Geral", "channels": ["dv360"], "color": "#34A853", "gradient": "linear-gradient(135deg,#34A853,#0F9D58)"},
     }
 
-    lines_qs = PlacementLine.objects.filter(media_channel__in=all_channels)
-    if cliente_id:
-        lines_qs = lines_qs.filter(campaign__cliente_id=cliente_id)
-
-    line_ids = list(lines_qs.values_list("id", flat=True))
+    lines_qs = reporting_lines(channels=all_channels, cliente_id=cliente_id)
 
     # Date filter
     date_from = request.GET.get("date_from", "")
@@ -1892,14 +1778,11 @@ def consolidated_on(request: HttpRequest) -> HttpResponse:
     compare_from = request.GET.get("compare_from", "")
     compare_to = request.GET.get("compare_to", "")
 
-    days_qs = PlacementDay.objects.filter(placement_line_id__in=line_ids)
-    if date_from:
-        days_qs = days_qs.filter(date__gte=date_from)
-    if date_to:
-        days_qs = days_qs.filter(date__lte=date_to)
+    days_qs = reporting_days(channels=all_channels, cliente_id=cliente_id, date_from=date_from, date_to=date_to)
 
     # ── Global totals ──
-    stats = days_qs.aggregate(
+    rollup_qs = _rollup_qs(channels=all_channels, cliente_id=cliente_id, date_from=date_from, date_to=date_to)
+    stats = rollup_qs.aggregate(
         total_impressions=Sum("impressions"),
         total_clicks=Sum("clicks"),
         total_cost=Sum("cost"),
@@ -1939,10 +1822,11 @@ def consolidated_on(request: HttpRequest) -> HttpResponse:
                 prev_end = p_start - timedelta(days=1)
                 prev_start = prev_end - timedelta(days=29)
 
-            prev_qs = PlacementDay.objects.filter(
-                placement_line_id__in=line_ids,
-                date__gte=prev_start,
-                date__lte=prev_end,
+            prev_qs = _rollup_qs(
+                channels=all_channels,
+                cliente_id=cliente_id,
+                date_from=prev_start,
+                date_to=prev_end,
             )
             prev_stats = prev_qs.aggregate(
                 imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"),
@@ -1990,11 +1874,12 @@ def consolidated_on(request: HttpRequest) -> HttpResponse:
     bar_colors = []
 
     for key, cfg in channel_groups.items():
-        ch_line_ids = list(lines_qs.filter(media_channel__in=cfg["channels"]).values_list("id", flat=True))
-        if not ch_line_ids:
+        if not lines_qs.filter(media_channel__in=cfg["channels"]).exists():
             continue
-        ch_qs = days_qs.filter(placement_line_id__in=ch_line_ids)
-        ch_stats = ch_qs.aggregate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
+        ch_qs = days_qs.filter(placement_line__media_channel__in=cfg["channels"])
+        ch_stats = rollup_qs.filter(media_channel__in=cfg["channels"]).aggregate(
+            imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"),
+        )
         ch_imp = ch_stats["imp"] or 0
         ch_clk = ch_stats["clk"] or 0
         ch_cst = float(ch_stats["cst"] or 0)
@@ -2008,10 +1893,7 @@ def consolidated_on(request: HttpRequest) -> HttpResponse:
         share_imp = round((ch_imp / total_impressions * 100), 1) if total_impressions > 0 else 0
 
         # Count campaigns per vehicle
-        ch_campaigns = lines_qs.filter(
-            media_channel__in=cfg["channels"],
-            id__in=ch_qs.values_list("placement_line_id", flat=True).distinct(),
-        ).count()
+        ch_campaigns = ch_qs.values("placement_line_id").distinct().count()
 
         # URL for the vehicle's veiculacao page
         url_map = {
@@ -2062,7 +1944,7 @@ def consolidated_on(request: HttpRequest) -> HttpResponse:
 
     # ── Daily trend (all channels combined) ──
     daily_all = list(
-        days_qs.values("date")
+        rollup_qs.values("date")
         .annotate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
         .order_by("date")
     )
@@ -2075,11 +1957,10 @@ def consolidated_on(request: HttpRequest) -> HttpResponse:
     top_vehicles = vehicles_data[:6]
     vehicle_trends = {}
     for v in top_vehicles:
-        v_line_ids = list(lines_qs.filter(
-            media_channel__in=channel_groups[v["key"]]["channels"]
-        ).values_list("id", flat=True))
         v_daily = {}
-        for row in days_qs.filter(placement_line_id__in=v_line_ids).values("date").annotate(
+        for row in rollup_qs.filter(
+            media_channel__in=channel_groups[v["key"]]["channels"]
+        ).values("date").annotate(
             imp=Sum("impressions")
         ).order_by("date"):
             v_daily[str(row["date"])] = row["imp"] or 0
@@ -2109,32 +1990,12 @@ def consolidated_on(request: HttpRequest) -> HttpResponse:
             trend_prev_total = [prev_daily.get(d, 0) for d in prev_dates_sorted] + [0] * (n - len(prev_dates_sorted))
 
     # ── Top campaigns across all vehicles ──
-    campaigns_data = []
-    for line in lines_qs.select_related("campaign", "campaign__cliente"):
-        line_days = days_qs.filter(placement_line=line)
-        agg = line_days.aggregate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
-        imp = agg["imp"] or 0
-        clk = agg["clk"] or 0
-        cst = float(agg["cst"] or 0)
-        if imp == 0 and clk == 0 and cst == 0:
-            continue
-        # Find vehicle label
-        v_label = line.get_media_channel_display()
-        for cfg in channel_groups.values():
-            if line.media_channel in cfg["channels"]:
-                v_label = cfg["label"]
-                break
-        campaigns_data.append({
-            "name": line.channel or line.property_text or f"Campaign #{line.external_ref}",
-            "client": line.campaign.cliente.nome if line.campaign else "",
-            "vehicle": v_label,
-            "impressions": imp,
-            "clicks": clk,
-            "ctr": round((clk / imp * 100), 2) if imp > 0 else 0,
-            "cost": round(cst, 2),
-            "cpc": round((cst / clk), 2) if clk > 0 else 0,
-            "roi": round((clk / cst), 2) if cst > 0 else 0,
-        })
+    vehicle_by_channel = {
+        ch: cfg["label"] for cfg in reversed(list(channel_groups.values())) for ch in cfg["channels"]
+    }
+    campaigns_data = build_campaign_table(lines_qs, days_qs, skip_empty=True)
+    for row in campaigns_data:
+        row["vehicle"] = vehicle_by_channel.get(row["media_channel"], row["channel"])
     campaigns_data.sort(key=lambda c: c["cost"], reverse=True)
 
     # Unique vehicle labels for filter pills (preserving cost order)
@@ -2148,55 +2009,51 @@ def consolidated_on(request: HttpRequest) -> HttpResponse:
 
     has_data = bool(vehicles_data)
 
-    return render(
-        request,
-        "web/consolidated_on.html",
-        {
-            "active": "consolidated_on",
-            "page_title": "Consolidated ON",
-            "has_data": has_data,
-            "date_from": date_from,
-            "date_to": date_to,
-            # Period comparison
-            "compare_on": compare_on,
-            "compare_from": compare_from,
-            "compare_to": compare_to,
-            "comparison": consolidated_comparison,
-            "trend_prev_json": json.dumps(trend_prev_total),
-            # Totals
-            "total_impressions": total_impressions,
-            "total_clicks": total_clicks,
-            "total_cost": round(total_cost, 2),
-            "ctr": ctr,
-            "cpc": cpc,
-            "cpm": cpm,
-            "total_roi": total_roi,
-            "vehicles_count": len(vehicles_data),
-            "campaigns_count": len(campaigns_data),
-            # Per-vehicle breakdown
-            "vehicles_data": vehicles_data,
-            # Charts JSON
-            "trend_labels_json": json.dumps(trend_labels),
-            "trend_imp_json": json.dumps(trend_imp),
-            "trend_clk_json": json.dumps(trend_clk),
-            "trend_cost_json": json.dumps(trend_cost),
-            "donut_labels_json": json.dumps(donut_labels),
-            "donut_values_json": json.dumps(donut_values),
-            "donut_colors_json": json.dumps(donut_colors),
-            "bar_labels_json": json.dumps(bar_labels),
-            "bar_imp_json": json.dumps(bar_imp),
-            "bar_clk_json": json.dumps(bar_clk),
-            "bar_colors_json": json.dumps(bar_colors),
-            "vehicle_trends_json": json.dumps(vehicle_trends),
-            # Campaigns table
-            "campaigns_data": campaigns_data,
-            "vehicles_in_campaigns": vehicles_in_campaigns,
-            # Per-client module visibility
-            "hidden_modules": hidden_modules,
-            "can_manage_modules": can_manage_modules,
-            "current_cliente_id": cliente_id,
-        },
-    )
+    data = {
+        "active": "consolidated_on",
+        "page_title": "Consolidated ON",
+        "has_data": has_data,
+        "date_from": date_from,
+        "date_to": date_to,
+        # Period comparison
+        "compare_on": compare_on,
+        "compare_from": compare_from,
+        "compare_to": compare_to,
+        "comparison": consolidated_comparison,
+        "trend_prev_json": json.dumps(trend_prev_total),
+        # Totals
+        "total_impressions": total_impressions,
+        "total_clicks": total_clicks,
+        "total_cost": round(total_cost, 2),
+        "ctr": ctr,
+        "cpc": cpc,
+        "cpm": cpm,
+        "total_roi": total_roi,
+        "vehicles_count": len(vehicles_data),
+        "campaigns_count": len(campaigns_data),
+        # Per-vehicle breakdown
+        "vehicles_data": vehicles_data,
+        # Charts JSON
+        "trend_labels_json": json.dumps(trend_labels),
+        "trend_imp_json": json.dumps(trend_imp),
+        "trend_clk_json": json.dumps(trend_clk),
+        "trend_cost_json": json.dumps(trend_cost),
+        "donut_labels_json": json.dumps(donut_labels),
+        "donut_values_json": json.dumps(donut_values),
+        "donut_colors_json": json.dumps(donut_colors),
+        "bar_labels_json": json.dumps(bar_labels),
+        "bar_imp_json": json.dumps(bar_imp),
+        "bar_clk_json": json.dumps(bar_clk),
+        "bar_colors_json": json.dumps(bar_colors),
+        "vehicle_trends_json": json.dumps(vehicle_trends),
+        # Campaigns table
+        "campaigns_data": campaigns_data,
+        "vehicles_in_campaigns": vehicles_in_campaigns,
+        # Per-client module visibility
+        "current_cliente_id": cliente_id,
+    }
+    set_view_context(view_key, data)
+    return render(request, "web/consolidated_on.html", {**data, **module_context})
 
 
 @login_required
@@ -2207,7 +2064,8 @@ def relatorios(request: HttpRequest) -> HttpResponse:
 
 @login_required
 def integracoes(request: HttpRequest) -> HttpResponse:
-    from integrations.models import GoogleAdsAccount, SyncLog, MetaAdsAccount, MetaSyncLog
+    from integrations.models import GoogleAdsAccount, SyncJob, SyncLog, MetaAdsAccount, MetaSyncLog
+    from integrations.services.jobs import ACTIVE_STATUSES
 
     role = effective_role(request)
     if role == "cliente":
@@ -2251,6 +2109,17 @@ def integracoes(request: HttpRequest) -> HttpResponse:
         .order_by("-started_at")[:20]
     )
 
+    # Syncs enfileirados / em execução (a página acompanha via api_sync_job_status)
+    active_jobs = list(SyncJob.objects.filter(status__in=ACTIVE_STATUSES).order_by("created_at"))
+    account_names = {
+        (SyncJob.Provider.GOOGLE_ADS, a.id): a.descriptive_name or a.customer_id for a in gads_accounts
+    }
+    account_names.update({
+        (SyncJob.Provider.META_ADS, a.id): a.descriptive_name or a.ad_account_id for a in mads_accounts
+    })
+    for job in active_jobs:
+        job.account_label = account_names.get((job.provider, job.account_id), f"#{job.account_id}")
+
     # Sidebar clientes for the "connect" form
     clientes = list(
         Cliente.objects.filter(ativo=True).order_by("nome").values("id", "nome")
@@ -2283,6 +2152,7 @@ def integracoes(request: HttpRequest) -> HttpResponse:
             "has_token_error": has_token_error,
             "gads_data_count": gads_data_count,
             "mads_data_count": mads_data_count,
+            "active_jobs": active_jobs,
         },
     )
 
@@ -2446,14 +2316,8 @@ def configuracoes(request: HttpRequest) -> HttpResponse:
     )
 
 
-@login_required
-@require_true_admin
-def logs_auditoria(request: HttpRequest) -> HttpResponse:
-    role = effective_role(request)
-    if role == "cliente":
-        return redirect("web:dashboard")
-
-    # Filtros de data - padrão: último dia
+def _audit_date_range(request: HttpRequest):
+    """Período do painel de auditoria (``data_de``/``data_ate``; padrão: ontem e hoje)."""
     hoje = timezone.now().date()
     ontem = hoje - timedelta(days=1)
 
@@ -2466,87 +2330,24 @@ def logs_auditoria(request: HttpRequest) -> HttpResponse:
     except ValueError:
         data_de_parsed = ontem
         data_ate_parsed = hoje
+    return data_de, data_ate, data_de_parsed, data_ate_parsed
 
-    # Garante que data_ate inclui o dia inteiro
-    data_ate_dt = timezone.make_aware(datetime.combine(data_ate_parsed, datetime.max.time()))
-    data_de_dt = timezone.make_aware(datetime.combine(data_de_parsed, datetime.min.time()))
-
-    # Queryset base filtrado por data
-    logs_qs = AuditLog.objects.filter(
-        created_at__gte=data_de_dt,
-        created_at__lte=data_ate_dt,
-    )
-
-    # Stats gerais
-    total_logs = logs_qs.count()
-    total_logins = logs_qs.filter(event_type=AuditLog.EventType.LOGIN).count()
-    total_login_failed = logs_qs.filter(event_type=AuditLog.EventType.LOGIN_FAILED).count()
-    total_pieces_deleted = logs_qs.filter(event_type=AuditLog.EventType.PIECE_DELETED).count()
-    total_campaigns_created = logs_qs.filter(event_type=AuditLog.EventType.CAMPAIGN_CREATED).count()
-    total_assets_uploaded = logs_qs.filter(event_type=AuditLog.EventType.ASSET_UPLOADED).count()
-
-    # Contagem por tipo de evento para gráfico de pizza
-    events_by_type = list(
-        logs_qs.values("event_type")
-        .annotate(count=Count("id"))
-        .order_by("-count")
-    )
 
-    # Mapear labels dos eventos
-    event_labels = dict(AuditLog.EventType.choices)
-    for item in events_by_type:
-        item["label"] = event_labels.get(item["event_type"], item["event_type"])
-
-    # Logins por hora (para gráfico de linha)
-    logins_by_hour = list(
-        logs_qs.filter(event_type__in=[AuditLog.EventType.LOGIN, AuditLog.EventType.LOGIN_FAILED])
-        .annotate(hora=TruncHour("created_at"))
-        .values("hora", "event_type")
-        .annotate(count=Count("id"))
-        .order_by("hora")
-    )
-
-    # Processar para Chart.js
-    horas_labels = []
-    logins_success = []
-    logins_failed = []
-
-    horas_dict = {}
-    for item in logins_by_hour:
-        hora_str = item["hora"].strftime("%d/%m %H:00")
-        if hora_str not in horas_dict:
-            horas_dict[hora_str] = {"success": 0, "failed": 0}
-        if item["event_type"] == AuditLog.EventType.LOGIN:
-            horas_dict[hora_str]["success"] = item["count"]
-        else:
-            horas_dict[hora_str]["failed"] = item["count"]
-
-    for hora, counts in sorted(horas_dict.items()):
-        horas_labels.append(hora)
-        logins_success.append(counts["success"])
-        logins_failed.append(counts["failed"])
-
-    # Eventos por dia (para gráfico de barras)
-    events_by_day = list(
-        logs_qs.annotate(dia=TruncDate("created_at"))
-        .values("dia")
-        .annotate(count=Count("id"))
-        .order_by("dia")
-    )
+@login_required
+@require_true_admin
+def logs_auditoria(request: HttpRequest) -> HttpResponse:
+    from web.services.audit_stats import audit_logs_between, audit_stats
 
-    dias_labels = [item["dia"].strftime("%d/%m") for item in events_by_day]
-    dias_counts = [item["count"] for item in events_by_day]
+    role = effective_role(request)
+    if role == "cliente":
+        return redirect("web:dashboard")
 
-    # Top usuários mais ativos
-    top_users = list(
-        logs_qs.filter(user__isnull=False)
-        .values("user__username", "user__first_name", "user__last_name")
-        .annotate(count=Count("id"))
-        .order_by("-count")[:10]
-    )
+    data_de, data_ate, data_de_parsed, data_ate_parsed = _audit_date_range(request)
+    stats = audit_stats(data_de_parsed, data_ate_parsed)
+    totals = stats["totals"]
 
     # Últimos 50 logs para tabela
-    recent_logs = list(logs_qs.select_related("user", "cliente")[:50])
+    recent_logs = list(audit_logs_between(data_de_parsed, data_ate_parsed).select_related("user", "cliente")[:50])
     # Adicionar details_json para serialização correta no template
     for log in recent_logs:
         log.details_json = json.dumps(log.details, default=str) if log.details else "{}"
@@ -2556,26 +2357,36 @@ def logs_auditoria(request: HttpRequest) -> HttpResponse:
         "page_title": "Logs & Auditoria",
         "data_de": data_de,
         "data_ate": data_ate,
-        "total_logs": total_logs,
-        "total_logins": total_logins,
-        "total_login_failed": total_login_failed,
-        "total_pieces_deleted": total_pieces_deleted,
-        "total_campaigns_created": total_campaigns_created,
-        "total_assets_uploaded": total_assets_uploaded,
-        "events_by_type": json.dumps(events_by_type, default=str),
-        "horas_labels": json.dumps(horas_labels),
-        "logins_success": json.dumps(logins_success),
-        "logins_failed": json.dumps(logins_failed),
-        "dias_labels": json.dumps(dias_labels),
-        "dias_counts": json.dumps(dias_counts),
-        "top_users": top_users,
+        "total_logs": totals["logs"],
+        "total_logins": totals["logins"],
+        "total_login_failed": totals["login_failed"],
+        "total_pieces_deleted": totals["pieces_deleted"],
+        "total_campaigns_created": totals["campaigns_created"],
+        "total_assets_uploaded": totals["assets_uploaded"],
+        "events_by_type": json.dumps(stats["events_by_type"], default=str),
+        "horas_labels": json.dumps(stats["logins_by_hour"]["labels"]),
+        "logins_success": json.dumps(stats["logins_by_hour"]["success"]),
+        "logins_failed": json.dumps(stats["logins_by_hour"]["failed"]),
+        "dias_labels": json.dumps(stats["events_by_day"]["labels"]),
+        "dias_counts": json.dumps(stats["events_by_day"]["counts"]),
+        "top_users": stats["top_users"],
         "recent_logs": recent_logs,
-        "event_labels": event_labels,
+        "event_labels": dict(AuditLog.EventType.choices),
     }
 
     return render(request, "web/logs_auditoria.html", context)
 
 
+@login_required
+@require_true_admin
+def api_audit_stats(request: HttpRequest) -> JsonResponse:
+    """Mesmas estatísticas do painel de auditoria, em JSON (``?data_de=&data_ate=``)."""
+    from web.services.audit_stats import audit_stats
+
+    _, _, data_de_parsed, data_ate_parsed = _audit_date_range(request)
+    return JsonResponse({"ok": True, **audit_stats(data_de_parsed, data_ate_parsed)})
+
+
 @login_required
 @require_admin
 def analytics_real(request: HttpRequest) -> HttpResponse:
@@ -2583,6 +2394,17 @@ def analytics_real(request: HttpRequest) -> HttpResponse:
     return analytics(request, template="web/analytics_real.html", ai_mode=True)
 
 
+def _analytics_ai_status(ai_mode: bool) -> dict | None:
+    """AI status check (non-blocking — insights loaded via AJAX)."""
+    if not ai_mode:
+        return None
+    try:
+        from web.services.ai_analytics import check_ai_status
+        return check_ai_status()
+    except Exception:
+        return None
+
+
 @login_required
 def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mode: bool = False) -> HttpResponse:
     """Analytics Intelligence – diagnostic scoring, insights, recommendations, funnel & alerts."""
@@ -2601,28 +2423,25 @@ def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mod
             "require_cliente": True,
         })
 
+    view_key = view_cache_key("analytics", cliente_id, request.GET, role=role, ai_mode=ai_mode)
+    data = get_view_context(view_key)
+    if data is not None:
+        return render(request, template, {**data, "ai_status": _analytics_ai_status(ai_mode)})
+
     # ── Digital channels ──
     google_channels = ["google", "youtube", "display", "search"]
     meta_channels = ["meta"]
     all_channels = google_channels + meta_channels
 
-    lines_qs = PlacementLine.objects.filter(
-        media_channel__in=all_channels,
-        campaign__cliente_id=cliente_id,
-    )
-    line_ids = list(lines_qs.values_list("id", flat=True))
+    lines_qs = reporting_lines(channels=all_channels, cliente_id=cliente_id)
 
     # Date filter
     date_from = request.GET.get("date_from", "")
     date_to = request.GET.get("date_to", "")
 
-    days_qs = PlacementDay.objects.filter(placement_line_id__in=line_ids)
-    if date_from:
-        days_qs = days_qs.filter(date__gte=date_from)
-    if date_to:
-        days_qs = days_qs.filter(date__lte=date_to)
+    days_qs = reporting_days(channels=all_channels, cliente_id=cliente_id, date_from=date_from, date_to=date_to)
 
-    if not line_ids or not days_qs.exists():
+    if not days_qs.exists():
         return render(request, template, {
             "active": "analytics",
             "page_title": "Analytics Intelligence",
@@ -2632,7 +2451,8 @@ def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mod
         })
 
     # ── Global aggregates ──
-    stats = days_qs.aggregate(
+    rollup_qs = _rollup_qs(channels=all_channels, cliente_id=cliente_id, date_from=date_from, date_to=date_to)
+    stats = rollup_qs.aggregate(
         total_imp=Sum("impressions"),
         total_clk=Sum("clicks"),
         total_cost=Sum("cost"),
@@ -2655,10 +2475,11 @@ def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mod
             prev_end = p_start - _td(days=1)
             prev_start = prev_end - _td(days=p_len - 1)
 
-            prev_qs = PlacementDay.objects.filter(
-                placement_line_id__in=line_ids,
-                date__gte=prev_start,
-                date__lte=prev_end,
+            prev_qs = _rollup_qs(
+                channels=all_channels,
+                cliente_id=cliente_id,
+                date_from=prev_start,
+                date_to=prev_end,
             )
             prev_stats = prev_qs.aggregate(
                 total_imp=Sum("impressions"), total_clk=Sum("clicks"), total_cost=Sum("cost"),
@@ -2692,11 +2513,8 @@ def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mod
             pass
 
     # ── Per-platform aggregates ──
-    google_line_ids = list(lines_qs.filter(media_channel__in=google_channels).values_list("id", flat=True))
-    meta_line_ids = list(lines_qs.filter(media_channel__in=meta_channels).values_list("id", flat=True))
-
-    def _agg(ids):
-        qs = days_qs.filter(placement_line_id__in=ids)
+    def _agg(channels):
+        qs = rollup_qs.filter(media_channel__in=channels)
         s = qs.aggregate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
         imp = s["imp"] or 0
         clk = s["clk"] or 0
@@ -2709,39 +2527,18 @@ def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mod
             "cpc": round((cst / clk), 2) if clk > 0 else 0,
         }
 
-    google_agg = _agg(google_line_ids)
-    meta_agg = _agg(meta_line_ids)
+    google_agg = _agg(google_channels)
+    meta_agg = _agg(meta_channels)
 
     # ── Per-campaign metrics ──
-    campaign_metrics = []
-    for line in lines_qs.select_related("campaign", "campaign__cliente"):
-        agg = days_qs.filter(placement_line=line).aggregate(
-            imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"),
-        )
-        imp = agg["imp"] or 0
-        clk = agg["clk"] or 0
-        cst = float(agg["cst"] or 0)
-        if imp == 0 and clk == 0 and cst == 0:
-            continue
-        ctr = round((clk / imp * 100), 2) if imp > 0 else 0
-        cpc = round((cst / clk), 2) if clk > 0 else 0
-        platform = "Meta Ads" if line.media_channel in meta_channels else "Google Ads"
-        name = line.channel or line.property_text or f"Campaign #{line.external_ref}"
-        campaign_metrics.append({
-            "id": line.id,
-            "name": name,
-            "platform": platform,
-            "impressions": imp,
-            "clicks": clk,
-            "ctr": ctr,
-            "cost": round(cst, 2),
-            "cpc": cpc,
-        })
+    campaign_metrics = build_campaign_table(lines_qs, days_qs, skip_empty=True)
+    for row in campaign_metrics:
+        row["platform"] = "Meta Ads" if row["media_channel"] in meta_channels else "Google Ads"
     campaign_metrics.sort(key=lambda c: c["cost"], reverse=True)
 
     # ── Daily trend (last 30 unique dates) ──
     daily_data = list(
-        days_qs.values("date")
+        rollup_qs.values("date")
         .annotate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
         .order_by("date")
     )
@@ -3246,11 +3043,7 @@ def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mod
         prev_end = period_start - timedelta(days=1)
         prev_start = prev_end - timedelta(days=period_days - 1)
 
-        prev_qs = PlacementDay.objects.filter(
-            placement_line_id__in=line_ids,
-            date__gte=prev_start,
-            date__lte=prev_end,
-        )
+        prev_qs = reporting_days(channels=all_channels, cliente_id=cliente_id, date_from=prev_start, date_to=prev_end)
         prev_stats = prev_qs.aggregate(
             imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"),
         )
@@ -3288,18 +3081,13 @@ def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mod
     # ──────────────────────────────────────────────────
     # BLOCO 7: MATRIZ DE EFICIÊNCIA (per-channel efficiency)
     # ──────────────────────────────────────────────────
-    channel_map = {}
-    for line in lines_qs:
-        ch = line.media_channel.upper()
-        if ch not in channel_map:
-            channel_map[ch] = {"line_ids": [], "label": ch}
-        channel_map[ch]["line_ids"].append(line.id)
-
     efficiency_matrix = []
-    for ch_key, ch_info in channel_map.items():
-        ch_agg = days_qs.filter(placement_line_id__in=ch_info["line_ids"]).aggregate(
-            imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"),
-        )
+    for ch_agg in (
+        days_qs.values("placement_line__media_channel")
+        .annotate(imp=Sum("impressions"), clk=Sum("clicks"), cst=Sum("cost"))
+        .order_by("placement_line__media_channel")
+    ):
+        ch_label = ch_agg["placement_line__media_channel"].upper()
         ch_imp = ch_agg["imp"] or 0
         ch_clk = ch_agg["clk"] or 0
         ch_cost = float(ch_agg["cst"] or 0)
@@ -3326,7 +3114,7 @@ def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mod
             rec_text = "Testar novos criativos"
 
         efficiency_matrix.append({
-            "channel": ch_info["label"],
+            "channel": ch_label,
             "impressions": ch_imp,
             "clicks": ch_clk,
             "cost": round(ch_cost, 2),
@@ -3358,7 +3146,7 @@ def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mod
     # Provide per-platform averages for the simulator
     # Markets (regions) shares for optional redistribution UI
     markets_qs = (
-        PlacementDay.objects.filter(placement_line_id__in=line_ids)
+        reporting_days(channels=all_channels, cliente_id=cliente_id)
         .values("placement_line__market")
         .annotate(total_cost=Sum("cost"))
         .order_by("-total_cost")
@@ -3392,22 +3180,11 @@ def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mod
         "markets": markets_data,
     }
 
-    # ── AI status check (non-blocking — insights loaded via AJAX) ──
-    ai_summary = ""
-    ai_status = None
-    if ai_mode:
-        try:
-            from web.services.ai_analytics import check_ai_status
-            ai_status = check_ai_status()
-        except Exception:
-            pass
-
-    return render(request, template, {
+    data = {
         "active": "analytics",
         "page_title": "Analytics Intelligence" + (" (AI)" if ai_mode else ""),
         "ai_mode": ai_mode,
-        "ai_status": ai_status,
-        "ai_summary": ai_summary,
+        "ai_summary": "",
         "date_from": date_from,
         "date_to": date_to,
         # Global stats
@@ -3460,7 +3237,9 @@ def analytics(request: HttpRequest, template: str = "web/analytics.html", ai_mod
         "campaigns": campaign_metrics,
         # Period comparison
         "period_comparison": period_comparison,
-    })
+    }
+    set_view_context(view_key, data)
+    return render(request, template, {**data, "ai_status": _analytics_ai_status(ai_mode)})
 
 
 @login_required
@@ -4596,7 +4375,9 @@ def api_campaign_detail(request: HttpRequest, campaign_id: int) -> HttpResponse:
         subtitle = " + ".join([pretty_media_channel.get(ch, ch) for ch in piece_channels]) if piece_channels else ""
         last_asset = piece.assets.order_by("-created_at").first()
         image_url = ""
-        if last_asset and getattr(last_asset.file, "url", ""):
+        if last_asset and last_asset.thumb_url:
+            image_url = request.build_absolute_uri(last_asset.thumb_url)
+        elif last_asset and getattr(last_asset.file, "url", ""):
             image_url = request.build_absolute_uri(last_asset.file.url)
 
         pieces_payload.append(
@@ -5362,49 +5143,20 @@ def api_upload_piece_asset(request: HttpRequest, piece_id: int) -> HttpResponse:
     if not files:
         return JsonResponse({"error": "no_file"}, status=400)
 
-    from campaigns.services import compute_sha256, infer_piece_type_from_filename, try_ffprobe, extract_duration_sec_from_ffprobe
-    from campaigns.models import CreativeAsset
-
-    created_assets = []
-    for f in files:
-        checksum = compute_sha256(f)
-        if checksum and CreativeAsset.objects.filter(piece=piece, checksum=checksum).exists():
-            continue
-
-        asset = CreativeAsset.objects.create(
-            piece=piece,
-            file=f,
-            checksum=checksum,
-            metadata={
-                "original_name": getattr(f, "name", ""),
-                "content_type": getattr(f, "content_type", ""),
-                "size_bytes": getattr(f, "size", None),
-            },
-        )
-
-        # Tentar extrair duração com ffprobe
-        try:
-            meta = try_ffprobe(asset.file.path)
-            if meta:
-                merged = dict(asset.metadata or {})
-                merged["ffprobe"] = meta
-                dur = extract_duration_sec_from_ffprobe(meta)
-                if dur is not None:
-                    merged["duration_sec"] = dur
-                    if piece.duration_sec == 0:
-                        piece.duration_sec = dur
-                        piece.save(update_fields=["duration_sec"])
-                asset.metadata = merged
-                asset.save(update_fields=["metadata"])
-        except Exception:
-            pass
+    from campaigns.asset_ingest import ingest_assets
 
-        created_assets.append({
+    # Hash em paralelo e dedupe numa consulta; o ffprobe roda em background.
+    ingested = ingest_assets((piece, f) for f in files)
+    created_assets = [
+        {
             "id": asset.id,
             "url": asset.file.url if asset.file else None,
-            "name": getattr(f, "name", ""),
-            "content_type": getattr(f, "content_type", ""),
-        })
+            "name": asset.metadata.get("original_name", ""),
+            "content_type": asset.metadata.get("content_type", ""),
+            "probe_status": asset.probe_status,
+        }
+        for asset in ingested["assets"]
+    ]
 
     # Log de assets enviados
     if created_assets:
@@ -5491,6 +5243,7 @@ def campanha_detalhe(request: HttpRequest, campaign_id: int) -> HttpResponse:
         # Determinar tipo de mídia baseado nos assets
         media_type = None
         thumb_url = None
+        has_rendition = False  # thumb_url aponta para a miniatura WebP, não o original
         if first_asset:
             meta = first_asset.metadata or {}
             content_type = meta.get("content_type", "")
@@ -5500,7 +5253,10 @@ def campanha_detalhe(request: HttpRequest, campaign_id: int) -> HttpResponse:
                 media_type = "audio"
             elif "image" in content_type:
                 media_type = "image"
-            if first_asset.file:
+            if first_asset.thumb_url:
+                thumb_url = first_asset.thumb_url
+                has_rendition = True
+            elif first_asset.file:
                 thumb_url = first_asset.file.url
 
         # Formato baseado no tipo e duração
@@ -5527,6 +5283,7 @@ def campanha_detalhe(request: HttpRequest, campaign_id: int) -> HttpResponse:
             "format_text": format_text,
             "media_type": media_type,
             "thumb_url": thumb_url,
+            "has_rendition": has_rendition,
             "has_asset": first_asset is not None,
         })
 
@@ -5846,6 +5603,8 @@ def api_piece_create(request: HttpRequest, campaign_id: int) -> HttpResponse:
 @require_admin
 def api_region_investments(request: HttpRequest, campaign_id: int) -> HttpResponse:
     """API para gerenciar investimentos por região de uma campanha."""
+    from campaigns.data_version import REGIONS, bump_for_campaigns
+
     campaign = Campaign.objects.filter(id=campaign_id).first()
     if campaign is None:
         return JsonResponse({"error": "campaign_not_found"}, status=404)
@@ -5877,6 +5636,7 @@ def api_region_investments(request: HttpRequest, campaign_id: int) -> HttpRespon
 
         # Remove investimentos existentes e recria
         campaign.region_investments.all().delete()
+        bump_for_campaigns([campaign.id], (REGIONS,))
 
         created = []
         for i, inv in enumerate(investments):
@@ -5911,6 +5671,18 @@ def api_region_investments(request: HttpRequest, campaign_id: int) -> HttpRespon
 # ---------------------------------------------------------------------------
 
 
+def _sync_enqueue_message(outcome: str) -> str:
+    """Flash message for the result of ``enqueue_sync``."""
+    from integrations.services import jobs
+
+    return {
+        jobs.ENQUEUED: "Sync enfileirado. O progresso aparece abaixo e no historico de sincronizacoes.",
+        jobs.ACTIVE: "Ja existe um sync na fila ou em andamento para esta conta. O progresso aparece abaixo.",
+        jobs.UPGRADED: "O sync que estava na fila foi ampliado para sync completo.",
+        jobs.FOLLOW_UP: "Um sync esta em andamento; o sync completo foi enfileirado para rodar em seguida.",
+    }[outcome]
+
+
 @login_required
 @require_admin
 def gads_auth_url(request: HttpRequest) -> HttpResponse:
@@ -6029,23 +5801,16 @@ def gads_disconnect(request: HttpRequest, account_id: int) -> HttpResponse:
 @login_required
 @require_admin
 def gads_sync(request: HttpRequest, account_id: int) -> HttpResponse:
-    """Trigger a manual sync for a Google Ads account."""
-    from integrations.models import GoogleAdsAccount
-    from integrations.services.google_ads import full_sync
+    """Enqueue a sync job for a Google Ads account (run by run_sync_worker)."""
+    from integrations.models import GoogleAdsAccount, SyncJob
+    from integrations.services.jobs import enqueue_sync
 
     if request.method == "POST":
         account = GoogleAdsAccount.objects.filter(id=account_id, is_active=True).first()
         if account:
-            log = full_sync(account, days=180)
-            if log.status == "success":
-                request.session["gads_success"] = (
-                    f"Sync concluido: {log.campaigns_synced} campanhas, "
-                    f"{log.metrics_synced} metricas (ultimos 180 dias)."
-                )
-            else:
-                request.session["gads_error"] = (
-                    f"Erro no sync: {log.error_message}"
-                )
+            full = request.POST.get("full") == "1"
+            _, outcome = enqueue_sync(SyncJob.Provider.GOOGLE_ADS, account.id, days=180, full=full, user=request.user)
+            request.session["gads_success"] = _sync_enqueue_message(outcome)
     return redirect("web:integracoes")
 
 
@@ -6170,23 +5935,16 @@ def mads_disconnect(request: HttpRequest, account_id: int) -> HttpResponse:
 @login_required
 @require_admin
 def mads_sync(request: HttpRequest, account_id: int) -> HttpResponse:
-    """Trigger a manual sync for a Meta Ads account."""
-    from integrations.models import MetaAdsAccount
-    from integrations.services.meta_ads import full_sync
+    """Enqueue a sync job for a Meta Ads account (run by run_sync_worker)."""
+    from integrations.models import MetaAdsAccount, SyncJob
+    from integrations.services.jobs import enqueue_sync
 
     if request.method == "POST":
         account = MetaAdsAccount.objects.filter(id=account_id, is_active=True).first()
         if account:
-            log = full_sync(account, days=180)
-            if log.status == "success":
-                request.session["mads_success"] = (
-                    f"Sync concluido: {log.campaigns_synced} campanhas, "
-                    f"{log.metrics_synced} metricas (ultimos 180 dias)."
-                )
-            else:
-                request.session["mads_error"] = (
-                    f"Erro no sync: {log.error_message}"
-                )
+            full = request.POST.get("full") == "1"
+            _, outcome = enqueue_sync(SyncJob.Provider.META_ADS, account.id, days=180, full=full, user=request.user)
+            request.session["mads_success"] = _sync_enqueue_message(outcome)
     return redirect("web:integracoes")
 
 
@@ -6206,6 +5964,8 @@ def mads_clear_logs(request: HttpRequest) -> HttpResponse:
 @require_admin
 def gads_clear_data(request: HttpRequest) -> HttpResponse:
     """Delete all synced Google Ads data (PlacementLine + PlacementDay cascade)."""
+    from integrations.models import GoogleAdsAccount
+
     if request.method == "POST":
         google_channels = ["google", "youtube", "display", "search"]
         lines = PlacementLine.objects.filter(
@@ -6213,7 +5973,11 @@ def gads_clear_data(request: HttpRequest) -> HttpResponse:
             external_ref__gt="",
         )
         count = lines.count()
+        touched_campaign_ids = list(lines.values_list("campaign_id", flat=True).distinct())
         lines.delete()
+        refresh_placement_rollups(touched_campaign_ids)
+        # Sem dados, o próximo sync precisa refazer o backfill completo
+        GoogleAdsAccount.objects.update(metrics_synced_through=None)
         # Remove auto-created parent campaigns (empty after purge)
         Campaign.objects.filter(
             name__startswith="Google Ads - ",
@@ -6229,13 +5993,18 @@ def gads_clear_data(request: HttpRequest) -> HttpResponse:
 @require_admin
 def mads_clear_data(request: HttpRequest) -> HttpResponse:
     """Delete all synced Meta Ads data (PlacementLine + PlacementDay cascade)."""
+    from integrations.models import MetaAdsAccount
+
     if request.method == "POST":
         lines = PlacementLine.objects.filter(
             media_channel="meta",
             external_ref__gt="",
         )
         count = lines.count()
+        touched_campaign_ids = list(lines.values_list("campaign_id", flat=True).distinct())
         lines.delete()
+        refresh_placement_rollups(touched_campaign_ids)
+        MetaAdsAccount.objects.update(metrics_synced_through=None)
         Campaign.objects.filter(
             name__startswith="Meta Ads - ",
             placement_lines__isnull=True,
@@ -6246,6 +6015,19 @@ def mads_clear_data(request: HttpRequest) -> HttpResponse:
     return redirect("web:integracoes")
 
 
+@login_required
+@require_admin
+def api_sync_job_status(request: HttpRequest, job_id: int) -> JsonResponse:
+    """Polling endpoint for a queued Google/Meta sync job."""
+    from integrations.models import SyncJob
+    from integrations.services.jobs import job_status
+
+    job = SyncJob.objects.filter(id=job_id).first()
+    if not job:
+        return JsonResponse({"ok": False, "error": "not_found"}, status=404)
+    return JsonResponse({"ok": True, "job": job_status(job)})
+
+
 @login_required
 def api_campaign_drilldown(request: HttpRequest, line_id: int) -> JsonResponse:
     """Return ad groups and ads for a campaign line (drill-down)."""
@@ -6363,22 +6145,12 @@ def api_veiculacao_data(request: HttpRequest) -> JsonResponse:
         channels = meta_channels
     else:
         channels = google_channels + meta_channels
-    lines_qs = PlacementLine.objects.filter(media_channel__in=channels)
-    if cliente_id:
-        lines_qs = lines_qs.filter(campaign__cliente_id=cliente_id)
-
-    line_ids = list(lines_qs.values_list("id", flat=True))
-
     date_from = request.GET.get("date_from", "")
     date_to = request.GET.get("date_to", "")
-    days_qs = PlacementDay.objects.filter(placement_line_id__in=line_ids)
-    if date_from:
-        days_qs = days_qs.filter(date__gte=date_from)
-    if date_to:
-        days_qs = days_qs.filter(date__lte=date_to)
+    rollup_qs = _rollup_qs(channels=channels, cliente_id=cliente_id, date_from=date_from, date_to=date_to)
 
     daily = list(
-        days_qs.values("date")
+        rollup_qs.values("date")
         .annotate(
             impressions=Sum("impressions"),
             clicks=Sum("clicks"),
@@ -6596,6 +6368,7 @@ def campaign_financial_upload(request: HttpRequest, campaign_id: int) -> HttpRes
 @require_admin
 def campaign_financial_delete(request: HttpRequest, campaign_id: int) -> HttpResponse:
     """Deleta todos os dados financeiros de uma campanha."""
+    from campaigns.data_version import FINANCIAL, PIS, REGIONS, bump_for_campaigns
     from campaigns.models import FinancialSummary, MediaEfficiency, PIControl
 
     if request.method != "POST":
@@ -6611,6 +6384,7 @@ def campaign_financial_delete(request: HttpRequest, campaign_id: int) -> HttpRes
     MediaEfficiency.objects.filter(campaign=campaign).delete()
     PIControl.objects.filter(campaign=campaign).delete()
     RegionInvestment.objects.filter(campaign=campaign).delete()
+    bump_for_campaigns([campaign.id], (FINANCIAL, PIS, REGIONS))
 
     AuditLog.log(
         AuditLog.EventType.MEDIA_PLAN_UPLOADED,
@@ -6947,16 +6721,10 @@ def api_ai_insights(request: HttpRequest) -> JsonResponse:
     # Compute the same metrics the analytics view computes
     google_channels = ["google", "search", "display", "youtube", "shopping", "pmax"]
     meta_channels = ["meta", "facebook", "instagram"]
-    lines_qs = PlacementLine.objects.filter(campaign__cliente_id=cliente_id)
-    line_ids = list(lines_qs.values_list("id", flat=True))
-    if not line_ids:
+    if not reporting_lines(cliente_id=cliente_id).exists():
         return JsonResponse({"ok": False, "error": "Sem dados"})
 
-    days_qs = PlacementDay.objects.filter(placement_line_id__in=line_ids)
-    if date_from:
-        days_qs = days_qs.filter(date__gte=date_from)
-    if date_to:
-        days_qs = days_qs.filter(date__lte=date_to)
+    days_qs = reporting_days(cliente_id=cliente_id, date_from=date_from, date_to=date_to)
 
     stats = days_qs.aggregate(total_imp=Sum("impressions"), total_clk=Sum("clicks"), total_cost=Sum("cost"))
     total_imp = stats["total_imp"] or 0
@@ -7015,15 +6783,7 @@ def api_ai_executive_report(request: HttpRequest) -> JsonResponse:
     meta_channels = ["meta"]
     all_channels = google_channels + meta_channels
 
-    lines_qs = PlacementLine.objects.filter(
-        media_channel__in=all_channels, campaign__cliente_id=cliente_id,
-    )
-    line_ids = list(lines_qs.values_list("id", flat=True))
-    days_qs = PlacementDay.objects.filter(placement_line_id__in=line_ids)
-    if date_from:
-        days_qs = days_qs.filter(date__gte=date_from)
-    if date_to:
-        days_qs = days_qs.filter(date__lte=date_to)
+    days_qs = reporting_days(channels=all_channels, cliente_id=cliente_id, date_from=date_from, date_to=date_to)
 
     from django.db.models import Sum
     stats = days_qs.aggregate(
@@ -7187,8 +6947,7 @@ def api_send_whatsapp(request: HttpRequest) -> JsonResponse:
         return JsonResponse({"ok": False, "error": f"WhatsApp não configurado para {cliente.nome}. Edite o cliente e preencha o campo WhatsApp."})
 
     # Compute metrics
-    line_ids = list(PlacementLine.objects.filter(campaign__cliente_id=cliente_id).values_list("id", flat=True))
-    days_qs = PlacementDay.objects.filter(placement_line_id__in=line_ids)
+    days_qs = reporting_days(cliente_id=cliente_id)
     stats = days_qs.aggregate(total_imp=Sum("impressions"), total_clk=Sum("clicks"), total_cost=Sum("cost"))
     total_imp = stats["total_imp"] or 0
     total_clk = stats["total_clk"] or 0